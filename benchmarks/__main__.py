@@ -0,0 +1,72 @@
+"""Benchmark suite entry point.
+
+    python -m benchmarks run --users 50 --years 5 --output results.json
+    python -m benchmarks run --mode gunicorn --gunicorn-workers 4 --concurrency 8
+    python -m benchmarks run --baseline main.json --threshold 0.2   # exit 1 on regressions
+    python -m benchmarks compare main.json branch.json
+"""
+import argparse
+import json
+import sys
+from benchmarks import runner
+
+
+def _report_regressions(baseline, current, threshold):
+    if baseline['meta'].get('mode') != current['meta'].get('mode'):
+        print(f"warning: comparing {baseline['meta'].get('mode')} results against {current['meta'].get('mode')}")
+    regressions = runner.compare(baseline, current, threshold)
+    for name, before, after in regressions:
+        print(f'REGRESSION {name}: p95 {before:.2f} ms -> {after:.2f} ms')
+    if not regressions:
+        print(f'No endpoint regressed by more than {threshold:.0%}')
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='generate a population and benchmark every endpoint')
+    run.add_argument('--mode', choices=['client', 'gunicorn'], default='client')
+    run.add_argument('--users', type=int, default=50)
+    run.add_argument('--years', type=int, default=5)
+    run.add_argument('--requests', type=int, default=200, help='measured requests per endpoint')
+    run.add_argument('--endpoints', nargs='*', choices=sorted(runner.ENDPOINTS))
+    run.add_argument('--gunicorn-workers', type=int, default=2)
+    run.add_argument('--concurrency', type=int, default=1, help='client threads in gunicorn mode')
+    run.add_argument('--seed', type=int, default=1234)
+    run.add_argument('--output', help='write results JSON here')
+    run.add_argument('--baseline', help='results JSON to compare against')
+    run.add_argument('--threshold', type=float, default=0.2, help='allowed p95 slowdown, 0.2 = 20%%')
+
+    diff = commands.add_parser('compare', help='compare two results files')
+    diff.add_argument('baseline')
+    diff.add_argument('current')
+    diff.add_argument('--threshold', type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        return _report_regressions(baseline, current, args.threshold)
+
+    results = runner.run(
+        mode=args.mode, users=args.users, years=args.years, requests=args.requests,
+        endpoints=args.endpoints, gunicorn_workers=args.gunicorn_workers,
+        concurrency=args.concurrency, seed=args.seed
+    )
+    print(runner.format_results(results))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            return _report_regressions(json.load(f), results, args.threshold)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
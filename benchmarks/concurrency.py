@@ -0,0 +1,101 @@
+"""Mixed read/write throughput of several worker processes sharing one SQLite file.
+
+Each worker process imports the app the way a gunicorn worker does and drives it
+through the test client, so the numbers include Flask, SQLAlchemy and the SQLite
+locking behaviour but no HTTP. Runs every engine profile against a fresh database:
+
+    python -m benchmarks.concurrency --workers 4 --seconds 10 --write-ratio 0.2
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from datetime import date, timedelta
+from benchmarks.harness import load_app, throwaway_database_url
+
+SCENARIOS = [
+    ('default', {'SQLITE_PROFILE': 'default', 'SQLITE_READ_ENGINE': '0'}),
+    ('production', {'SQLITE_PROFILE': 'production', 'SQLITE_READ_ENGINE': '0'}),
+    ('production+read-engine', {'SQLITE_PROFILE': 'production', 'SQLITE_READ_ENGINE': '1'}),
+]
+
+READ_PATHS = ['/api/periods?limit=20', '/api/cycle-stats', '/api/predict/period']
+
+
+def _seed(database_url, env, workers):
+    app = load_app(database_url, env)
+    client = app.test_client()
+    for index in range(workers):
+        name = f'bench-{index}'
+        response = client.post('/api/register', json={
+            'username': name, 'email': f'{name}@example.com', 'password': 'secret'
+        })
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        client.post('/api/periods/bulk', headers=headers, json=[
+            {'start_date': (date(2015, 1, 1) + timedelta(days=28 * i)).isoformat()}
+            for i in range(120)
+        ])
+
+
+def _worker(database_url, env, index, seconds, write_ratio, results):
+    app = load_app(database_url, env)
+    client = app.test_client()
+    response = client.post('/api/login', json={'username': f'bench-{index}', 'password': 'secret'})
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    rng = random.Random(index)
+
+    reads = writes = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            start = date(2025, 1, 1) + timedelta(days=rng.randint(0, 3000))
+            response = client.post('/api/periods', headers=headers, json={'start_date': start.isoformat()})
+            writes += response.status_code == 201
+        else:
+            response = client.get(rng.choice(READ_PATHS), headers=headers)
+            reads += response.status_code == 200
+        errors += response.status_code >= 500
+    results.put((reads, writes, errors))
+
+
+def run_scenario(env, workers, seconds, write_ratio):
+    context = multiprocessing.get_context('spawn')
+    database_url = throwaway_database_url('bench-concurrency-')
+
+    seeder = context.Process(target=_seed, args=(database_url, env, workers))
+    seeder.start()
+    seeder.join()
+
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(database_url, env, index, seconds, write_ratio, results))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    totals = [sum(values) for values in zip(*(results.get() for _ in processes))]
+    for process in processes:
+        process.join()
+    reads, writes, errors = totals
+    return {
+        'reads_per_sec': reads / seconds,
+        'writes_per_sec': writes / seconds,
+        'errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f'{"scenario":<24} {"reads/s":>10} {"writes/s":>10} {"errors":>8}')
+    for name, env in SCENARIOS:
+        result = run_scenario(env, args.workers, args.seconds, args.write_ratio)
+        print(f'{name:<24} {result["reads_per_sec"]:>10.1f} {result["writes_per_sec"]:>10.1f} {result["errors"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
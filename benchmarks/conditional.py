@@ -0,0 +1,76 @@
+"""Full responses against 304 Not Modified for clients that poll with If-None-Match.
+
+For each polled endpoint, times plain GETs and GETs that send back the ETag of the
+previous response, and counts the SQL statements each path runs and how many of
+them touch the period or ovulation tables:
+
+    python -m benchmarks.conditional --years 10 --requests 200
+"""
+import argparse
+import re
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from benchmarks import population
+from benchmarks.harness import latency_summary, load_app, throwaway_database_url
+from benchmarks.runner import TestClientDriver, _login
+
+POLLED_PATHS = ['/periods', '/ovulation', '/predict/period', '/predict/ovulation', '/cycle-stats']
+ROW_TABLES = re.compile(r'\bFROM\s+"?(period|ovulation)\b', re.IGNORECASE)
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+        event.listen(Engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def take(self):
+        statements, self.statements = self.statements, []
+        return statements
+
+
+def _measure(driver, path, headers, requests, counter):
+    latencies = []
+    counter.take()
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        status, _ = driver.request('GET', path, headers=headers)
+        latencies.append(time.perf_counter() - request_started)
+    elapsed = time.perf_counter() - started
+    statements = counter.take()
+    summary = latency_summary(latencies, elapsed)
+    summary['status'] = status
+    summary['queries'] = len(statements) / requests
+    summary['row_queries'] = sum(1 for s in statements if ROW_TABLES.search(s)) / requests
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    app = load_app(throwaway_database_url('bench-conditional-'))
+    username = population.generate(app, users=1, years=args.years)[0]
+    client = app.test_client()
+    driver = TestClientDriver(app)
+    headers = {'Authorization': f'Bearer {_login(driver, username)}'}
+    counter = StatementCounter()
+
+    print(f'{"endpoint":<20} {"result":<6} {"status":>6} {"p50 ms":>8} {"p95 ms":>8} {"queries":>8} {"row q.":>7}')
+    for path in POLLED_PATHS:
+        etag = client.get(f'/api{path}', headers=headers).headers['ETag']
+        full = _measure(driver, path, headers, args.requests, counter)
+        cached = _measure(driver, path, dict(headers, **{'If-None-Match': etag}), args.requests, counter)
+        for name, result in (('200', full), ('304', cached)):
+            print(f'{path:<20} {name:<6} {result["status"]:>6} {result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+                  f'{result["queries"]:>8.1f} {result["row_queries"]:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
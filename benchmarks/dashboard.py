@@ -0,0 +1,74 @@
+"""One GET /api/dashboard against the six calls the dashboard used to fan out to.
+
+Each iteration times the separate profile, period list, ovulation list, both
+predictions and cycle stats requests back to back, then the single dashboard
+request for the same data, for a user with a generated history:
+
+    python -m benchmarks.dashboard --years 10 --requests 200
+    python -m benchmarks.dashboard --mode gunicorn
+"""
+import argparse
+import time
+from benchmarks import population
+from benchmarks.harness import latency_summary, load_app, throwaway_database_url
+from benchmarks.runner import GunicornServer, HTTPDriver, TestClientDriver, _login
+
+SEPARATE_PATHS = [
+    '/profile',
+    '/periods?limit=10',
+    '/ovulation?limit=10',
+    '/predict/period',
+    '/predict/ovulation',
+    '/cycle-stats',
+]
+DASHBOARD_PATH = '/dashboard?limit=10'
+
+
+def _timed(driver, paths, headers):
+    started = time.perf_counter()
+    for path in paths:
+        status, _ = driver.request('GET', path, headers=headers)
+        if status >= 400:
+            raise RuntimeError(f'GET {path} returned {status}')
+    return time.perf_counter() - started
+
+
+def run_driver(driver, username, requests, warmup=10):
+    headers = {'Authorization': f'Bearer {_login(driver, username)}'}
+    for _ in range(warmup):
+        _timed(driver, SEPARATE_PATHS, headers)
+        _timed(driver, [DASHBOARD_PATH], headers)
+
+    separate, combined = [], []
+    for _ in range(requests):
+        separate.append(_timed(driver, SEPARATE_PATHS, headers))
+        combined.append(_timed(driver, [DASHBOARD_PATH], headers))
+    return (latency_summary(separate, sum(separate)),
+            latency_summary(combined, sum(combined)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['client', 'gunicorn'], default='client')
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    database_url = throwaway_database_url('bench-dashboard-')
+    app = load_app(database_url)
+    username = population.generate(app, users=1, years=args.years)[0]
+
+    if args.mode == 'client':
+        separate, combined = run_driver(TestClientDriver(app), username, args.requests)
+    else:
+        with GunicornServer(database_url, workers=1) as server:
+            separate, combined = run_driver(HTTPDriver('127.0.0.1', server.port), username, args.requests)
+
+    print(f'{"":<22} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+    for name, result in (('6 separate requests', separate), ('GET /dashboard', combined)):
+        print(f'{name:<22} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} {result["p99_ms"]:>9.2f}')
+    print(f'speedup at p50: {separate["p50_ms"] / combined["p50_ms"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Backtest every forecasting estimator over the synthetic population.
+
+Each user's full history is loaded with one query, then every estimator is fit
+once and scored on its one-step-ahead forecast of each cycle. Reports accuracy
+(MAE, RMSE, share within 2 days) and the fit+backtest time per user:
+
+    python -m benchmarks.forecast_backtest --users 200 --years 10
+"""
+import argparse
+import time
+import numpy as np
+from benchmarks import population
+from benchmarks.harness import load_app, throwaway_database_url
+
+
+def _histories(app):
+    from src.models.user import db
+    from src.models.period import Period
+    from src.utils.forecasting import cycle_lengths
+
+    histories = {}
+    with app.app_context():
+        rows = db.session.query(Period.user_id, Period.start_date).order_by(Period.user_id, Period.start_date)
+        for user_id, start_date in rows:
+            histories.setdefault(user_id, []).append(start_date)
+    return [cycle_lengths(starts) for starts in histories.values()]
+
+
+def run(histories, estimator, forecasting):
+    errors = []
+    started = time.perf_counter()
+    for lengths in histories:
+        errors.append(forecasting.backtest_errors(lengths, estimator.fit(lengths)))
+    elapsed = time.perf_counter() - started
+    summary = forecasting.backtest_summary(np.concatenate(errors))
+    summary['ms_per_user'] = elapsed * 1000 / len(histories)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--years', type=int, default=10)
+    args = parser.parse_args()
+
+    app = load_app(throwaway_database_url('bench-forecast-'))
+    population.generate(app, users=args.users, years=args.years)
+    histories = _histories(app)
+
+    from src.utils import forecasting
+
+    print(f'{"estimator":<10} {"cycles":>7} {"MAE":>6} {"RMSE":>6} {"<=2d":>6} {"ms/user":>8}')
+    for name, estimator in forecasting.ESTIMATORS.items():
+        result = run(histories, estimator, forecasting)
+        print(f'{name:<10} {result["cycles"]:>7} {result["mae"]:>6.2f} {result["rmse"]:>6.2f} '
+              f'{result["within_2_days"]:>6.0%} {result["ms_per_user"]:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import math
+import os
+import tempfile
+
+
+def throwaway_database_url(prefix='bench-'):
+    tmpdir = tempfile.mkdtemp(prefix=prefix)
+    return f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+
+def load_app(database_url, env=None):
+    """Build the app against ``database_url`` with ``env`` applied, schema included."""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.update(env or {})
+    from src.main import create_app
+    from src.models.migrations import upgrade_schema
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+    return app
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(latencies, elapsed):
+    """p50/p95/p99 in milliseconds and requests/sec for one endpoint."""
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+        'requests_per_sec': round(len(values) / elapsed, 1) if elapsed else None
+    }
@@ -0,0 +1,79 @@
+"""Read latency during a login storm, password hashing inline vs on the process pool.
+
+Starts a local gunicorn (gthread workers) for each scenario, measures GET /api/periods
+latency on its own, then again while several clients hammer POST /api/login:
+
+    python -m benchmarks.login_storm --storm-clients 8 --seconds 10
+"""
+import argparse
+import threading
+import time
+from benchmarks import population
+from benchmarks.harness import latency_summary, load_app, throwaway_database_url
+from benchmarks.runner import GunicornServer, HTTPDriver, _login
+
+SCENARIOS = [
+    ('inline hashing', {'PASSWORD_HASH_WORKERS': '0'}),
+    ('process pool', {'PASSWORD_HASH_WORKERS': '1', 'PASSWORD_HASH_QUEUE': '2'}),
+]
+
+
+def _measure_reads(driver, token, seconds):
+    latencies = []
+    headers = {'Authorization': f'Bearer {token}'}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        driver.request('GET', '/periods?limit=20', headers=headers)
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies, seconds)
+
+
+def _storm(driver, username, stop, outcomes):
+    while not stop.is_set():
+        status, _ = driver.request('POST', '/login', body={
+            'username': username, 'password': population.PASSWORD
+        })
+        outcomes[status] = outcomes.get(status, 0) + 1
+
+
+def run_scenario(database_url, username, env, args):
+    with GunicornServer(database_url, workers=args.gunicorn_workers, threads=args.threads, env=env) as server:
+        driver = HTTPDriver('127.0.0.1', server.port)
+        token = _login(driver, username)
+        idle = _measure_reads(driver, token, args.seconds)
+
+        stop, outcomes = threading.Event(), {}
+        storm = [
+            threading.Thread(target=_storm, args=(driver, username, stop, outcomes))
+            for _ in range(args.storm_clients)
+        ]
+        for thread in storm:
+            thread.start()
+        time.sleep(1)
+        loaded = _measure_reads(driver, token, args.seconds)
+        stop.set()
+        for thread in storm:
+            thread.join()
+    return idle, loaded, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--storm-clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--gunicorn-workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    database_url = throwaway_database_url('bench-login-storm-')
+    username = population.generate(load_app(database_url), users=1, years=5)[0]
+
+    for name, env in SCENARIOS:
+        idle, loaded, outcomes = run_scenario(database_url, username, env, args)
+        print(f'{name}: GET /periods p50 {idle["p50_ms"]:.1f} -> {loaded["p50_ms"]:.1f} ms, '
+              f'p95 {idle["p95_ms"]:.1f} -> {loaded["p95_ms"]:.1f} ms under storm; login statuses {outcomes}')
+
+
+if __name__ == '__main__':
+    main()
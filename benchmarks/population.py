@@ -0,0 +1,74 @@
+"""Synthetic users with years of periods and ovulation records.
+
+Cycle lengths are drawn per user around a personal mean (24-34 days) with a
+personal spread, so the population mixes very regular and irregular users; the
+ovulation falls about 14 days before the next period.
+"""
+import random
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+PASSWORD = 'bench-password'
+
+
+def synthetic_history(rng, years, start=date(2015, 1, 1)):
+    """Return ``(periods, ovulations)`` as lists of column dicts without user ids."""
+    mean_cycle = rng.uniform(24, 34)
+    spread = rng.choice([0.8, 1.5, 3.0, 6.0])
+    mean_period = rng.randint(3, 7)
+
+    periods, ovulations = [], []
+    current = start + timedelta(days=rng.randint(0, 30))
+    end = start + timedelta(days=int(365.25 * years))
+    while current < end:
+        cycle_length = max(18, int(round(rng.gauss(mean_cycle, spread))))
+        period_length = max(2, mean_period + rng.randint(-1, 1))
+        periods.append({
+            'start_date': current,
+            'end_date': current + timedelta(days=period_length - 1),
+            'flow_intensity': rng.choice(['light', 'medium', 'heavy']),
+            'symptoms': rng.choice([None, 'cramps', 'headache', 'cramps, fatigue'])
+        })
+        if rng.random() < 0.7:
+            ovulations.append({
+                'ovulation_date': current + timedelta(days=max(8, cycle_length - 14 + rng.randint(-2, 2))),
+                'basal_body_temperature': round(rng.uniform(36.4, 37.2), 2),
+                'cervical_mucus': rng.choice(['sticky', 'creamy', 'watery', 'egg-white']),
+                'symptoms': None
+            })
+        current += timedelta(days=cycle_length)
+    return periods, ovulations
+
+
+def generate(app, users=100, years=5, seed=1234, batch_size=5000):
+    """Fill the app's database with ``users`` synthetic users; returns their usernames."""
+    from src.models.user import User, db
+    from src.models.period import Period
+    from src.models.ovulation import Ovulation
+    from src.models.cycle_summary import rebuild_summary
+
+    rng = random.Random(seed)
+    # Hashing is deliberately slow, every synthetic user shares one hash
+    password_hash = generate_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    usernames = []
+
+    with app.app_context():
+        for index in range(users):
+            username = f'bench-user-{index}'
+            user = User(username=username, email=f'{username}@example.com', password_hash=password_hash)
+            db.session.add(user)
+            db.session.flush()
+            usernames.append(username)
+
+            periods, ovulations = synthetic_history(rng, years)
+            for row in periods + ovulations:
+                row.update(user_id=user.id, created_at=now, updated_at=now)
+            for start in range(0, len(periods), batch_size):
+                db.session.execute(insert(Period), periods[start:start + batch_size])
+            for start in range(0, len(ovulations), batch_size):
+                db.session.execute(insert(Ovulation), ovulations[start:start + batch_size])
+            rebuild_summary(user.id)
+        db.session.commit()
+    return usernames
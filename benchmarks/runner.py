@@ -0,0 +1,230 @@
+"""Per-endpoint latency benchmark over a synthetic population.
+
+Drives every blueprint either in-process through the Flask test client or over
+HTTP against a local gunicorn, and records p50/p95/p99 latency and requests/sec
+per endpoint as JSON so runs can be compared.
+"""
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from benchmarks.harness import latency_summary, load_app, throwaway_database_url
+from benchmarks import population
+
+# name -> (method, path, authenticated); paths are relative to /api
+ENDPOINTS = {
+    'login': ('POST', '/login', False),
+    'profile': ('GET', '/profile', True),
+    'periods': ('GET', '/periods', True),
+    'periods_all': ('GET', '/periods?all=true', True),
+    'periods_create': ('POST', '/periods', True),
+    'ovulation': ('GET', '/ovulation', True),
+    'predict_period': ('GET', '/predict/period', True),
+    'predict_ovulation': ('GET', '/predict/ovulation', True),
+    'cycle_stats': ('GET', '/cycle-stats', True),
+    'dashboard': ('GET', '/dashboard', True),
+    'users': ('GET', '/users', False),
+}
+
+
+class TestClientDriver:
+    name = 'client'
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, headers=None, body=None):
+        response = self.client.open(f'/api{path}', method=method, headers=headers, json=body)
+        return response.status_code, response.get_data()
+
+
+class HTTPDriver:
+    """Keep-alive HTTP/1.1 client, one connection per thread."""
+    name = 'gunicorn'
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self._local = threading.local()
+
+    def _connection(self):
+        if getattr(self._local, 'conn', None) is None:
+            self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        return self._local.conn
+
+    def request(self, method, path, headers=None, body=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        conn = self._connection()
+        try:
+            conn.request(method, f'/api{path}', body=payload, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            self._local.conn = None
+            raise
+
+
+class GunicornServer:
+    def __init__(self, database_url, workers=2, threads=1, env=None):
+        self.database_url = database_url
+        self.workers = workers
+        self.threads = threads
+        self.env = env or {}
+        self.port = _free_port()
+        self.process = None
+
+    def __enter__(self):
+        env = dict(os.environ, DATABASE_URL=self.database_url, **self.env)
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-w', str(self.workers), '--threads', str(self.threads),
+             # The schema exists already; --preload builds the app once before forking
+             '--preload', '-b', f'127.0.0.1:{self.port}', 'src.main:app'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.process.terminate()
+        raise RuntimeError('gunicorn did not start')
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _login(driver, username):
+    status, body = driver.request('POST', '/login', body={
+        'username': username, 'password': population.PASSWORD
+    })
+    if status != 200:
+        raise RuntimeError(f'login for {username} failed with {status}')
+    return json.loads(body)['access_token']
+
+
+def run_endpoints(driver, usernames, endpoints, requests, warmup=10, concurrency=1, seed=1):
+    """Benchmark each endpoint in turn; returns ``{name: latency summary}``."""
+    tokens = [_login(driver, username) for username in usernames]
+    rng = random.Random(seed)
+    results = {}
+
+    for name in endpoints:
+        method, path, authenticated = ENDPOINTS[name]
+
+        def one_request(i):
+            index = i % len(usernames)
+            headers = {'Authorization': f'Bearer {tokens[index]}'} if authenticated else None
+            body = None
+            if name == 'login':
+                body = {'username': usernames[index], 'password': population.PASSWORD}
+            elif name == 'periods_create':
+                start = date(2026, 1, 1) + timedelta(days=rng.randint(0, 3650))
+                body = {'start_date': start.isoformat()}
+            started = time.perf_counter()
+            status, _ = driver.request(method, path, headers=headers, body=body)
+            elapsed = time.perf_counter() - started
+            if status >= 500:
+                raise RuntimeError(f'{name} returned {status}')
+            return elapsed
+
+        for i in range(warmup):
+            one_request(i)
+
+        started = time.perf_counter()
+        if concurrency <= 1:
+            latencies = [one_request(i) for i in range(requests)]
+        else:
+            latencies = _run_threads(one_request, requests, concurrency)
+        results[name] = latency_summary(latencies, time.perf_counter() - started)
+    return results
+
+
+def _run_threads(one_request, requests, concurrency):
+    latencies, lock = [], threading.Lock()
+    counter = iter(range(requests))
+
+    def work():
+        for i in counter:
+            elapsed = one_request(i)
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=work) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def run(mode='client', users=50, years=5, requests=200, endpoints=None, gunicorn_workers=2,
+        concurrency=1, login_users=10, seed=1234):
+    """Generate a population into a throwaway database and benchmark it."""
+    endpoints = endpoints or list(ENDPOINTS)
+    database_url = throwaway_database_url()
+    app = load_app(database_url)
+    usernames = population.generate(app, users=users, years=years, seed=seed)
+    # Every login pays the password hash, only a subset of users makes requests
+    active = usernames[:login_users]
+
+    if mode == 'client':
+        results = run_endpoints(TestClientDriver(app), active, endpoints, requests, seed=seed)
+    elif mode == 'gunicorn':
+        with GunicornServer(database_url, workers=gunicorn_workers) as server:
+            driver = HTTPDriver('127.0.0.1', server.port)
+            results = run_endpoints(driver, active, endpoints, requests,
+                                    concurrency=concurrency, seed=seed)
+    else:
+        raise ValueError(f'Unknown mode {mode}')
+
+    return {
+        'meta': {
+            'mode': mode,
+            'users': users,
+            'years': years,
+            'requests': requests,
+            'concurrency': concurrency if mode == 'gunicorn' else 1,
+            'created_at': datetime.utcnow().isoformat()
+        },
+        'endpoints': results
+    }
+
+
+def compare(baseline, current, threshold=0.2, metric='p95_ms'):
+    """Return ``[(endpoint, before, after)]`` for endpoints slower than ``threshold``."""
+    regressions = []
+    for name, result in current['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if not before or not before.get(metric):
+            continue
+        if result[metric] > before[metric] * (1 + threshold):
+            regressions.append((name, before[metric], result[metric]))
+    return regressions
+
+
+def format_results(results):
+    lines = [f'{"endpoint":<20} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"req/s":>9}']
+    for name, result in results['endpoints'].items():
+        lines.append(
+            f'{name:<20} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} '
+            f'{result["p99_ms"]:>9.2f} {result["requests_per_sec"]:>9.1f}'
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,104 @@
+"""ORM objects + to_dict() + jsonify against column rows + fast_json for the list routes.
+
+Builds one user per size with that many periods and ovulations, then times the
+query-and-encode step of GET /periods?all=true and GET /ovulation?all=true both
+ways, checking the bodies are byte-identical. The fast path is timed with orjson
+and with the stdlib fallback:
+
+    python -m benchmarks.serialization --sizes 100,10000,100000
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from benchmarks.harness import load_app, throwaway_database_url
+
+
+def _seed(app, rows):
+    from src.models.user import User, db
+    from src.models.period import Period
+    from src.models.ovulation import Ovulation
+    from src.utils.bulk_import import bulk_insert
+
+    now = datetime.utcnow()
+    with app.app_context():
+        user = User(username=f'serialize-{rows}', email=f'serialize-{rows}@example.com', password_hash='-')
+        db.session.add(user)
+        db.session.flush()
+        first = date(1800, 1, 1)
+        bulk_insert(Period, [{
+            'user_id': user.id, 'start_date': first + timedelta(days=i),
+            'end_date': first + timedelta(days=i + 4), 'flow_intensity': 'medium',
+            'symptoms': 'cramps' if i % 3 else None, 'created_at': now, 'updated_at': now
+        } for i in range(rows)])
+        bulk_insert(Ovulation, [{
+            'user_id': user.id, 'ovulation_date': first + timedelta(days=i),
+            'basal_body_temperature': 36.4 + (i % 80) / 100, 'cervical_mucus': 'creamy',
+            'symptoms': None, 'created_at': now, 'updated_at': now
+        } for i in range(rows)])
+        db.session.commit()
+        return user.id
+
+
+def _orm_body(model, date_column, user_id):
+    from flask import jsonify
+    items = model.query.filter_by(user_id=user_id).order_by(date_column.desc()).all()
+    return jsonify([item.to_dict() for item in items]).get_data()
+
+
+def _fast_body(columns, model, date_column, user_id):
+    from src.models.user import db
+    from src.utils.fast_json import json_response, records
+    rows = db.session.query(*columns).filter(model.user_id == user_id).order_by(date_column.desc()).all()
+    temperatures = [getattr(row, 'basal_body_temperature', None) for row in rows]
+    return json_response(records(rows), temperatures).get_data()
+
+
+def _best_of(repeat, function):
+    from src.models.user import db
+    timings, body = [], None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,10000,100000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = load_app(throwaway_database_url('bench-serialization-'))
+    from src.models.period import PERIOD_COLUMNS, Period
+    from src.models.ovulation import OVULATION_COLUMNS, Ovulation
+    from src.utils import fast_json
+    orjson = fast_json.orjson
+
+    tables = [
+        ('periods', Period, Period.start_date, PERIOD_COLUMNS),
+        ('ovulation', Ovulation, Ovulation.ovulation_date, OVULATION_COLUMNS),
+    ]
+    print(f'{"rows":>8} {"table":<10} {"orm ms":>9} {"orjson ms":>10} {"stdlib ms":>10} {"speedup":>8}')
+    for size in [int(value) for value in args.sizes.split(',')]:
+        user_id = _seed(app, size)
+        for name, model, date_column, columns in tables:
+            with app.test_request_context():
+                orm_ms, expected = _best_of(args.repeat, lambda: _orm_body(model, date_column, user_id))
+                timings = {}
+                for encoder in ('orjson', 'stdlib'):
+                    fast_json.orjson = orjson if encoder == 'orjson' else None
+                    timings[encoder], body = _best_of(
+                        args.repeat, lambda: _fast_body(columns, model, date_column, user_id)
+                    )
+                    if body != expected:
+                        raise SystemExit(f'{name} at {size} rows: {encoder} body differs from jsonify')
+                fast_json.orjson = orjson
+            fastest = timings['orjson'] if orjson is not None else timings['stdlib']
+            print(f'{size:>8} {name:<10} {orm_ms:>9.1f} {timings["orjson"]:>10.1f} '
+                  f'{timings["stdlib"]:>10.1f} {orm_ms / fastest:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Write throughput of several writer processes against 1, 2, 4... SQLite shards.
+
+Every worker process imports the app the way a gunicorn worker does and keeps
+creating periods (with symptoms, so each request also updates the cycle summary
+and the symptom links) for its own user through the test client. Users are
+picked so the writers spread evenly over the shards; with no sharding they all
+queue on the one write lock of the main database:
+
+    python -m benchmarks.sharding --workers 8 --seconds 10 --shards 0 2 4 8
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from datetime import date, timedelta
+from benchmarks.harness import load_app, throwaway_database_url
+from src.models.sharding import shard_index
+
+# Registered per worker so every shard has enough users to hand out
+USERS_PER_WORKER = 8
+
+
+def _username(user_id):
+    return f'bench-{user_id}'
+
+
+def _seed(database_url, env, users):
+    app = load_app(database_url, env)
+    client = app.test_client()
+    for user_id in range(1, users + 1):
+        name = _username(user_id)
+        client.post('/api/register', json={
+            'username': name, 'email': f'{name}@example.com', 'password': 'secret'
+        })
+
+
+def _pick_users(workers, shards):
+    # A fresh database numbers users from 1 in registration order
+    candidates = list(range(1, workers * USERS_PER_WORKER + 1))
+    picked = []
+    for index in range(workers):
+        wanted = index % shards if shards else None
+        user_id = next(
+            user_id for user_id in candidates
+            if user_id not in picked and (wanted is None or shard_index(user_id, shards) == wanted)
+        )
+        picked.append(user_id)
+    return picked
+
+
+def _worker(database_url, env, user_id, seconds, results):
+    app = load_app(database_url, env)
+    client = app.test_client()
+    response = client.post('/api/login', json={'username': _username(user_id), 'password': 'secret'})
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    rng = random.Random(user_id)
+
+    writes = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = date(2000, 1, 1) + timedelta(days=rng.randint(0, 9000))
+        response = client.post('/api/periods', headers=headers, json={
+            'start_date': start.isoformat(), 'symptoms': 'cramps, fatigue'
+        })
+        writes += response.status_code == 201
+        errors += response.status_code >= 500
+    results.put((writes, errors))
+
+
+def run_scenario(shards, workers, seconds):
+    context = multiprocessing.get_context('spawn')
+    database_url = throwaway_database_url('bench-sharding-')
+    # Cheap hashes: only the period writes are measured
+    env = {
+        'SQLITE_PROFILE': 'production', 'SQLITE_SHARDS': str(shards),
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'
+    }
+
+    seeder = context.Process(target=_seed, args=(database_url, env, workers * USERS_PER_WORKER))
+    seeder.start()
+    seeder.join()
+
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(database_url, env, user_id, seconds, results))
+        for user_id in _pick_users(workers, shards)
+    ]
+    for process in processes:
+        process.start()
+    writes, errors = [sum(values) for values in zip(*(results.get() for _ in processes))]
+    for process in processes:
+        process.join()
+    return {'writes_per_sec': writes / seconds, 'errors': errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--shards', type=int, nargs='+', default=[0, 2, 4],
+                        help='SQLITE_SHARDS values to compare, 0 is the unsharded database')
+    args = parser.parse_args()
+
+    print(f'{"shards":<8} {"writes/s":>10} {"speedup":>8} {"errors":>8}')
+    baseline = None
+    for shards in args.shards:
+        result = run_scenario(shards, args.workers, args.seconds)
+        baseline = baseline or result['writes_per_sec']
+        speedup = result['writes_per_sec'] / baseline if baseline else 0
+        print(f'{shards or "-":<8} {result["writes_per_sec"]:>10.1f} {speedup:>7.2f}x {result["errors"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Per-worker startup cost: import, create_app, schema upgrade and the first request.
+
+Each run is a fresh interpreter, like a gunicorn worker spawned without
+--preload. The schema step is what every worker paid at import time before it
+moved to ``flask upgrade-schema``; with --preload workers also skip the import
+and create_app, which the master has already done:
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.harness import throwaway_database_url
+
+PHASES = ('import', 'create_app', 'upgrade_schema', 'first_request')
+
+# Imports src.main:app like a worker; the module records its import and create_app time
+_PROBE = '''
+import json, time
+from src.main import app
+from src.models.migrations import upgrade_schema
+created = time.perf_counter()
+with app.app_context():
+    upgrade_schema()
+upgraded = time.perf_counter()
+app.test_client().post('/api/login', json={'username': 'nobody', 'password': 'x'})
+served = time.perf_counter()
+print(json.dumps({
+    'import': app.extensions['startup']['import'], 'create_app': app.extensions['startup']['create_app'],
+    'upgrade_schema': upgraded - created, 'first_request': served - upgraded
+}))
+'''
+
+
+def measure(database_url):
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE], check=True, capture_output=True, text=True,
+        env={**os.environ, 'DATABASE_URL': database_url, 'PASSWORD_HASH_WORKERS': '0'}
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    database_url = throwaway_database_url('bench-startup-')
+    measure(database_url)  # creates the schema, later runs only check it
+    runs = [measure(database_url) for _ in range(args.runs)]
+
+    print(f'{"phase":<16} {"median ms":>10}')
+    for phase in PHASES:
+        print(f'{phase:<16} {statistics.median(run[phase] for run in runs) * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Cost of deleting long-term users: DELETE /users/<id> and flask purge-users.
+
+Seeds users with ``--records`` periods and as many ovulations each, then deletes
+them one by one and in one batch, reporting wall time, SQL statements and the
+peak Python memory (tracemalloc) of each delete. With the cascading foreign keys
+none of the three should grow with ``--records``:
+
+    python -m benchmarks.user_purge --records 5000 --users 20
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import date, timedelta
+from benchmarks.conditional import StatementCounter
+from benchmarks.harness import load_app, throwaway_database_url
+
+
+def _seed(client, users, records):
+    user_ids = []
+    for index in range(users):
+        name = f'purge-{index}'
+        response = client.post('/api/register', json={
+            'username': name, 'email': f'{name}@example.com', 'password': 'secret'
+        })
+        user_ids.append(response.get_json()['user']['id'])
+        response = client.post('/api/login', json={'username': name, 'password': 'secret'})
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        days = [date(1990, 1, 1) + timedelta(days=28 * i) for i in range(records)]
+        client.post('/api/periods/bulk', headers=headers, json=[
+            {'start_date': day.isoformat(), 'symptoms': 'cramps, fatigue'} for day in days
+        ])
+        client.post('/api/ovulation/bulk', headers=headers, json=[
+            {'ovulation_date': (day + timedelta(days=14)).isoformat()} for day in days
+        ])
+    return user_ids
+
+
+def _measure(counter, send):
+    # ``send`` returns an error message, or None when the delete succeeded
+    counter.take()
+    tracemalloc.start()
+    started = time.perf_counter()
+    error = send()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if error:
+        raise RuntimeError(error)
+    return elapsed, len(counter.take()), peak
+
+
+def _delete_user(client, user_id):
+    response = client.delete(f'/api/users/{user_id}')
+    if response.status_code >= 400:
+        return f'DELETE /users/{user_id} returned {response.status_code}'
+
+
+def _purge_users(runner, user_ids):
+    result = runner.invoke(args=['purge-users', *(f'--user-id={user_id}' for user_id in user_ids)])
+    if result.exit_code:
+        return f"flask purge-users failed: {result.output}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--records', type=int, default=2000, help='periods and ovulations per user')
+    parser.add_argument('--shards', type=int, default=0)
+    args = parser.parse_args()
+
+    app = load_app(throwaway_database_url('bench-purge-'), {
+        'SQLITE_SHARDS': str(args.shards),
+        'PASSWORD_HASH_WORKERS': '0', 'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'
+    })
+    client = app.test_client()
+    user_ids = _seed(client, args.users, args.records)
+    counter = StatementCounter()
+
+    single, batch = user_ids[:len(user_ids) // 2], user_ids[len(user_ids) // 2:]
+    runs = [_measure(counter, lambda user_id=user_id: _delete_user(client, user_id)) for user_id in single]
+    batch_run = _measure(counter, lambda: _purge_users(app.test_cli_runner(), batch))
+
+    print(f'{args.records} periods + {args.records} ovulations per user, {args.shards or "no"} shards')
+    print(f'{"delete":<26} {"ms":>9} {"statements":>11} {"peak KiB":>9}')
+    for label, (elapsed, statements, peak) in [
+        ('DELETE /users/<id> (max)', max(runs)),
+        (f'flask purge-users ({len(batch)})', batch_run),
+    ]:
+        print(f'{label:<26} {elapsed * 1000:>9.1f} {statements:>11} {peak / 1024:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+import click
+from sqlalchemy import create_engine, delete, insert, select
+from src.models.user import User, db
+from src.models.period import Period
+from src.models.ovulation import Ovulation
+from src.models.cycle_summary import CycleSummary, rebuild_summary
+from src.models.migrations import upgrade_schema
+from src.models.symptom import link_unlinked_records
+from src.models.sharding import (
+    SHARD_BIND_PREFIX, shard, shard_count, shard_database_url, shard_engines, shard_key_for_user,
+    user_shard
+)
+from src.models.prediction_snapshot import (
+    PredictionSnapshot, SnapshotInput, compute_snapshot, upsert_snapshots
+)
+from src.models.purge import PURGE_BATCH_SIZE, purge_users
+from src.models.sync import TOMBSTONE_RETENTION_DAYS, compact_tombstones, retention_cutoff
+from src.utils.cycle_stats import (
+    RECENT_OVULATIONS, cycle_stats_from_rows, cycle_stats_from_summary,
+    predict_period_from_rows, predict_period_from_summary
+)
+
+
+def verify_summary(summary):
+    """Compare a summary against the full-history computation, return mismatches."""
+    periods = Period.query.filter_by(user_id=summary.user_id).order_by(Period.start_date.desc()).all()
+    ovulation_count = Ovulation.query.filter_by(user_id=summary.user_id).count()
+
+    mismatches = []
+    expected, actual = cycle_stats_from_rows(periods, ovulation_count), cycle_stats_from_summary(summary)
+    if expected != actual:
+        mismatches.append(('cycle-stats', expected, actual))
+    expected, actual = predict_period_from_rows(periods[:6]), predict_period_from_summary(summary)
+    if expected != actual:
+        mismatches.append(('predict/period', expected, actual))
+    return mismatches
+
+
+def _snapshot_inputs(user_ids, today, force):
+    """Inputs for the users of one shard whose snapshot is missing or stale.
+
+    Users already done by an interrupted run are skipped, which makes reruns resume.
+    """
+    summaries = {
+        summary.user_id: summary
+        for summary in CycleSummary.query.filter(CycleSummary.user_id.in_(user_ids))
+    }
+    fresh = set() if force else {
+        row.user_id for row in
+        db.session.query(PredictionSnapshot.user_id, PredictionSnapshot.data_version, PredictionSnapshot.computed_on)
+        .filter(PredictionSnapshot.user_id.in_(user_ids))
+        if row.user_id in summaries
+        and row.data_version == summaries[row.user_id].data_version
+        and row.computed_on == today
+    }
+    user_ids = [user_id for user_id in user_ids if user_id not in fresh]
+    if not user_ids:
+        return []
+    for user_id in user_ids:
+        if user_id not in summaries:
+            summaries[user_id] = rebuild_summary(user_id)
+
+    period_starts = {user_id: [] for user_id in user_ids}
+    for user_id, start_date in (
+        db.session.query(Period.user_id, Period.start_date)
+        .filter(Period.user_id.in_(user_ids))
+        .order_by(Period.user_id, Period.start_date)
+    ):
+        period_starts[user_id].append(start_date)
+
+    ovulation_dates = {user_id: [] for user_id in user_ids}
+    for user_id, ovulation_date in (
+        db.session.query(Ovulation.user_id, Ovulation.ovulation_date)
+        .filter(Ovulation.user_id.in_(user_ids))
+        .order_by(Ovulation.user_id, Ovulation.ovulation_date)
+    ):
+        ovulation_dates[user_id].append(ovulation_date)
+
+    return [
+        SnapshotInput(
+            user_id=user_id,
+            data_version=summary.data_version,
+            period_count=summary.period_count,
+            ovulation_count=summary.ovulation_count,
+            cycle_count=summary.cycle_count,
+            cycle_length_sum=summary.cycle_length_sum,
+            cycle_length_sum_sq=summary.cycle_length_sum_sq,
+            period_length_count=summary.period_length_count,
+            period_length_sum=summary.period_length_sum,
+            last_start_date=summary.last_start_date,
+            recent_cycle_lengths=summary.recent_cycle_lengths,
+            period_starts=period_starts[user_id],
+            ovulation_dates=ovulation_dates[user_id][-RECENT_OVULATIONS:]
+        )
+        for user_id, summary in ((user_id, summaries[user_id]) for user_id in user_ids)
+    ]
+
+
+def _by_shard(user_ids, count=None):
+    groups = {}
+    for user_id in user_ids:
+        groups.setdefault(shard_key_for_user(user_id, count), []).append(user_id)
+    return groups
+
+
+# Copied to the target shard with new ids; the remaining per-user tables are derived
+# from them and rebuilt there, except the sync tombstones, which the new ids make moot
+MOVED_TABLES = ('period', 'ovulation')
+USER_TABLES = (
+    'symptom_log', 'prediction_snapshot', 'sync_tombstone', 'cycle_summary', 'period', 'ovulation'
+)
+
+
+def _move_user(user_id, source, target):
+    """Move one user's rows between two databases; returns the number of records copied.
+
+    The target is cleared of the user first and committed before the source is
+    deleted, so rerunning after an interruption at any point ends in the same state.
+    """
+    tables = db.metadata.tables
+    with source.connect() as conn:
+        rows = {
+            name: [
+                {key: value for key, value in row._mapping.items() if key != 'id'}
+                for row in conn.execute(
+                    select(tables[name]).where(tables[name].c.user_id == user_id).order_by(tables[name].c.id)
+                )
+            ]
+            for name in MOVED_TABLES
+        }
+    copied = sum(len(table_rows) for table_rows in rows.values())
+
+    if copied:
+        with target.begin() as conn:
+            for name in USER_TABLES:
+                conn.execute(delete(tables[name]).where(tables[name].c.user_id == user_id))
+            for name in MOVED_TABLES:
+                if rows[name]:
+                    conn.execute(insert(tables[name]), rows[name])
+            link_unlinked_records(conn, user_id)
+    with source.begin() as conn:
+        for name in USER_TABLES:
+            conn.execute(delete(tables[name]).where(tables[name].c.user_id == user_id))
+    return copied
+
+
+def _batches(values, size):
+    batch = []
+    for value in values:
+        batch.append(value)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def register_commands(app):
+    @app.cli.command('upgrade-schema')
+    def upgrade_schema_command():
+        """Create missing tables and apply pending migrations, main database and shards.
+
+        Run once per deploy before starting the workers; the app itself never creates tables.
+        """
+        started = time.perf_counter()
+        upgrade_schema()
+        click.echo(f'Schema is up to date ({(time.perf_counter() - started) * 1000:.0f} ms)')
+
+    @app.cli.command('rebuild-cycle-summaries')
+    @click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+    @click.option('--verify', is_flag=True, help='Check each summary against the full-history computation.')
+    @click.option('--batch-size', type=int, default=500, show_default=True)
+    def rebuild_cycle_summaries(user_id, verify, batch_size):
+        """Recompute CycleSummary rows from the period and ovulation tables."""
+        query = db.session.query(User.id).order_by(User.id)
+        if user_id is not None:
+            query = query.filter(User.id == user_id)
+        user_ids = [row.id for row in query]
+
+        failures = 0
+        for index, current_id in enumerate(user_ids, start=1):
+            with user_shard(current_id):
+                summary = rebuild_summary(current_id)
+                if verify:
+                    for endpoint, expected, actual in verify_summary(summary):
+                        failures += 1
+                        click.echo(f'user {current_id} {endpoint}: expected {expected}, got {actual}', err=True)
+                # Pending rows are flushed to the shard selected at commit time
+                if index % batch_size == 0 or shard_count():
+                    db.session.commit()
+        db.session.commit()
+
+        click.echo(f'Rebuilt {len(user_ids)} cycle summaries')
+        if failures:
+            raise click.ClickException(f'{failures} summaries disagree with the full-history computation')
+
+    @app.cli.command('precompute-predictions')
+    @click.option('--chunk-size', type=int, default=500, show_default=True,
+                  help='Users loaded, computed and written per transaction.')
+    @click.option('--workers', type=int, default=os.cpu_count(), show_default=True,
+                  help='Processes computing predictions; 0 computes inline.')
+    @click.option('--force', is_flag=True, help='Recompute fresh snapshots as well.')
+    def precompute_predictions(chunk_size, workers, force):
+        """Store period/ovulation predictions and cycle stats in PredictionSnapshot.
+
+        Each chunk is committed on its own and only missing or stale snapshots are
+        computed, so an interrupted run picks up where it stopped when rerun.
+        """
+        today = date.today()
+        total = db.session.query(db.func.count(User.id)).scalar()
+        click.echo(f'Checking {total} users')
+
+        compute = partial(compute_snapshot, today=today)
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        checked, computed, last_id, started = 0, 0, 0, time.perf_counter()
+        try:
+            while True:
+                user_ids = [
+                    row.id for row in
+                    db.session.query(User.id).filter(User.id > last_id).order_by(User.id).limit(chunk_size)
+                ]
+                if not user_ids:
+                    break
+                for key, shard_user_ids in _by_shard(user_ids).items():
+                    with shard(key):
+                        inputs = _snapshot_inputs(shard_user_ids, today, force)
+                        if executor is None:
+                            rows = [compute(values) for values in inputs]
+                        else:
+                            rows = list(executor.map(compute, inputs, chunksize=max(1, len(inputs) // (workers * 4))))
+                        upsert_snapshots(rows)
+                        db.session.commit()
+                    computed += len(rows)
+
+                checked += len(user_ids)
+                last_id = user_ids[-1]
+                elapsed = time.perf_counter() - started
+                rate = checked / elapsed if elapsed else 0
+                remaining = (total - checked) / rate if rate else 0
+                click.echo(f'{checked}/{total} users, {computed} computed, {rate:.0f} users/s, ~{remaining:.0f}s left')
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        click.echo(f'Precomputed {computed} snapshots in {time.perf_counter() - started:.1f}s')
+
+    @app.cli.command('rebalance-shards')
+    @click.option('--from-shards', type=int, required=True,
+                  help='SQLITE_SHARDS the data was written with, 0 for the unsharded database.')
+    @click.option('--batch-size', type=int, default=500, show_default=True)
+    def rebalance_shards(from_shards, batch_size):
+        """Move every user whose shard changes from --from-shards to SQLITE_SHARDS.
+
+        Offline: stop the app first. Moved periods and ovulations get new ids in
+        their new shard; symptom links and cycle summaries are rebuilt there and
+        prediction snapshots on the next precompute run. Sync clients of moved
+        users get a full reset on their next GET /sync.
+        """
+        to_shards = shard_count()
+        if from_shards == to_shards:
+            raise click.ClickException('--from-shards equals SQLITE_SHARDS, nothing to move')
+        old_engines = {}
+
+        def engine_for(key):
+            if key is None:
+                return db.engine
+            if key in db.engines:
+                return db.engines[key]
+            # Shards beyond the new count only exist in the old layout
+            if key not in old_engines:
+                index = int(key[len(SHARD_BIND_PREFIX):])
+                old_engines[key] = create_engine(shard_database_url(app, index))
+            return old_engines[key]
+
+        total = db.session.query(db.func.count(User.id)).scalar()
+        checked, moved, records, last_id, started = 0, 0, 0, 0, time.perf_counter()
+        try:
+            while True:
+                user_ids = [
+                    row.id for row in
+                    db.session.query(User.id).filter(User.id > last_id).order_by(User.id).limit(batch_size)
+                ]
+                if not user_ids:
+                    break
+                for user_id in user_ids:
+                    source = shard_key_for_user(user_id, from_shards)
+                    target = shard_key_for_user(user_id, to_shards)
+                    if source == target:
+                        continue
+                    copied = _move_user(user_id, engine_for(source), engine_for(target))
+                    if copied:
+                        with user_shard(user_id):
+                            summary = rebuild_summary(user_id)
+                            summary.sync_horizon = summary.data_version
+                            db.session.commit()
+                        moved += 1
+                        records += copied
+
+                checked += len(user_ids)
+                last_id = user_ids[-1]
+                elapsed = time.perf_counter() - started
+                click.echo(f'{checked}/{total} users checked, {moved} moved, {checked / elapsed:.0f} users/s')
+        finally:
+            for engine in old_engines.values():
+                engine.dispose()
+
+        click.echo(f'Moved {moved} users ({records} periods and ovulations) from {from_shards} to {to_shards} shards')
+
+    @app.cli.command('compact-tombstones')
+    @click.option('--older-than-days', type=int, default=TOMBSTONE_RETENTION_DAYS, show_default=True)
+    def compact_tombstones_command(older_than_days):
+        """Purge sync tombstones older than --older-than-days, main database or every shard.
+
+        Clients that have not synced since a purged deletion get a full reset instead.
+        """
+        before = retention_cutoff(older_than_days)
+        engines = list(shard_engines(db).values()) or [db.engine]
+        purged = 0
+        for engine in engines:
+            with engine.begin() as conn:
+                purged += compact_tombstones(conn, before)
+        click.echo(f'Purged {purged} tombstones deleted before {before:%Y-%m-%d %H:%M}')
+
+    @app.cli.command('purge-users')
+    @click.option('--user-id', 'user_ids', type=int, multiple=True, help='User to delete, repeatable.')
+    @click.option('--file', 'id_file', type=click.File('r'), default=None,
+                  help='File with one user id per line, - for stdin.')
+    @click.option('--batch-size', type=click.IntRange(1, PURGE_BATCH_SIZE), default=PURGE_BATCH_SIZE,
+                  show_default=True)
+    def purge_users_command(user_ids, id_file, batch_size):
+        """Delete users and all their data, one transaction per batch.
+
+        Ids are read from the file as they are needed, so any number of users is
+        purged in constant memory; already deleted ids are skipped.
+        """
+        if not user_ids and id_file is None:
+            raise click.UsageError('Give --user-id or --file')
+        file_ids = (int(line) for line in id_file if line.strip()) if id_file is not None else ()
+
+        requested, deleted, started = 0, 0, time.perf_counter()
+        for batch in _batches(itertools.chain(user_ids, file_ids), batch_size):
+            deleted += purge_users(batch)
+            db.session.commit()
+            requested += len(batch)
+            click.echo(f'{requested} users processed, {deleted} deleted')
+        click.echo(f'Purged {deleted} users in {time.perf_counter() - started:.1f}s')
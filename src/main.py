@@ -3,58 +3,140 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+import logging
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from src.models.user import db
 from src.models.period import Period
 from src.models.ovulation import Ovulation
+from src.models.cycle_summary import CycleSummary
+from src.models.symptom import Symptom, SymptomLog
+from src.models.prediction_snapshot import PredictionSnapshot
+from src.models.sync import SyncTombstone
+from src.models.migrations import upgrade_schema
+from src.models.engine import apply_engine_profile, dispose_engines_after_fork, install_pragmas
+from src.models.sharding import configure_shards
 from src.routes.user import user_bp
 from src.routes.auth import auth_bp
 from src.routes.period import period_bp
 from src.routes.ovulation import ovulation_bp
 from src.routes.prediction import prediction_bp
+from src.routes.export import export_bp
+from src.routes.dashboard import dashboard_bp
+from src.routes.symptom import symptom_bp
+from src.routes.calendar import calendar_bp
+from src.routes.sync import sync_bp
+from src.cli import register_commands
+from src.utils.prediction_cache import init_prediction_cache
+from src.utils.metrics import init_metrics
+from src.utils.identity import init_identity
+from src.utils.static_assets import init_static_assets
+
+# Seconds spent importing this module and everything it pulls in, once per process
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+startup_logger = logging.getLogger('src.startup')
+
+
+def config_from_environment():
+    return {
+        'SECRET_KEY': 'asdf#FGSgvasgf$5$WGT',
+        'JWT_SECRET_KEY': 'jwt-secret-string',  # Change this in production
+
+        # Password hashing runs on a per-worker process pool, see src/utils/password_pool.py
+        'PASSWORD_HASH_METHOD': os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        'PASSWORD_HASH_WORKERS': int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+        'PASSWORD_HASH_QUEUE': int(os.environ.get('PASSWORD_HASH_QUEUE', 16)),
+
+        # Prediction cache: 'memory' per worker, or 'sqlite:///path' shared by all workers
+        'PREDICTION_CACHE': os.environ.get('PREDICTION_CACHE', 'memory'),
+        'PREDICTION_CACHE_SIZE': int(os.environ.get('PREDICTION_CACHE_SIZE', 1024)),
+
+        # Database configuration
+        'SQLALCHEMY_DATABASE_URI': os.environ.get(
+            'DATABASE_URL',
+            f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+        ),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        # 'production' (WAL, busy timeout, tuned pool) or 'default' driver settings
+        'SQLITE_PROFILE': os.environ.get('SQLITE_PROFILE', 'production'),
+        # Route GET requests of the period, ovulation and prediction blueprints to a query_only engine
+        'SQLITE_READ_ENGINE': os.environ.get('SQLITE_READ_ENGINE', '').lower() in ('1', 'true', 'yes'),
+        # SQLITE_SHARDS=N > 0 spreads each user's data over N shard files, see src/models/sharding.py;
+        # SQLITE_SHARD_URL overrides their location, e.g. sqlite:////data/shard-{index}.db
+        'SQLITE_SHARDS': int(os.environ.get('SQLITE_SHARDS', 0)),
+        'SQLITE_SHARD_URL': os.environ.get('SQLITE_SHARD_URL'),
+
+        # Request metrics at /metrics; SLOW_REQUEST_MS > 0 also logs slow requests with their SQL
+        'METRICS_ENABLED': os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no'),
+        'SLOW_REQUEST_MS': float(os.environ.get('SLOW_REQUEST_MS', 0)),
+    }
+
+
+def create_app(config=None):
+    """Build the app from the environment, with ``config`` overriding single keys.
+
+    Connects to nothing and creates no tables: run ``flask --app src.main upgrade-schema``
+    once per deploy before starting the workers.
+    """
+    started = time.perf_counter()
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config.update(config_from_environment())
+    app.config.update(config or {})
+
+    # Enable CORS for all routes
+    CORS(app)
+
+    # Initialize extensions
+    jwt = JWTManager(app)
+    init_prediction_cache(app)
+    init_identity(app, jwt)
+
+    # Register blueprints
+    app.register_blueprint(auth_bp, url_prefix='/api')
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(period_bp, url_prefix='/api')
+    app.register_blueprint(ovulation_bp, url_prefix='/api')
+    app.register_blueprint(prediction_bp, url_prefix='/api')
+    app.register_blueprint(export_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(symptom_bp, url_prefix='/api')
+    app.register_blueprint(calendar_bp, url_prefix='/api')
+    app.register_blueprint(sync_bp, url_prefix='/api')
+
+    # Register CLI commands
+    register_commands(app)
+
+    apply_engine_profile(app)
+    configure_shards(app)
+    db.init_app(app)
+    install_pragmas(app, db)
+    # gunicorn --preload forks workers from a master that has already built the app
+    dispose_engines_after_fork(app, db)
+
+    if app.config['METRICS_ENABLED']:
+        init_metrics(app, db)
+
+    # SPA and static files from an in-memory manifest, see src/utils/static_assets.py
+    init_static_assets(app)
+
+    app.extensions['startup'] = {'import': IMPORT_SECONDS, 'create_app': time.perf_counter() - started}
+    startup_logger.info(
+        'App ready in pid %d: imports %.1f ms, create_app %.1f ms', os.getpid(),
+        IMPORT_SECONDS * 1000, app.extensions['startup']['create_app'] * 1000
+    )
+    return app
+
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-app.config['JWT_SECRET_KEY'] = 'jwt-secret-string'  # Change this in production
-
-# Enable CORS for all routes
-CORS(app)
-
-# Initialize extensions
-jwt = JWTManager(app)
-
-# Register blueprints
-app.register_blueprint(auth_bp, url_prefix='/api')
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(period_bp, url_prefix='/api')
-app.register_blueprint(ovulation_bp, url_prefix='/api')
-app.register_blueprint(prediction_bp, url_prefix='/api')
-
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+# For ``gunicorn src.main:app`` and ``flask --app src.main``; building it connects to nothing
+app = create_app()
 
 
 if __name__ == '__main__':
+    with app.app_context():
+        upgrade_schema()
     app.run(host='0.0.0.0', port=5001, debug=True)
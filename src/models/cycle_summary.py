@@ -0,0 +1,263 @@
+import json
+import time
+from datetime import datetime
+from sqlalchemy import event, update
+from src.models.user import User, db
+from src.models.engine import RoutingSession
+from src.models.period import Period
+from src.models.ovulation import Ovulation
+
+# Cycle lengths kept for predictions, i.e. the gaps between the last 6 periods
+RECENT_CYCLE_WINDOW = 5
+
+
+def _initial_data_version():
+    # Never restart at a value a previous summary for the same user id may have used
+    return time.time_ns() // 1000
+
+
+class CycleSummary(db.Model):
+    """Running per-user aggregates behind /cycle-stats and the prediction routes.
+
+    Kept in step with the period and ovulation tables inside the same transaction
+    as every write, so reads never have to scan a user's history.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    period_count = db.Column(db.Integer, nullable=False, default=0)
+    ovulation_count = db.Column(db.Integer, nullable=False, default=0)
+    cycle_count = db.Column(db.Integer, nullable=False, default=0)
+    cycle_length_sum = db.Column(db.Integer, nullable=False, default=0)
+    cycle_length_sum_sq = db.Column(db.Integer, nullable=False, default=0)
+    period_length_count = db.Column(db.Integer, nullable=False, default=0)
+    period_length_sum = db.Column(db.Integer, nullable=False, default=0)
+    period_length_sum_sq = db.Column(db.Integer, nullable=False, default=0)
+    last_start_date = db.Column(db.Date, nullable=True)
+    recent_cycle_lengths_json = db.Column(db.Text, nullable=False, default='[]')  # newest first
+    # Bumped by every period/ovulation write, keys caches of derived results
+    data_version = db.Column(db.BigInteger, nullable=False, default=_initial_data_version)
+    # Sync cursors older than this have lost tombstones to compaction, see src/models/sync.py
+    sync_horizon = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CycleSummary user={self.user_id} periods={self.period_count}>'
+
+    @property
+    def recent_cycle_lengths(self):
+        return json.loads(self.recent_cycle_lengths_json or '[]')
+
+    @recent_cycle_lengths.setter
+    def recent_cycle_lengths(self, lengths):
+        self.recent_cycle_lengths_json = json.dumps(list(lengths))
+
+    def _add_cycle(self, length, sign=1):
+        self.cycle_count += sign
+        self.cycle_length_sum += sign * length
+        self.cycle_length_sum_sq += sign * length * length
+
+    def _add_period_length(self, start_date, end_date, sign=1):
+        if end_date is None:
+            return
+        length = (end_date - start_date).days + 1
+        self.period_length_count += sign
+        self.period_length_sum += sign * length
+        self.period_length_sum_sq += sign * length * length
+
+    def _add_start(self, user_id, start_date, exclude_id, sign=1):
+        # Splicing a start date into the sorted history replaces the cycle between
+        # its neighbours with the two cycles on either side of it (and back again
+        # for a removal), which keeps out-of-order inserts and edits exact
+        previous_start, next_start = _neighbour_starts(user_id, start_date, exclude_id)
+        if previous_start is not None and next_start is not None:
+            self._add_cycle((next_start - previous_start).days, -sign)
+        if previous_start is not None:
+            self._add_cycle((start_date - previous_start).days, sign)
+        if next_start is not None:
+            self._add_cycle((next_start - start_date).days, sign)
+        self.period_count += sign
+
+    def _refresh_recent(self, user_id):
+        starts = [
+            row.start_date for row in
+            db.session.query(Period.start_date)
+            .filter(Period.user_id == user_id)
+            .order_by(Period.start_date.desc())
+            .limit(RECENT_CYCLE_WINDOW + 1)
+        ]
+        self.last_start_date = starts[0] if starts else None
+        self.recent_cycle_lengths = [
+            (starts[i] - starts[i + 1]).days for i in range(len(starts) - 1)
+        ]
+
+
+def _neighbour_starts(user_id, start_date, exclude_id):
+    query = db.session.query(Period.start_date).filter(Period.user_id == user_id)
+    if exclude_id is not None:
+        query = query.filter(Period.id != exclude_id)
+    previous_start = (
+        query.filter(Period.start_date <= start_date)
+        .order_by(Period.start_date.desc()).limit(1).scalar()
+    )
+    next_start = (
+        query.filter(Period.start_date > start_date)
+        .order_by(Period.start_date).limit(1).scalar()
+    )
+    return previous_start, next_start
+
+
+def get_summary(user_id):
+    """Return the user's summary, building it from the raw tables if it is missing."""
+    user_id = int(user_id)
+    summary = db.session.get(CycleSummary, user_id)
+    if summary is None:
+        summary = rebuild_summary(user_id)
+    return summary
+
+
+# Summaries already bumped by the session's current transaction, by user id
+_WRITTEN = 'cycle_summaries_written'
+
+
+def _bump_data_version(user_id):
+    # One atomic UPDATE ... RETURNING instead of read, add, write: it also takes
+    # SQLite's write lock, so concurrent transactions of the same user always get
+    # different versions. None when the user has no summary yet
+    return db.session.execute(
+        update(CycleSummary)
+        .where(CycleSummary.user_id == user_id)
+        .values(data_version=CycleSummary.data_version + 1)
+        .returning(CycleSummary.data_version),
+        execution_options={'synchronize_session': False}
+    ).scalar()
+
+
+def _summary_for_write(user_id):
+    user_id = int(user_id)
+    # Readers only see committed versions, so one bump per transaction is enough.
+    # Holding the summary also keeps it in the (weak) identity map between the
+    # hooks of one write, which would otherwise load it again
+    written = db.session.info.setdefault(_WRITTEN, {})
+    if user_id in written:
+        return written[user_id], False
+    version = _bump_data_version(user_id)
+    if version is None:
+        # Built from tables that already hold the pending change, so the caller
+        # must not apply it a second time
+        return rebuild_summary(user_id), True
+    # Loaded again now that the write lock is held: a copy read earlier in the
+    # transaction may predate another writer's commit, and aggregates updated
+    # from it would drop that writer's changes
+    summary = db.session.get(CycleSummary, user_id, populate_existing=True)
+    written[user_id] = summary
+    return summary, False
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _forget_written_summaries(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_WRITTEN, None)
+
+
+# The hooks below must be called after the change has been flushed and before the
+# surrounding commit, so the summary is written in the same transaction. Their
+# queries only read the flushed period rows, so the summary itself is left to the
+# commit and written with one UPDATE instead of one per query.
+
+def period_added(period):
+    user_id = int(period.user_id)
+    summary, rebuilt = _summary_for_write(user_id)
+    if rebuilt:
+        return summary
+    with db.session.no_autoflush:
+        summary._add_start(user_id, period.start_date, period.id)
+        summary._add_period_length(period.start_date, period.end_date)
+        summary._refresh_recent(user_id)
+    return summary
+
+
+def period_changed(period, old_start_date, old_end_date):
+    user_id = int(period.user_id)
+    summary, rebuilt = _summary_for_write(user_id)
+    if rebuilt:
+        return summary
+    with db.session.no_autoflush:
+        if period.start_date != old_start_date:
+            summary._add_start(user_id, old_start_date, period.id, sign=-1)
+            summary._add_start(user_id, period.start_date, period.id)
+            summary._refresh_recent(user_id)
+        summary._add_period_length(old_start_date, old_end_date, sign=-1)
+        summary._add_period_length(period.start_date, period.end_date)
+    return summary
+
+
+def period_removed(period):
+    user_id = int(period.user_id)
+    summary, rebuilt = _summary_for_write(user_id)
+    if rebuilt:
+        return summary
+    with db.session.no_autoflush:
+        summary._add_start(user_id, period.start_date, period.id, sign=-1)
+        summary._add_period_length(period.start_date, period.end_date, sign=-1)
+        summary._refresh_recent(user_id)
+    return summary
+
+
+def touch_summary(user_id):
+    """Bump the data version for writes that do not change any aggregate."""
+    return _summary_for_write(user_id)[0]
+
+
+def ovulation_added(user_id, count=1):
+    summary, rebuilt = _summary_for_write(user_id)
+    if not rebuilt:
+        summary.ovulation_count += count
+    return summary
+
+
+def ovulation_removed(user_id):
+    summary, rebuilt = _summary_for_write(user_id)
+    if not rebuilt:
+        summary.ovulation_count -= 1
+    return summary
+
+
+def _ovulation_count(user_id):
+    return db.session.query(db.func.count(Ovulation.id)).filter(Ovulation.user_id == user_id).scalar()
+
+
+def rebuild_summary(user_id):
+    """Recompute one user's summary from the period and ovulation tables."""
+    user_id = int(user_id)
+    written = db.session.info.setdefault(_WRITTEN, {})
+    summary = written.get(user_id)
+    if summary is None and _bump_data_version(user_id) is not None:
+        summary = db.session.get(CycleSummary, user_id, populate_existing=True)
+    if summary is None:
+        summary = CycleSummary(user_id=user_id, data_version=_initial_data_version(), sync_horizon=0)
+        # A token can outlive its user for the user cache's TTL in other workers.
+        # Such a user gets an empty summary that is never stored: shards have no
+        # foreign key that would stop an orphan row
+        if db.session.query(User.id).filter(User.id == user_id).first() is not None:
+            db.session.add(summary)
+    written[user_id] = summary
+
+    summary.period_count = 0
+    summary.cycle_count = summary.cycle_length_sum = summary.cycle_length_sum_sq = 0
+    summary.period_length_count = summary.period_length_sum = summary.period_length_sum_sq = 0
+
+    previous_start = None
+    rows = (
+        db.session.query(Period.start_date, Period.end_date)
+        .filter(Period.user_id == user_id)
+        .order_by(Period.start_date)
+    )
+    for start_date, end_date in rows:
+        summary.period_count += 1
+        if previous_start is not None:
+            summary._add_cycle((start_date - previous_start).days)
+        summary._add_period_length(start_date, end_date)
+        previous_start = start_date
+
+    summary.ovulation_count = _ovulation_count(user_id)
+    summary._refresh_recent(user_id)
+    return summary
@@ -0,0 +1,131 @@
+import os
+import weakref
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect
+from src.models.sharding import SHARD_BIND_PREFIX, shard_bind_for
+
+READ_BIND = 'read'
+
+# Per-connection PRAGMAs. 'default' leaves the driver defaults (rollback journal,
+# FULL sync, no busy timeout); 'production' lets readers and the writer run
+# concurrently and makes writers wait for the lock instead of failing with
+# "database is locked".
+SQLITE_PROFILES = {
+    'default': {
+        'pragmas': {},
+        'engine_options': {}
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'cache_size': -16000,  # KiB, i.e. 16 MB of page cache per connection
+            'mmap_size': 128 * 1024 * 1024,
+            'temp_store': 'MEMORY'
+        },
+        'engine_options': {
+            'pool_size': 5,
+            'max_overflow': 5,
+            'pool_timeout': 10,
+            'connect_args': {'timeout': 5, 'check_same_thread': False}
+        }
+    }
+}
+
+
+class RoutingSession(Session):
+    """Sends the sharded tables to the current user's shard, reads of GET requests to
+    the read engine and everything else, writes included, to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            engine = shard_bind_for(self, inspect(mapper) if mapper is not None else None, clause)
+            if engine is not None:
+                return engine
+        if (
+            bind is None
+            and not self._flushing
+            and not getattr(clause, 'is_dml', False)
+            and has_app_context()
+            and g.get('use_read_engine')
+            and READ_BIND in self._db.engines
+        ):
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def apply_engine_profile(app):
+    """Fill in engine options and the optional read bind; call before ``db.init_app``."""
+    profile = SQLITE_PROFILES[app.config.get('SQLITE_PROFILE', 'production')]
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not uri.startswith('sqlite'):
+        return
+
+    options = dict(profile['engine_options'])
+    if ':memory:' in uri or uri in ('sqlite://', 'sqlite:///'):
+        # A private in-memory database only exists on its one connection
+        options = {}
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).update(options)
+
+    if app.config.get('SQLITE_READ_ENGINE') and options:
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[READ_BIND] = uri
+
+
+def install_pragmas(app, db):
+    """Run the profile's PRAGMAs on every new connection; call after ``db.init_app``.
+
+    Foreign keys are enforced in every profile, so deleting a user cascades to their
+    rows, except on the shards, which have no ``user`` table to reference.
+    """
+    pragmas = SQLITE_PROFILES[app.config.get('SQLITE_PROFILE', 'production')]['pragmas']
+    with app.app_context():
+        engines = dict(db.engines)
+
+    for bind_key, engine in engines.items():
+        if engine.dialect.name != 'sqlite':
+            continue
+        read_only = bind_key == READ_BIND
+        foreign_keys = not (bind_key or '').startswith(SHARD_BIND_PREFIX)
+
+        def on_connect(dbapi_connection, connection_record, read_only=read_only, foreign_keys=foreign_keys):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+            if foreign_keys:
+                cursor.execute('PRAGMA foreign_keys=ON')
+            if read_only:
+                cursor.execute('PRAGMA query_only=ON')
+            cursor.close()
+
+        event.listen(engine, 'connect', on_connect)
+
+
+# Engines of every app built in this process. Weak, so the fork hook keeps no app
+# alive: one hook for the process, however many apps tools and tests create.
+_forked_engines = weakref.WeakSet()
+
+
+def _dispose_forked_engines():
+    for engine in list(_forked_engines):
+        engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_dispose_forked_engines)
+
+
+def dispose_engines_after_fork(app, db):
+    """Drop pooled connections a forked child inherits from ``app``'s engines, so it
+    never shares the parent's.
+
+    ``close=False`` leaves the sockets/files to the parent, which still owns them.
+    """
+    with app.app_context():
+        _forked_engines.update(db.engines.values())
+
+
+def use_read_engine():
+    """``before_request`` hook for blueprints whose GET endpoints may read from the read engine."""
+    if request.method == 'GET':
+        g.use_read_engine = True
@@ -0,0 +1,173 @@
+import re
+from datetime import datetime
+from sqlalchemy import bindparam, inspect, text
+from src.models.user import db
+from src.models.sharding import shard_engines, sharded_tables
+
+
+# Migrations describe the schema as it was when they were written, never through the
+# live models: a database several versions behind runs every step in order, and the
+# models may already declare columns and indexes that only later steps create.
+
+def _create_indexes(*indexes):
+    # db.create_all() only creates indexes together with their table, so databases
+    # created before an index was declared never get it
+    def step(conn):
+        existing = set(inspect(conn).get_table_names())
+        for name, table_name, columns in indexes:
+            if table_name not in existing:
+                continue  # a shard only holds the sharded tables
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table_name} ({", ".join(columns)})'))
+    return step
+
+
+def _add_column(table_name, column_name, ddl):
+    # SQLite ALTER TABLE ADD COLUMN, skipped when create_all() already made the column
+    def step(conn):
+        existing = {column['name'] for column in inspect(conn).get_columns(table_name)}
+        if column_name not in existing:
+            conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}'))
+    return step
+
+
+# Symptom parsing as it was when the vocabulary was added: later changes to
+# parse_symptoms must not change what the backfill of an old database produces
+_SYMPTOM_SEPARATORS = re.compile(r'[,;\n]+')
+_SYMPTOM_NAME_LENGTH = 80
+_BACKFILL_BATCH_SIZE = 2000
+
+
+def _parse_symptoms(text_value):
+    names = []
+    for part in _SYMPTOM_SEPARATORS.split(text_value or ''):
+        name = ' '.join(part.split()).lower()[:_SYMPTOM_NAME_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def _backfill_symptom_links(conn):
+    # Parses the symptom text of every record without links into the vocabulary
+    # and symptom_log, in keyset batches so the whole database is never in memory
+    existing = set(inspect(conn).get_table_names())
+    if not {'symptom', 'symptom_log'} <= existing:
+        return
+    select_names = text('SELECT name, id FROM symptom WHERE name IN :names').bindparams(
+        bindparam('names', expanding=True)
+    )
+    for source, date_column in (('period', 'start_date'), ('ovulation', 'ovulation_date')):
+        if source not in existing:
+            continue
+        last_id = 0
+        while True:
+            rows = conn.execute(text(
+                f'SELECT id, user_id, {date_column} AS log_date, symptoms FROM {source} '
+                f'WHERE symptoms IS NOT NULL AND id > :last_id '
+                f'AND id NOT IN (SELECT record_id FROM symptom_log WHERE source = :source) '
+                f'ORDER BY id LIMIT :limit'
+            ), {'last_id': last_id, 'source': source, 'limit': _BACKFILL_BATCH_SIZE}).all()
+            parsed = [(row, _parse_symptoms(row.symptoms)) for row in rows]
+            names = sorted({name for _row, row_names in parsed for name in row_names})
+            if names:
+                created_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+                conn.execute(
+                    text('INSERT OR IGNORE INTO symptom (name, created_at) VALUES (:name, :created_at)'),
+                    [{'name': name, 'created_at': created_at} for name in names]
+                )
+                ids = dict(conn.execute(select_names, {'names': names}).all())
+                conn.execute(text(
+                    'INSERT OR IGNORE INTO symptom_log (user_id, symptom_id, source, record_id, log_date) '
+                    'VALUES (:user_id, :symptom_id, :source, :record_id, :log_date)'
+                ), [
+                    {'user_id': row.user_id, 'symptom_id': ids[name], 'source': source,
+                     'record_id': row.id, 'log_date': row.log_date}
+                    for row, row_names in parsed
+                    for name in row_names
+                ])
+            if len(rows) < _BACKFILL_BATCH_SIZE:
+                break
+            last_id = rows[-1].id
+
+
+_USER_REFERENCE = re.compile(r'REFERENCES\s+"?user"?\s*\(\s*"?id"?\s*\)(?!\s+ON\s+DELETE)', re.IGNORECASE)
+
+
+def _cascade_user_foreign_keys(conn):
+    # SQLite cannot alter a constraint, so each table whose user_id foreign key lacks
+    # ON DELETE CASCADE is rebuilt from its own CREATE TABLE with the clause added:
+    # new table, copy, drop, rename, then its indexes again. Rows of users that no
+    # longer exist (left behind by earlier deletes) are not copied.
+    inspector = inspect(conn)
+    existing = inspector.get_table_names()
+    if 'user' not in existing:
+        return  # a shard: nothing to cascade from
+    for name in existing:
+        foreign_keys = [fk for fk in inspector.get_foreign_keys(name) if fk['referred_table'] == 'user']
+        if not foreign_keys or all(fk['options'].get('ondelete') == 'CASCADE' for fk in foreign_keys):
+            continue
+        table_sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': name}
+        ).scalar()
+        index_sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :name AND sql IS NOT NULL"),
+            {'name': name}
+        ).scalars().all()
+        staging = f'{name}__rebuild'
+        ddl = _USER_REFERENCE.sub(lambda match: f'{match.group(0)} ON DELETE CASCADE', table_sql)
+        ddl = re.sub(rf'^CREATE TABLE\s+"?{name}"?', f'CREATE TABLE {staging}', ddl, count=1)
+        columns = ', '.join(column['name'] for column in inspector.get_columns(name))
+        conn.execute(text(ddl))
+        conn.execute(text(
+            f'INSERT INTO {staging} ({columns}) SELECT {columns} FROM {name} '
+            f'WHERE user_id IN (SELECT id FROM user)'
+        ))
+        conn.execute(text(f'DROP TABLE {name}'))
+        conn.execute(text(f'ALTER TABLE {staging} RENAME TO {name}'))
+        for sql in index_sql:
+            conn.execute(text(sql))
+
+
+# (version, description, step), applied in order and tracked with PRAGMA user_version.
+# Steps must be idempotent: a fresh database is created by db.create_all() with the
+# current models and then runs every step as well.
+MIGRATIONS = [
+    (1, 'per-user composite indexes and updated_at indexes', _create_indexes(
+        ('ix_period_user_id_start_date', 'period', ('user_id', 'start_date')),
+        ('ix_period_updated_at', 'period', ('updated_at',)),
+        ('ix_ovulation_user_id_ovulation_date', 'ovulation', ('user_id', 'ovulation_date')),
+        ('ix_ovulation_updated_at', 'ovulation', ('updated_at',)),
+    )),
+    (2, 'cycle_summary.data_version', _add_column('cycle_summary', 'data_version', 'BIGINT NOT NULL DEFAULT 0')),
+    (3, 'symptom vocabulary backfilled from the free-text columns', _backfill_symptom_links),
+    (4, 'period.change_seq', _add_column('period', 'change_seq', 'BIGINT NOT NULL DEFAULT 0')),
+    (5, 'ovulation.change_seq', _add_column('ovulation', 'change_seq', 'BIGINT NOT NULL DEFAULT 0')),
+    (6, 'cycle_summary.sync_horizon', _add_column('cycle_summary', 'sync_horizon', 'BIGINT NOT NULL DEFAULT 0')),
+    (7, '(user_id, change_seq) indexes for GET /sync', _create_indexes(
+        ('ix_period_user_id_change_seq', 'period', ('user_id', 'change_seq')),
+        ('ix_ovulation_user_id_change_seq', 'ovulation', ('user_id', 'change_seq')),
+    )),
+    (8, 'ON DELETE CASCADE on every user_id foreign key', _cascade_user_foreign_keys),
+]
+
+
+def schema_version(conn):
+    return conn.execute(text('PRAGMA user_version')).scalar()
+
+
+def _apply_migrations(engine):
+    with engine.begin() as conn:
+        current = schema_version(conn)
+        for version, _description, step in MIGRATIONS:
+            if version > current:
+                step(conn)
+                conn.execute(text(f'PRAGMA user_version = {int(version)}'))
+
+
+def upgrade_schema():
+    """Create missing tables and apply pending migrations to the app's database and shards."""
+    db.create_all()
+    _apply_migrations(db.engine)
+    tables = sharded_tables(db)
+    for engine in shard_engines(db).values():
+        db.metadata.create_all(engine, tables=tables)
+        _apply_migrations(engine)
@@ -2,14 +2,24 @@ from datetime import datetime
 from src.models.user import db
 
 class Ovulation(db.Model):
+    __table_args__ = (
+        # Every per-user list/prediction query filters on user_id and orders by ovulation_date
+        db.Index('ix_ovulation_user_id_ovulation_date', 'user_id', 'ovulation_date'),
+        db.Index('ix_ovulation_updated_at', 'updated_at'),
+        # GET /sync reads what changed after a client's cursor
+        db.Index('ix_ovulation_user_id_change_seq', 'user_id', 'change_seq'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     ovulation_date = db.Column(db.Date, nullable=False)
     basal_body_temperature = db.Column(db.Float, nullable=True)
     cervical_mucus = db.Column(db.String(50), nullable=True)  # dry, sticky, creamy, watery, egg-white
     symptoms = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # The user's data version at the last write, see src/models/sync.py
+    change_seq = db.Column(db.BigInteger, nullable=False, default=0)
 
     def __repr__(self):
         return f'<Ovulation {self.ovulation_date}>'
@@ -26,3 +36,18 @@ class Ovulation(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+
+# The columns behind to_dict(), for list queries that skip ORM objects
+OVULATION_COLUMNS = (
+    Ovulation.id, Ovulation.user_id, Ovulation.ovulation_date, Ovulation.basal_body_temperature,
+    Ovulation.cervical_mucus, Ovulation.symptoms, Ovulation.created_at, Ovulation.updated_at
+)
+
+
+def ovulation_dates(user_id, limit=None):
+    """The user's ovulation dates oldest first, only the ``limit`` most recent if given."""
+    query = db.session.query(Ovulation.ovulation_date).filter(Ovulation.user_id == user_id)
+    if limit is None:
+        return [row.ovulation_date for row in query.order_by(Ovulation.ovulation_date)]
+    rows = query.order_by(Ovulation.ovulation_date.desc()).limit(limit)
+    return [row.ovulation_date for row in rows][::-1]
@@ -1,15 +1,25 @@
-from datetime import datetime
+from datetime import date, datetime
 from src.models.user import db
 
 class Period(db.Model):
+    __table_args__ = (
+        # Every per-user list/prediction query filters on user_id and orders by start_date
+        db.Index('ix_period_user_id_start_date', 'user_id', 'start_date'),
+        db.Index('ix_period_updated_at', 'updated_at'),
+        # GET /sync reads what changed after a client's cursor
+        db.Index('ix_period_user_id_change_seq', 'user_id', 'change_seq'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=True)
     flow_intensity = db.Column(db.String(20), nullable=True)  # light, medium, heavy
     symptoms = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # The user's data version at the last write, see src/models/sync.py
+    change_seq = db.Column(db.BigInteger, nullable=False, default=0)
 
     def __repr__(self):
         return f'<Period {self.start_date} - {self.end_date}>'
@@ -26,3 +36,26 @@ class Period(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+
+# The columns behind to_dict(), for list queries that skip ORM objects
+PERIOD_COLUMNS = (
+    Period.id, Period.user_id, Period.start_date, Period.end_date, Period.flow_intensity,
+    Period.symptoms, Period.created_at, Period.updated_at
+)
+
+
+def period_start_dates(user_id, since=None, keep_latest=1):
+    """The user's period start dates, oldest first, from the covering index.
+
+    With ``since`` only the starts on or after it, reaching back far enough to keep
+    the ``keep_latest`` most recent ones; still a single index range scan.
+    """
+    query = db.session.query(Period.start_date).filter(Period.user_id == user_id)
+    if since is not None:
+        latest = (
+            query.order_by(Period.start_date.desc())
+            .offset(keep_latest - 1).limit(1)
+            .scalar_subquery()
+        )
+        query = query.filter(Period.start_date >= db.func.min(since, db.func.coalesce(latest, date.min)))
+    return [row.start_date for row in query.order_by(Period.start_date)]
@@ -0,0 +1,88 @@
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.user import db
+from src.utils.cycle_stats import (
+    RECENT_OVULATIONS, cycle_stats_from_summary, predict_ovulation, predict_period_from_summary
+)
+
+SNAPSHOT_KINDS = ('period', 'ovulation', 'cycle_stats')
+
+
+class PredictionSnapshot(db.Model):
+    """Predictions and cycle stats precomputed by ``flask precompute-predictions``.
+
+    A snapshot answers for the data version it was computed from; the ovulation
+    prediction also depends on the day it was computed on.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    data_version = db.Column(db.BigInteger, nullable=False)
+    computed_on = db.Column(db.Date, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # [payload, status] as returned by the live computations
+    period_json = db.Column(db.Text, nullable=False)
+    ovulation_json = db.Column(db.Text, nullable=False)
+    cycle_stats_json = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<PredictionSnapshot user={self.user_id} version={self.data_version}>'
+
+    def is_fresh(self, kind, data_version, today=None):
+        if self.data_version != data_version:
+            return False
+        return kind != 'ovulation' or self.computed_on == (today or date.today())
+
+    def result(self, kind):
+        payload, status = json.loads(getattr(self, f'{kind}_json'))
+        return payload, status
+
+
+def snapshot_or_compute(kind, summary, compute):
+    """The precomputed ``(payload, status)`` when it matches the summary, else ``compute()``."""
+    snapshot = db.session.get(PredictionSnapshot, summary.user_id)
+    if snapshot is not None and snapshot.is_fresh(kind, summary.data_version):
+        return snapshot.result(kind)
+    return compute()
+
+
+# Everything one user's snapshot is computed from, as plain values a worker process
+# can receive without a database connection
+SnapshotInput = namedtuple('SnapshotInput', [
+    'user_id', 'data_version', 'period_count', 'ovulation_count', 'cycle_count',
+    'cycle_length_sum', 'cycle_length_sum_sq', 'period_length_count', 'period_length_sum',
+    'last_start_date', 'recent_cycle_lengths', 'period_starts', 'ovulation_dates'
+])
+
+
+def compute_snapshot(values, today):
+    """Return the snapshot row for one ``SnapshotInput``; runs in the worker processes."""
+    return {
+        'user_id': values.user_id,
+        'data_version': values.data_version,
+        'computed_on': today,
+        'computed_at': datetime.utcnow(),
+        'period_json': json.dumps(predict_period_from_summary(values)),
+        'ovulation_json': json.dumps(predict_ovulation(
+            values.period_starts, values.ovulation_dates[-RECENT_OVULATIONS:], today=today
+        )),
+        'cycle_stats_json': json.dumps([cycle_stats_from_summary(values), 200])
+    }
+
+
+def upsert_snapshots(rows):
+    if not rows:
+        return 0
+    statement = sqlite_insert(PredictionSnapshot)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={
+                column: statement.excluded[column]
+                for column in ('data_version', 'computed_on', 'computed_at',
+                               'period_json', 'ovulation_json', 'cycle_stats_json')
+            }
+        ),
+        rows
+    )
+    return len(rows)
@@ -0,0 +1,40 @@
+"""Set-based deletion of users and everything they own.
+
+``purge_users`` never loads a period or ovulation: in the main database the
+``ON DELETE CASCADE`` foreign keys remove a user's rows together with the user,
+and on the shards, which have no ``user`` table to cascade from, every per-user
+table gets one ``DELETE ... WHERE user_id IN (...)`` per batch. Python memory does
+not grow with how much data the users have.
+"""
+from sqlalchemy import delete
+from src.models.user import User, db
+from src.models.sharding import SHARDED_TABLES, shard, shard_count, shard_key_for_user
+
+PURGE_BATCH_SIZE = 500
+
+
+def _user_tables():
+    return [
+        table for table in reversed(db.metadata.sorted_tables)
+        if table.name in SHARDED_TABLES and 'user_id' in table.c
+    ]
+
+
+def purge_users(user_ids):
+    """Delete the users and all their data; returns how many users existed. The caller commits.
+
+    With sharding the shards' deletes run first, so a purge interrupted between the
+    two commits leaves the user in place and can simply be run again.
+    """
+    user_ids = [int(user_id) for user_id in user_ids]
+    if not user_ids:
+        return 0
+    if shard_count():
+        groups = {}
+        for user_id in user_ids:
+            groups.setdefault(shard_key_for_user(user_id), []).append(user_id)
+        for key, shard_user_ids in groups.items():
+            with shard(key):
+                for table in _user_tables():
+                    db.session.execute(delete(table).where(table.c.user_id.in_(shard_user_ids)))
+    return db.session.execute(delete(User).where(User.id.in_(user_ids))).rowcount
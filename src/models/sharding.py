@@ -0,0 +1,147 @@
+"""Optional user sharding across several SQLite files.
+
+With ``SQLITE_SHARDS`` set to N > 0 every table holding one user's data lives in
+one of N shard files, picked by a jump consistent hash of the user id; the main
+database keeps the ``user`` table. Each shard is a Flask-SQLAlchemy bind
+(``shard-0`` ... ``shard-N-1``) and ``RoutingSession`` sends statements on the
+sharded tables to the shard selected for the current user, so every write
+transaction of a request stays inside one shard file and writers of different
+shards never wait on the same lock.
+
+``get_current_user_id()`` selects the authenticated user's shard, which makes the
+blueprints shard-aware without changes; code working on other users (admin
+routes, CLI commands) selects one with ``user_shard(user_id)``.
+"""
+import os
+import zlib
+from contextlib import contextmanager
+from flask import current_app, g
+
+SHARD_BIND_PREFIX = 'shard-'
+# Per-user data, plus the symptom vocabulary its links point to
+SHARDED_TABLES = frozenset({
+    'period', 'ovulation', 'cycle_summary', 'symptom', 'symptom_log', 'prediction_snapshot',
+    'sync_tombstone'
+})
+
+
+class ShardNotSelected(RuntimeError):
+    pass
+
+
+def shard_index(user_id, shard_count):
+    """Jump consistent hash: growing N to N+1 shards only moves ~1/(N+1) of the users."""
+    key = zlib.crc32(str(int(user_id)).encode())
+    bucket, candidate = -1, 0
+    while candidate < shard_count:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_bind_key(index):
+    return f'{SHARD_BIND_PREFIX}{index}'
+
+
+def shard_count(app=None):
+    return (app or current_app).config.get('SQLITE_SHARDS', 0)
+
+
+def shard_key_for_user(user_id, count=None):
+    """Bind key of the user's shard, or None when sharding is off."""
+    count = shard_count() if count is None else count
+    if not count:
+        return None
+    return shard_bind_key(shard_index(user_id, count))
+
+
+def shard_url(database_url, index):
+    """``sqlite:///dir/app.db`` -> ``sqlite:///dir/app-shard-<index>.db``"""
+    root, extension = os.path.splitext(database_url)
+    return f'{root}-shard-{index}{extension or ".db"}'
+
+
+def configure_shards(app):
+    """Add one bind per shard; call before ``db.init_app``."""
+    count = shard_count(app)
+    if not count:
+        return
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not uri.startswith('sqlite:///') or ':memory:' in uri:
+        raise ValueError('SQLITE_SHARDS needs a file-backed sqlite:/// database')
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    for index in range(count):
+        binds[shard_bind_key(index)] = shard_database_url(app, index)
+
+
+def shard_database_url(app, index):
+    template = app.config.get('SQLITE_SHARD_URL')
+    if template:
+        return template.format(index=index)
+    return shard_url(app.config['SQLALCHEMY_DATABASE_URI'], index)
+
+
+def shard_engines(db):
+    """``{bind key: engine}`` of every shard, empty when sharding is off."""
+    return {
+        key: engine for key, engine in db.engines.items()
+        if key and key.startswith(SHARD_BIND_PREFIX)
+    }
+
+
+def sharded_tables(db):
+    return [table for table in db.metadata.sorted_tables if table.name in SHARDED_TABLES]
+
+
+def select_user_shard(user_id):
+    """Route the sharded tables to ``user_id``'s shard for the rest of the app context."""
+    g.user_shard = shard_key_for_user(user_id)
+    return g.user_shard
+
+
+@contextmanager
+def user_shard(user_id):
+    """Select ``user_id``'s shard inside the block, restoring the previous selection after."""
+    previous = g.get('user_shard')
+    try:
+        yield select_user_shard(user_id)
+    finally:
+        g.user_shard = previous
+
+
+@contextmanager
+def shard(key):
+    """Select a shard by bind key, for work that covers every user of one shard."""
+    previous = g.get('user_shard')
+    g.user_shard = key
+    try:
+        yield key
+    finally:
+        g.user_shard = previous
+
+
+def _statement_tables(mapper, clause):
+    if mapper is not None:
+        return [mapper.local_table]
+    if clause is None:
+        return []
+    table = getattr(clause, 'table', None)
+    if table is not None:
+        return [table]
+    if hasattr(clause, 'get_final_froms'):
+        return clause.get_final_froms()
+    return [clause]
+
+
+def shard_bind_for(session, mapper, clause):
+    """The shard engine for a statement on the sharded tables, None for the main database."""
+    if not shard_count():
+        return None
+    names = {getattr(table, 'name', None) for table in _statement_tables(mapper, clause)}
+    if not names & SHARDED_TABLES:
+        return None
+    key = g.get('user_shard')
+    if key is None:
+        raise ShardNotSelected(f'No user shard selected for {", ".join(sorted(names & SHARDED_TABLES))}')
+    return session._db.engines[key]
@@ -0,0 +1,247 @@
+import re
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.user import db
+from src.models.period import Period
+from src.models.ovulation import Ovulation
+
+# Rough phases of a cycle by cycle day (day 1 = first day of the period)
+CYCLE_PHASES = (('menstrual', 1, 5), ('follicular', 6, 13), ('ovulatory', 14, 16), ('luteal', 17, None))
+
+# Free-text symptoms are split on these and normalized to lower case
+_SEPARATORS = re.compile(r'[,;\n]+')
+MAX_SYMPTOM_LENGTH = 80
+LINK_BATCH_SIZE = 2000
+
+
+class Symptom(db.Model):
+    """One normalized symptom name shared by every user."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(MAX_SYMPTOM_LENGTH), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Symptom {self.name}>'
+
+    def to_dict(self):
+        return {'id': self.id, 'name': self.name}
+
+
+class SymptomLog(db.Model):
+    """Links a period or ovulation record to each symptom parsed from its text."""
+    __tablename__ = 'symptom_log'
+    __table_args__ = (
+        # Also serves the delete of a record's links on update/delete
+        db.UniqueConstraint('source', 'record_id', 'symptom_id', name='uq_symptom_log_record_symptom'),
+        # Per-user aggregates group by symptom in index order
+        db.Index('ix_symptom_log_user_id_symptom_id', 'user_id', 'symptom_id', 'log_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    symptom_id = db.Column(db.Integer, db.ForeignKey('symptom.id'), nullable=False)
+    source = db.Column(db.String(10), nullable=False)  # period, ovulation
+    record_id = db.Column(db.Integer, nullable=False)
+    log_date = db.Column(db.Date, nullable=False)  # period start or ovulation date
+
+    def __repr__(self):
+        return f'<SymptomLog {self.source}:{self.record_id} symptom={self.symptom_id}>'
+
+
+# source -> (model, date column)
+SOURCES = {
+    'period': (Period, Period.start_date),
+    'ovulation': (Ovulation, Ovulation.ovulation_date),
+}
+
+
+def parse_symptoms(text):
+    """Normalized, de-duplicated symptom names from a free-text field, in order."""
+    names = []
+    for part in _SEPARATORS.split(text or ''):
+        name = ' '.join(part.split()).lower()[:MAX_SYMPTOM_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def symptom_ids(executor, names):
+    """Map names to vocabulary ids, adding the missing ones; ``executor`` is a session or connection."""
+    names = sorted(set(names))
+    if not names:
+        return {}
+    now = datetime.utcnow()
+    # On the tables rather than the models: a session would run an ORM bulk insert,
+    # which processes every parameter set in Python before the executemany
+    executor.execute(
+        sqlite_insert(Symptom.__table__).on_conflict_do_nothing(index_elements=['name']),
+        [{'name': name, 'created_at': now} for name in names]
+    )
+    rows = executor.execute(db.select(Symptom.id, Symptom.name).where(Symptom.name.in_(names)))
+    return {name: symptom_id for symptom_id, name in rows}
+
+
+def link_symptoms(executor, source, records):
+    """Insert links for ``records`` of ``(user_id, record_id, log_date, text)``; returns the count.
+
+    One vocabulary insert, one lookup and one link insert for all of ``records``,
+    each an executemany; imports repeat the same few texts, so each is parsed once.
+    """
+    texts = {}
+    for record in records:
+        if record[3] not in texts:
+            texts[record[3]] = parse_symptoms(record[3])
+    ids = symptom_ids(executor, [name for names in texts.values() for name in names])
+    links = [
+        {'user_id': user_id, 'symptom_id': ids[name], 'source': source,
+         'record_id': record_id, 'log_date': log_date}
+        for user_id, record_id, log_date, text in records
+        for name in texts[text]
+    ]
+    if links:
+        executor.execute(sqlite_insert(SymptomLog.__table__).on_conflict_do_nothing(), links)
+    return len(links)
+
+
+def _link_in_batches(executor, source, statement, last_id=0):
+    # Keyset batches, so a backfill of the whole database never holds it in memory
+    model, _date_column = SOURCES[source]
+    total = 0
+    while True:
+        rows = executor.execute(statement.where(model.id > last_id).limit(LINK_BATCH_SIZE)).all()
+        if rows:
+            total += link_symptoms(executor, source, rows)
+            last_id = rows[-1].id
+        if len(rows) < LINK_BATCH_SIZE:
+            return total
+
+
+def _records_with_symptoms(source):
+    model, date_column = SOURCES[source]
+    return (
+        db.select(model.user_id, model.id, date_column, model.symptoms)
+        .where(model.symptoms.is_not(None))
+        .order_by(model.id)
+    )
+
+
+def link_unlinked_records(executor, user_id=None):
+    """Parse the symptom text of every record without links yet; one user or everyone.
+
+    Anti-joins the whole symptom_log table, so it is meant for the CLI; bulk
+    imports use ``link_inserted_records``.
+    """
+    total = 0
+    for source, (model, _date_column) in SOURCES.items():
+        linked = db.select(SymptomLog.record_id).where(SymptomLog.source == source)
+        statement = _records_with_symptoms(source).where(model.id.not_in(linked))
+        if user_id is not None:
+            statement = statement.where(model.user_id == int(user_id))
+        total += _link_in_batches(executor, source, statement)
+    return total
+
+
+def link_inserted_records(executor, source, user_id, after_id):
+    """Link the records a bulk import just added for ``user_id``: those with ids above
+    ``after_id``, the highest id before the insert, read under the same write lock."""
+    model, _date_column = SOURCES[source]
+    statement = _records_with_symptoms(source).where(model.user_id == int(user_id))
+    return _link_in_batches(executor, source, statement, last_id=after_id)
+
+
+# The hooks below run after the record has been flushed and before the commit,
+# like the cycle summary hooks.
+
+def record_symptoms(source, record):
+    """Replace the links of a created or updated record with its current symptoms."""
+    remove_symptoms(source, record.id)
+    _model, date_column = SOURCES[source]
+    return link_symptoms(db.session, source, [
+        (record.user_id, record.id, getattr(record, date_column.key), record.symptoms)
+    ])
+
+
+def remove_symptoms(source, record_id):
+    db.session.execute(
+        db.delete(SymptomLog).where(SymptomLog.source == source, SymptomLog.record_id == record_id)
+    )
+
+
+def _cycle_phase(cycle_day):
+    for name, first, last in CYCLE_PHASES:
+        if cycle_day >= first and (last is None or cycle_day <= last):
+            return name
+    return None
+
+
+def symptom_stats(user_id, source=None):
+    """Per-symptom counts and cycle-day distributions for one user.
+
+    Two grouped queries over the user's range of ``ix_symptom_log_user_id_symptom_id``;
+    the cycle day of a log is found with one index seek for the latest period start
+    on or before it, so it stays right when periods are added out of order.
+    """
+    user_id = int(user_id)
+    filters = [SymptomLog.user_id == user_id]
+    if source is not None:
+        filters.append(SymptomLog.source == source)
+
+    totals = (
+        db.session.query(
+            SymptomLog.symptom_id,
+            db.func.count(),
+            db.func.sum(db.case((SymptomLog.source == 'period', 1), else_=0)),
+            db.func.min(SymptomLog.log_date),
+            db.func.max(SymptomLog.log_date)
+        )
+        .filter(*filters)
+        .group_by(SymptomLog.symptom_id)
+        .all()
+    )
+    if not totals:
+        return []
+
+    cycle_start = (
+        db.select(db.func.max(Period.start_date))
+        .where(Period.user_id == SymptomLog.user_id, Period.start_date <= SymptomLog.log_date)
+        .correlate(SymptomLog)
+        .scalar_subquery()
+    )
+    cycle_day = db.cast(
+        db.func.julianday(SymptomLog.log_date) - db.func.julianday(cycle_start) + 1, db.Integer
+    ).label('cycle_day')
+    distribution = (
+        db.session.query(SymptomLog.symptom_id, cycle_day, db.func.count())
+        .filter(*filters)
+        # By the alias rather than a second copy of the correlated subquery
+        .group_by(SymptomLog.symptom_id, db.literal_column('cycle_day'))
+        .all()
+    )
+    names = dict(
+        db.session.query(Symptom.id, Symptom.name)
+        .filter(Symptom.id.in_([row[0] for row in totals]))
+        .all()
+    )
+
+    stats = {}
+    for symptom_id, count, from_periods, first_date, last_date in totals:
+        stats[symptom_id] = {
+            'symptom': names.get(symptom_id),
+            'count': count,
+            'by_source': {'period': from_periods, 'ovulation': count - from_periods},
+            'first_logged': first_date.isoformat(),
+            'last_logged': last_date.isoformat(),
+            'cycle_days': {},
+            'phases': {name: 0 for name, _first, _last in CYCLE_PHASES},
+            'outside_tracked_cycles': 0
+        }
+    # One row per (symptom, cycle day), not per log
+    for symptom_id, day, count in distribution:
+        entry = stats[symptom_id]
+        if day is None:
+            entry['outside_tracked_cycles'] += count
+            continue
+        entry['cycle_days'][str(day)] = count
+        entry['phases'][_cycle_phase(day)] += count
+
+    return sorted(stats.values(), key=lambda entry: (-entry['count'], entry['symptom']))
@@ -0,0 +1,133 @@
+"""Change sequence and tombstones behind ``GET /api/sync``.
+
+Every period/ovulation write stamps the record with ``change_seq``, a value of the
+user's ``CycleSummary.data_version`` taken inside the same transaction, and every
+delete leaves a ``SyncTombstone`` stamped the same way. A client that last synced
+at version ``since`` needs exactly the rows and tombstones with a larger
+``change_seq``, which the ``(user_id, change_seq)`` indexes hand out directly.
+
+Tombstones are purged by ``flask compact-tombstones`` after
+``TOMBSTONE_RETENTION_DAYS``. The summary's ``sync_horizon`` remembers the newest
+purged one: a client whose cursor is older cannot be told about every deletion
+any more and gets a full reset instead.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select, update
+from src.models.user import db
+from src.models.period import PERIOD_COLUMNS, Period
+from src.models.ovulation import OVULATION_COLUMNS, Ovulation
+from src.models.cycle_summary import CycleSummary, touch_summary
+
+TOMBSTONE_RETENTION_DAYS = 90
+
+# source -> (model, columns of its to_dict(), date column for the full snapshot order)
+SYNC_SOURCES = {
+    'period': (Period, PERIOD_COLUMNS, Period.start_date),
+    'ovulation': (Ovulation, OVULATION_COLUMNS, Ovulation.ovulation_date),
+}
+
+
+class SyncTombstone(db.Model):
+    """A deleted period or ovulation record, kept until compaction."""
+    __tablename__ = 'sync_tombstone'
+    __table_args__ = (
+        db.Index('ix_sync_tombstone_user_id_change_seq', 'user_id', 'change_seq'),
+        db.Index('ix_sync_tombstone_deleted_at', 'deleted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    source = db.Column(db.String(20), nullable=False)  # period, ovulation
+    record_id = db.Column(db.Integer, nullable=False)
+    change_seq = db.Column(db.BigInteger, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SyncTombstone {self.source} {self.record_id} seq={self.change_seq}>'
+
+
+def next_change_seq(user_id):
+    """The user's data version after this transaction, for the record about to be written.
+
+    The first write of a transaction bumps the version with one atomic UPDATE,
+    under SQLite's write lock, and every later call in it returns the same value:
+    concurrent transactions never share a version, and the cursor a reader takes
+    after the commit is never behind the record.
+    """
+    return touch_summary(user_id).data_version
+
+
+def record_tombstone(source, record):
+    """Stamp and add the tombstone for ``record``, before it is deleted."""
+    tombstone = SyncTombstone(
+        user_id=int(record.user_id),
+        source=source,
+        record_id=record.id,
+        change_seq=next_change_seq(record.user_id)
+    )
+    db.session.add(tombstone)
+    return tombstone
+
+
+def changes_since(user_id, since):
+    """Everything a client at cursor ``since`` (None for a new client) is missing.
+
+    Returns ``(cursor, reset, rows, deleted)``: ``rows`` and ``deleted`` are keyed by
+    source. With ``reset`` the rows are the user's full data and the client must
+    drop what it holds; otherwise only records changed after ``since``.
+    """
+    user_id = int(user_id)
+    # Read first: anything committed after this is at a larger version and is
+    # returned again on the next sync rather than missed. Only read: building a
+    # missing summary here would bump a version that this request never commits,
+    # and the next write would hand the same version out again
+    state = (
+        db.session.query(CycleSummary.data_version, CycleSummary.sync_horizon)
+        .filter(CycleSummary.user_id == user_id)
+        .first()
+    )
+    cursor, sync_horizon = state if state is not None else (0, 0)
+    reset = since is None or since < sync_horizon or since > cursor
+
+    rows, deleted = {}, {}
+    for source, (model, columns, date_column) in SYNC_SOURCES.items():
+        query = db.session.query(*columns).filter(model.user_id == user_id)
+        if reset:
+            rows[source] = query.order_by(date_column).all()
+        else:
+            rows[source] = query.filter(model.change_seq > since).order_by(model.change_seq, model.id).all()
+        deleted[source] = []
+
+    if not reset:
+        tombstones = (
+            db.session.query(SyncTombstone.source, SyncTombstone.record_id)
+            .filter(SyncTombstone.user_id == user_id, SyncTombstone.change_seq > since)
+            .order_by(SyncTombstone.change_seq)
+        )
+        for source, record_id in tombstones:
+            deleted[source].append(record_id)
+    return cursor, reset, rows, deleted
+
+
+def compact_tombstones(conn, before):
+    """Purge the tombstones deleted before ``before``; returns how many were removed.
+
+    Each affected user's ``sync_horizon`` moves up to the newest purged tombstone
+    first, in the same transaction.
+    """
+    purged = (
+        select(func.max(SyncTombstone.change_seq))
+        .where(SyncTombstone.user_id == CycleSummary.user_id, SyncTombstone.deleted_at < before)
+        .scalar_subquery()
+    )
+    affected = select(SyncTombstone.user_id).where(SyncTombstone.deleted_at < before)
+    conn.execute(
+        update(CycleSummary)
+        .where(CycleSummary.user_id.in_(affected))
+        .values(sync_horizon=func.max(CycleSummary.sync_horizon, purged))
+    )
+    return conn.execute(delete(SyncTombstone).where(SyncTombstone.deleted_at < before)).rowcount
+
+
+def retention_cutoff(days=TOMBSTONE_RETENTION_DAYS, now=None):
+    return (now or datetime.utcnow()) - timedelta(days=days)
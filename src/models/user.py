@@ -1,8 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from src.models.engine import RoutingSession
+from src.utils.password_pool import hash_password, needs_rehash, verify_password
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -11,15 +12,22 @@ class User(db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relationships
-    periods = db.relationship('Period', backref='user', lazy=True, cascade='all, delete-orphan')
-    ovulations = db.relationship('Ovulation', backref='user', lazy=True, cascade='all, delete-orphan')
+    # Relationships; the database deletes the rows (ON DELETE CASCADE), the ORM never loads them for it
+    periods = db.relationship(
+        'Period', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True
+    )
+    ovulations = db.relationship(
+        'Ovulation', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True
+    )
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f'<User {self.username}>'
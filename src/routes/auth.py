@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 from src.models.user import User, db
+from src.utils.identity import current_user_record
+from src.utils.password_pool import HashingOverloaded
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -27,8 +29,8 @@ def register():
         db.session.add(user)
         db.session.commit()
         
-        # Create access token
-        access_token = create_access_token(identity=user.id)
+        # Create access token; the JWT subject must be a string, see login
+        access_token = create_access_token(identity=str(user.id))
         
         return jsonify({
             'message': 'User registered successfully',
@@ -36,6 +38,8 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except HashingOverloaded as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -60,6 +64,11 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid username or password'}), 401
         
+        # Upgrade hashes made with older cost parameters while we have the password
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        
         # Create access token
         # access_token = create_access_token(identity=user.id)
         access_token = create_access_token(identity=str(user.id))
@@ -70,6 +79,8 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except HashingOverloaded as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -100,40 +111,17 @@ def login():
 @jwt_required()
 def get_profile():
     try:
-        # print("DEBUG: Get profile attempt initiated.")
-        current_user_id = get_jwt_identity()
-        # print(f"DEBUG: Value from get_jwt_identity(): {current_user_id}, Type: {type(current_user_id)}")
-
-        if current_user_id is None:
-            # print("DEBUG: get_jwt_identity() returned None. This indicates an issue with the JWT or its identity claim.")
-            return jsonify({'error': 'User not authenticated or JWT identity missing'}), 401
-
-        # Attempt to convert current_user_id to an integer.
-        # Flask-JWT-Extended stores the identity as whatever you pass to create_access_token.
-        # If user.id is an integer, ensure it remains an integer here.
-        # If your user IDs are strings (e.g., UUIDs), remove the int() conversion.
-        try:
-            # Assuming user.id (which you used for create_access_token(identity=user.id)) is an integer
-            processed_user_id = int(current_user_id)
-            # print(f"DEBUG: Converted user ID for query: {processed_user_id}, Type: {type(processed_user_id)}")
-        except ValueError:
-            # print(f"DEBUG: Failed to convert identity '{current_user_id}' to an integer. This might be the cause of the 422.")
-            return jsonify({'error': 'Invalid user ID format in token payload'}), 422 # Or 401 if it's considered unauthenticatable
-
-        # print(f"DEBUG: Attempting to fetch user from database with ID: {processed_user_id}")
-        # Fetch user from database
-        user = User.query.get(processed_user_id)
-        # print(f"DEBUG: User object retrieved: {user}")
+        # Served from the identity cache, no query on a hit
+        user = current_user_record()
 
         if not user:
-            # print(f"DEBUG: User with ID {processed_user_id} not found in database. This might indicate a stale token or deleted user.")
             return jsonify({'error': 'User not found'}), 404
 
-        # print("DEBUG: User found. Returning user data.")
         return jsonify(user.to_dict()), 200
 
+    except ValueError:
+        return jsonify({'error': 'Invalid user ID format in token payload'}), 422
     except Exception as e:
         import traceback
-        # print(f"ERROR: An unexpected exception occurred in get_profile: {e}")
         traceback.print_exc() # This will print the full traceback to your console
         return jsonify({'error': str(e)}), 500
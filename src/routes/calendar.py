@@ -0,0 +1,73 @@
+import calendar
+from datetime import date, datetime, timedelta
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from src.models.user import db
+from src.models.period import Period
+from src.models.ovulation import Ovulation
+from src.models.cycle_summary import get_summary
+from src.models.engine import use_read_engine
+from src.utils.cycle_stats import calendar_from_summary
+from src.utils.prediction_cache import prediction_cache
+from src.utils.identity import get_current_user_id
+from src.utils.conditional import conditional_get
+
+calendar_bp = Blueprint('calendar', __name__)
+calendar_bp.before_request(use_read_engine)
+
+# Periods starting this long before the month can still run into it
+MAX_PERIOD_SPAN_DAYS = 14
+
+
+def _month_bounds(value):
+    month = datetime.strptime(value, '%Y-%m').date() if value else date.today().replace(day=1)
+    last_day = month.replace(day=calendar.monthrange(month.year, month.month)[1])
+    return month, last_day
+
+
+def _month_grid(summary, first_day, last_day):
+    user_id = summary.user_id
+    # Two index range seeks, only the rows that can touch the month
+    periods = (
+        db.session.query(Period.start_date, Period.end_date)
+        .filter(
+            Period.user_id == user_id,
+            Period.start_date >= first_day - timedelta(days=MAX_PERIOD_SPAN_DAYS),
+            Period.start_date <= last_day
+        )
+        .order_by(Period.start_date)
+        .all()
+    )
+    ovulation_dates = [
+        row.ovulation_date for row in
+        db.session.query(Ovulation.ovulation_date)
+        .filter(
+            Ovulation.user_id == user_id,
+            Ovulation.ovulation_date >= first_day,
+            Ovulation.ovulation_date <= last_day
+        )
+        .order_by(Ovulation.ovulation_date)
+    ]
+    return calendar_from_summary(summary, first_day, last_day, periods, ovulation_dates), 200
+
+@calendar_bp.route('/calendar', methods=['GET'])
+@jwt_required()
+@conditional_get(daily=True)
+def get_calendar():
+    try:
+        current_user_id = get_current_user_id()
+        try:
+            first_day, last_day = _month_bounds(request.args.get('month'))
+        except ValueError:
+            return jsonify({'error': 'month must be in YYYY-MM format'}), 400
+
+        summary = get_summary(current_user_id)
+        payload, status = prediction_cache().get_or_compute(
+            f'calendar-{first_day:%Y-%m}', summary.user_id, summary.data_version,
+            lambda: _month_grid(summary, first_day, last_day)
+        )
+        db.session.commit()
+        return jsonify(payload), status
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
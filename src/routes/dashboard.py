@@ -0,0 +1,124 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from src.models.user import db
+from src.models.period import Period
+from src.models.ovulation import Ovulation, ovulation_dates
+from src.models.cycle_summary import get_summary
+from src.models.prediction_snapshot import snapshot_or_compute
+from src.models.engine import use_read_engine
+from src.utils.cycle_stats import (
+    RECENT_OVULATIONS, cycle_stats_from_summary, ovulation_period_starts, predict_ovulation,
+    predict_period_from_summary
+)
+from src.utils.pagination import PaginationError, page_limit
+from src.utils.prediction_cache import prediction_cache
+from src.utils.identity import current_user_record, get_current_user_id
+
+dashboard_bp = Blueprint('dashboard', __name__)
+dashboard_bp.before_request(use_read_engine)
+
+SECTIONS = ('profile', 'periods', 'ovulations', 'predict_period', 'predict_ovulation', 'cycle_stats')
+DEFAULT_RECENT = 10
+
+
+def _requested_sections(args):
+    value = args.get('sections')
+    if not value:
+        return list(SECTIONS)
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def _select_fields(payload, fields):
+    if fields is None:
+        return payload
+    if isinstance(payload, list):
+        return [_select_fields(item, fields) for item in payload]
+    return {key: value for key, value in payload.items() if key in fields}
+
+
+def _section_fields(args, section):
+    # ?periods.fields=start_date,end_date keeps only those keys of the section
+    value = args.get(f'{section}.fields')
+    if not value:
+        return None
+    return {field.strip() for field in value.split(',') if field.strip()}
+
+
+@dashboard_bp.route('/dashboard', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """Everything the dashboard shows in one response.
+
+    Loaded rows are shared between sections: the summary row feeds the period
+    prediction and the statistics, and the recent ovulations feed both the list and
+    the ovulation prediction, which only adds a covering scan of period start dates.
+    """
+    try:
+        current_user_id = get_current_user_id()
+        sections = _requested_sections(request.args)
+        unknown = [name for name in sections if name not in SECTIONS]
+        if unknown:
+            return jsonify({'error': f'Unknown dashboard section: {", ".join(unknown)}'}), 400
+        limit = page_limit(request.args) if 'limit' in request.args else DEFAULT_RECENT
+        payload = {}
+
+        if 'profile' in sections:
+            user = current_user_record()
+            if not user:
+                return jsonify({'error': 'User not found'}), 404
+            payload['profile'] = user.to_dict()
+
+        if 'periods' in sections:
+            periods = (
+                Period.query.filter_by(user_id=current_user_id)
+                .order_by(Period.start_date.desc(), Period.id.desc())
+                .limit(limit)
+                .all()
+            )
+            payload['periods'] = [period.to_dict() for period in periods]
+
+        ovulations = None
+        if 'ovulations' in sections:
+            ovulations = (
+                Ovulation.query.filter_by(user_id=current_user_id)
+                .order_by(Ovulation.ovulation_date.desc(), Ovulation.id.desc())
+                .limit(max(limit, RECENT_OVULATIONS))
+                .all()
+            )
+            payload['ovulations'] = [ovulation.to_dict() for ovulation in ovulations[:limit]]
+
+        def recent_ovulation_dates():
+            # Oldest first, reusing the list section's rows when they were loaded
+            if ovulations is not None:
+                return [ovulation.ovulation_date for ovulation in reversed(ovulations)]
+            return ovulation_dates(current_user_id, RECENT_OVULATIONS)
+
+        def predict_recent_ovulation():
+            dates = recent_ovulation_dates()
+            return predict_ovulation(ovulation_period_starts(current_user_id, dates), dates)
+
+        if {'predict_period', 'predict_ovulation', 'cycle_stats'} & set(sections):
+            summary = get_summary(current_user_id)
+            cache = prediction_cache()
+            if 'predict_period' in sections:
+                payload['predict_period'], _ = cache.get_or_compute(
+                    'period', summary.user_id, summary.data_version,
+                    lambda: snapshot_or_compute('period', summary, lambda: predict_period_from_summary(summary))
+                )
+            if 'predict_ovulation' in sections:
+                payload['predict_ovulation'], _ = cache.get_or_compute(
+                    'ovulation', summary.user_id, summary.data_version,
+                    lambda: snapshot_or_compute('ovulation', summary, predict_recent_ovulation)
+                )
+            if 'cycle_stats' in sections:
+                payload['cycle_stats'] = cycle_stats_from_summary(summary)
+            db.session.commit()
+
+        for section in sections:
+            payload[section] = _select_fields(payload[section], _section_fields(request.args, section))
+        return jsonify(payload), 200
+
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
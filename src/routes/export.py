@@ -0,0 +1,158 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required
+import csv
+import heapq
+import io
+import json
+import zlib
+from src.models.user import db
+from src.models.period import Period
+from src.models.ovulation import Ovulation
+from src.models.engine import use_read_engine
+from src.utils.identity import get_current_user_id
+
+export_bp = Blueprint('export', __name__)
+export_bp.before_request(use_read_engine)
+
+# Rows fetched per round trip and rows encoded per chunk written to the socket
+FETCH_SIZE = 1000
+CHUNK_ROWS = 200
+
+CSV_COLUMNS = [
+    'type', 'id', 'date', 'end_date', 'flow_intensity', 'basal_body_temperature',
+    'cervical_mucus', 'symptoms', 'created_at', 'updated_at'
+]
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _period_records(user_id):
+    statement = (
+        db.select(
+            Period.id, Period.start_date, Period.end_date, Period.flow_intensity,
+            Period.symptoms, Period.created_at, Period.updated_at
+        )
+        .where(Period.user_id == user_id)
+        .order_by(Period.start_date, Period.id)
+        .execution_options(yield_per=FETCH_SIZE)
+    )
+    for row in db.session.execute(statement):
+        yield (row.start_date, 0, row.id), {
+            'type': 'period',
+            'id': row.id,
+            'date': row.start_date.isoformat(),
+            'end_date': _iso(row.end_date),
+            'flow_intensity': row.flow_intensity,
+            'symptoms': row.symptoms,
+            'created_at': _iso(row.created_at),
+            'updated_at': _iso(row.updated_at)
+        }
+
+
+def _ovulation_records(user_id):
+    statement = (
+        db.select(
+            Ovulation.id, Ovulation.ovulation_date, Ovulation.basal_body_temperature,
+            Ovulation.cervical_mucus, Ovulation.symptoms, Ovulation.created_at, Ovulation.updated_at
+        )
+        .where(Ovulation.user_id == user_id)
+        .order_by(Ovulation.ovulation_date, Ovulation.id)
+        .execution_options(yield_per=FETCH_SIZE)
+    )
+    for row in db.session.execute(statement):
+        yield (row.ovulation_date, 1, row.id), {
+            'type': 'ovulation',
+            'id': row.id,
+            'date': row.ovulation_date.isoformat(),
+            'basal_body_temperature': row.basal_body_temperature,
+            'cervical_mucus': row.cervical_mucus,
+            'symptoms': row.symptoms,
+            'created_at': _iso(row.created_at),
+            'updated_at': _iso(row.updated_at)
+        }
+
+
+def merged_history(user_id):
+    """Periods and ovulations of one user in date order, one row in memory at a time."""
+    merged = heapq.merge(_period_records(user_id), _ovulation_records(user_id), key=lambda item: item[0])
+    for _key, record in merged:
+        yield record
+
+
+def _ndjson_chunks(records):
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, separators=(',', ':')))
+        if len(lines) >= CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _csv_chunks(records):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    # The header goes out before the first row is fetched
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    pending = 0
+    for record in records:
+        writer.writerow(record)
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _encoded(chunks):
+    for chunk in chunks:
+        yield chunk.encode()
+
+
+@export_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_history():
+    try:
+        current_user_id = get_current_user_id()
+        export_format = request.args.get('format', 'ndjson').lower()
+
+        if export_format == 'ndjson':
+            chunks = _ndjson_chunks(merged_history(current_user_id))
+            mimetype, extension = 'application/x-ndjson', 'ndjson'
+        elif export_format == 'csv':
+            chunks = _csv_chunks(merged_history(current_user_id))
+            mimetype, extension = 'text/csv', 'csv'
+        else:
+            return jsonify({'error': 'Unsupported format. Use ndjson or csv'}), 400
+
+        headers = {'Content-Disposition': f'attachment; filename=history.{extension}'}
+        if request.args.get('gzip', '').lower() in ('1', 'true', 'yes'):
+            body = _gzip_chunks(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        else:
+            body = _encoded(chunks)
+
+        # The request context (and its session) stays open until the stream ends
+        return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
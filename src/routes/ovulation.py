@@ -1,18 +1,51 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from datetime import datetime
 from src.models.user import db
-from src.models.ovulation import Ovulation
+from src.models.ovulation import OVULATION_COLUMNS, Ovulation
+from src.models.cycle_summary import ovulation_added, ovulation_removed
+from src.models.symptom import link_inserted_records, record_symptoms, remove_symptoms
+from src.models.sync import next_change_seq, record_tombstone
+from src.models.engine import use_read_engine
+from src.utils.prediction_cache import prediction_cache
+from src.utils.bulk_import import (
+    BulkImportError, bulk_insert, highest_id, is_lenient, ovulation_row, read_records, validate_records
+)
+from src.utils.pagination import (
+    PaginationError, filter_by_date, paginate_by_date, wants_unpaginated
+)
+from src.utils.identity import get_current_user_id
+from src.utils.conditional import conditional_get
+from src.utils.fast_json import json_response, records
 
 ovulation_bp = Blueprint('ovulation', __name__)
+ovulation_bp.before_request(use_read_engine)
 
 @ovulation_bp.route('/ovulation', methods=['GET'])
 @jwt_required()
+@conditional_get()
 def get_ovulations():
     try:
-        current_user_id = get_jwt_identity()
-        ovulations = Ovulation.query.filter_by(user_id=current_user_id).order_by(Ovulation.ovulation_date.desc()).all()
-        return jsonify([ovulation.to_dict() for ovulation in ovulations]), 200
+        current_user_id = get_current_user_id()
+        # Plain row tuples encoded straight to JSON, no Ovulation objects
+        query = db.session.query(*OVULATION_COLUMNS).filter(Ovulation.user_id == current_user_id)
+        query = filter_by_date(query, Ovulation.ovulation_date, request.args)
+
+        if wants_unpaginated(request.args):
+            ovulations = query.order_by(Ovulation.ovulation_date.desc()).all()
+            temperatures = (row.basal_body_temperature for row in ovulations)
+            return json_response(records(ovulations), temperatures), 200
+
+        ovulations, next_cursor = paginate_by_date(
+            query, Ovulation.ovulation_date, Ovulation.id, request.args
+        )
+        temperatures = (row.basal_body_temperature for row in ovulations)
+        return json_response({
+            'items': records(ovulations),
+            'next_cursor': next_cursor
+        }, temperatures), 200
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -20,7 +53,7 @@ def get_ovulations():
 @jwt_required()
 def create_ovulation():
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
         data = request.json
         
         # Validate required fields
@@ -36,11 +69,16 @@ def create_ovulation():
             ovulation_date=ovulation_date,
             basal_body_temperature=data.get('basal_body_temperature'),
             cervical_mucus=data.get('cervical_mucus'),
-            symptoms=data.get('symptoms')
+            symptoms=data.get('symptoms'),
+            change_seq=next_change_seq(current_user_id)
         )
         
         db.session.add(ovulation)
+        db.session.flush()
+        ovulation_added(current_user_id)
+        record_symptoms('ovulation', ovulation)
         db.session.commit()
+        prediction_cache().invalidate_user(current_user_id)
         
         return jsonify({
             'message': 'Ovulation record created successfully',
@@ -52,11 +90,46 @@ def create_ovulation():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@ovulation_bp.route('/ovulation/bulk', methods=['POST'])
+@jwt_required()
+def bulk_create_ovulations():
+    try:
+        current_user_id = get_current_user_id()
+        records = read_records(request)
+        
+        # Validate everything before writing; strict mode rejects the whole batch
+        rows, errors = validate_records(records, ovulation_row, int(current_user_id))
+        if errors and not is_lenient(request.args):
+            return jsonify({'error': 'Invalid records, nothing was imported', 'errors': errors}), 400
+        if not rows:
+            return jsonify({'error': 'No valid records to import', 'errors': errors}), 400
+        
+        change_seq = next_change_seq(current_user_id)
+        for row in rows:
+            row['change_seq'] = change_seq
+        after_id = highest_id(Ovulation)
+        inserted = bulk_insert(Ovulation, rows)
+        ovulation_added(current_user_id, inserted)
+        link_inserted_records(db.session, 'ovulation', current_user_id, after_id)
+        db.session.commit()
+        prediction_cache().invalidate_user(current_user_id)
+        
+        return jsonify({
+            'message': 'Ovulation records imported successfully',
+            'inserted': inserted,
+            'errors': errors
+        }), 201
+        
+    except BulkImportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @ovulation_bp.route('/ovulation/<int:ovulation_id>', methods=['GET'])
 @jwt_required()
 def get_ovulation(ovulation_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
         ovulation = Ovulation.query.filter_by(id=ovulation_id, user_id=current_user_id).first()
         
         if not ovulation:
@@ -70,7 +143,9 @@ def get_ovulation(ovulation_id):
 @jwt_required()
 def update_ovulation(ovulation_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
+        # Take the user's write lock before reading the record, as the period routes do
+        change_seq = next_change_seq(current_user_id)
         ovulation = Ovulation.query.filter_by(id=ovulation_id, user_id=current_user_id).first()
         
         if not ovulation:
@@ -92,7 +167,11 @@ def update_ovulation(ovulation_id):
             ovulation.symptoms = data['symptoms']
         
         ovulation.updated_at = datetime.utcnow()
+        ovulation.change_seq = change_seq
+        if 'symptoms' in data or data.get('ovulation_date'):
+            record_symptoms('ovulation', ovulation)
         db.session.commit()
+        prediction_cache().invalidate_user(current_user_id)
         
         return jsonify({
             'message': 'Ovulation record updated successfully',
@@ -108,14 +187,21 @@ def update_ovulation(ovulation_id):
 @jwt_required()
 def delete_ovulation(ovulation_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
+        # Take the user's write lock before reading the record, as the period routes do
+        next_change_seq(current_user_id)
         ovulation = Ovulation.query.filter_by(id=ovulation_id, user_id=current_user_id).first()
         
         if not ovulation:
             return jsonify({'error': 'Ovulation record not found'}), 404
         
+        record_tombstone('ovulation', ovulation)
         db.session.delete(ovulation)
+        db.session.flush()
+        ovulation_removed(current_user_id)
+        remove_symptoms('ovulation', ovulation.id)
         db.session.commit()
+        prediction_cache().invalidate_user(current_user_id)
         
         return jsonify({'message': 'Ovulation record deleted successfully'}), 200
     except Exception as e:
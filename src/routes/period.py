@@ -1,18 +1,49 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from datetime import datetime
 from src.models.user import db
-from src.models.period import Period
+from src.models.period import PERIOD_COLUMNS, Period
+from src.models.cycle_summary import (
+    period_added, period_changed, period_removed, rebuild_summary, touch_summary
+)
+from src.models.symptom import link_inserted_records, record_symptoms, remove_symptoms
+from src.models.sync import next_change_seq, record_tombstone
+from src.models.engine import use_read_engine
+from src.utils.bulk_import import (
+    BulkImportError, bulk_insert, highest_id, is_lenient, period_row, read_records, validate_records
+)
+from src.utils.prediction_cache import prediction_cache
+from src.utils.pagination import (
+    PaginationError, filter_by_date, paginate_by_date, wants_unpaginated
+)
+from src.utils.identity import get_current_user_id
+from src.utils.conditional import conditional_get
+from src.utils.fast_json import json_response, records
 
 period_bp = Blueprint('period', __name__)
+period_bp.before_request(use_read_engine)
 
 @period_bp.route('/periods', methods=['GET'])
 @jwt_required()
+@conditional_get()
 def get_periods():
     try:
-        current_user_id = get_jwt_identity()
-        periods = Period.query.filter_by(user_id=current_user_id).order_by(Period.start_date.desc()).all()
-        return jsonify([period.to_dict() for period in periods]), 200
+        current_user_id = get_current_user_id()
+        # Plain row tuples encoded straight to JSON, no Period objects
+        query = db.session.query(*PERIOD_COLUMNS).filter(Period.user_id == current_user_id)
+        query = filter_by_date(query, Period.start_date, request.args)
+
+        if wants_unpaginated(request.args):
+            periods = query.order_by(Period.start_date.desc()).all()
+            return json_response(records(periods)), 200
+
+        periods, next_cursor = paginate_by_date(query, Period.start_date, Period.id, request.args)
+        return json_response({
+            'items': records(periods),
+            'next_cursor': next_cursor
+        }), 200
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -20,7 +51,7 @@ def get_periods():
 @jwt_required()
 def create_period():
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
         data = request.json
         
         # Validate required fields
@@ -39,11 +70,16 @@ def create_period():
             start_date=start_date,
             end_date=end_date,
             flow_intensity=data.get('flow_intensity'),
-            symptoms=data.get('symptoms')
+            symptoms=data.get('symptoms'),
+            change_seq=next_change_seq(current_user_id)
         )
         
         db.session.add(period)
+        db.session.flush()
+        period_added(period)
+        record_symptoms('period', period)
         db.session.commit()
+        prediction_cache().invalidate_user(current_user_id)
         
         return jsonify({
             'message': 'Period created successfully',
@@ -55,11 +91,47 @@ def create_period():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@period_bp.route('/periods/bulk', methods=['POST'])
+@jwt_required()
+def bulk_create_periods():
+    try:
+        current_user_id = get_current_user_id()
+        records = read_records(request)
+        
+        # Validate everything before writing; strict mode rejects the whole batch
+        rows, errors = validate_records(records, period_row, int(current_user_id))
+        if errors and not is_lenient(request.args):
+            return jsonify({'error': 'Invalid records, nothing was imported', 'errors': errors}), 400
+        if not rows:
+            return jsonify({'error': 'No valid records to import', 'errors': errors}), 400
+        
+        change_seq = next_change_seq(current_user_id)
+        for row in rows:
+            row['change_seq'] = change_seq
+        after_id = highest_id(Period)
+        inserted = bulk_insert(Period, rows)
+        # One ordered pass is cheaper than splicing thousands of rows in one by one
+        rebuild_summary(current_user_id)
+        link_inserted_records(db.session, 'period', current_user_id, after_id)
+        db.session.commit()
+        prediction_cache().invalidate_user(current_user_id)
+        
+        return jsonify({
+            'message': 'Periods imported successfully',
+            'inserted': inserted,
+            'errors': errors
+        }), 201
+        
+    except BulkImportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @period_bp.route('/periods/<int:period_id>', methods=['GET'])
 @jwt_required()
 def get_period(period_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
         period = Period.query.filter_by(id=period_id, user_id=current_user_id).first()
         
         if not period:
@@ -73,13 +145,18 @@ def get_period(period_id):
 @jwt_required()
 def update_period(period_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
+        # Take the user's write lock first, so the old dates the summary is updated
+        # from cannot be changed by a concurrent request
+        change_seq = next_change_seq(current_user_id)
         period = Period.query.filter_by(id=period_id, user_id=current_user_id).first()
         
         if not period:
             return jsonify({'error': 'Period not found'}), 404
         
         data = request.json
+        old_start_date, old_end_date = period.start_date, period.end_date
+        period.change_seq = change_seq
         
         # Update fields if provided
         if data.get('start_date'):
@@ -97,7 +174,15 @@ def update_period(period_id):
             period.symptoms = data['symptoms']
         
         period.updated_at = datetime.utcnow()
+        db.session.flush()
+        if 'symptoms' in data or period.start_date != old_start_date:
+            record_symptoms('period', period)
+        if (period.start_date, period.end_date) != (old_start_date, old_end_date):
+            period_changed(period, old_start_date, old_end_date)
+        else:
+            touch_summary(current_user_id)
         db.session.commit()
+        prediction_cache().invalidate_user(current_user_id)
         
         return jsonify({
             'message': 'Period updated successfully',
@@ -113,14 +198,21 @@ def update_period(period_id):
 @jwt_required()
 def delete_period(period_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
+        # Lock first, as in update_period
+        next_change_seq(current_user_id)
         period = Period.query.filter_by(id=period_id, user_id=current_user_id).first()
         
         if not period:
             return jsonify({'error': 'Period not found'}), 404
         
+        record_tombstone('period', period)
         db.session.delete(period)
+        db.session.flush()
+        period_removed(period)
+        remove_symptoms('period', period.id)
         db.session.commit()
+        prediction_cache().invalidate_user(current_user_id)
         
         return jsonify({'message': 'Period deleted successfully'}), 200
     except Exception as e:
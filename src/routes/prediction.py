@@ -1,187 +1,151 @@
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
+from functools import partial
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from src.models.user import db
 from src.models.period import Period
-from src.models.ovulation import Ovulation
-import statistics
+from src.models.ovulation import ovulation_dates
+from src.models.cycle_summary import get_summary
+from src.models.prediction_snapshot import snapshot_or_compute
+from src.models.engine import use_read_engine
+from src.utils.cycle_stats import (
+    RECENT_OVULATIONS, cycle_stats_from_summary, ovulation_period_starts, predict_ovulation,
+    predict_period_from_summary
+)
+from src.utils.forecasting import (
+    DEFAULT_ESTIMATOR, ESTIMATORS, MAX_FORECAST_CYCLES, forecast_cycles
+)
+from src.utils.prediction_cache import prediction_cache
+from src.utils.identity import get_current_user_id
+from src.utils.conditional import conditional_get
 
 prediction_bp = Blueprint('prediction', __name__)
+prediction_bp.before_request(use_read_engine)
 
 @prediction_bp.route('/predict/period', methods=['GET'])
 @jwt_required()
+@conditional_get()
 def predict_next_period():
     try:
-        current_user_id = get_jwt_identity()
-        
-        # Get the last 6 periods to calculate average cycle length
-        periods = Period.query.filter_by(user_id=current_user_id).order_by(Period.start_date.desc()).limit(6).all()
-        
-        if len(periods) < 2:
-            return jsonify({
-                'error': 'Not enough data to predict. Need at least 2 period records.',
-                'predicted_date': None,
-                'confidence': 'low'
-            }), 200
-        
-        # Calculate cycle lengths
-        cycle_lengths = []
-        for i in range(len(periods) - 1):
-            current_period = periods[i]
-            previous_period = periods[i + 1]
-            cycle_length = (current_period.start_date - previous_period.start_date).days
-            cycle_lengths.append(cycle_length)
-        
-        # Calculate average cycle length
-        avg_cycle_length = statistics.mean(cycle_lengths)
-        
-        # Get the last period start date
-        last_period = periods[0]
-        
-        # Predict next period date
-        predicted_date = last_period.start_date + timedelta(days=int(avg_cycle_length))
-        
-        # Calculate confidence based on cycle regularity
-        if len(cycle_lengths) >= 3:
-            std_dev = statistics.stdev(cycle_lengths)
-            if std_dev <= 2:
-                confidence = 'high'
-            elif std_dev <= 5:
-                confidence = 'medium'
-            else:
-                confidence = 'low'
-        else:
-            confidence = 'medium'
-        
-        return jsonify({
-            'predicted_date': predicted_date.isoformat(),
-            'average_cycle_length': round(avg_cycle_length, 1),
-            'confidence': confidence,
-            'cycles_analyzed': len(cycle_lengths)
-        }), 200
+        current_user_id = get_current_user_id()
+
+        # The summary keeps the gaps between the last 6 periods up to date; a cache
+        # miss reads the nightly snapshot before computing
+        summary = get_summary(current_user_id)
+        payload, status = prediction_cache().get_or_compute(
+            'period', summary.user_id, summary.data_version,
+            lambda: snapshot_or_compute('period', summary, lambda: predict_period_from_summary(summary))
+        )
+        db.session.commit()
+        return jsonify(payload), status
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @prediction_bp.route('/predict/ovulation', methods=['GET'])
 @jwt_required()
+@conditional_get(daily=True)
 def predict_next_ovulation():
     try:
-        current_user_id = get_jwt_identity()
-        
-        # Get the last period to calculate ovulation
-        last_period = Period.query.filter_by(user_id=current_user_id).order_by(Period.start_date.desc()).first()
-        
-        if not last_period:
-            return jsonify({
-                'error': 'No period data found. Need at least one period record.',
-                'predicted_date': None
-            }), 200
-        
-        # Get historical ovulation data to improve prediction
-        ovulations = Ovulation.query.filter_by(user_id=current_user_id).order_by(Ovulation.ovulation_date.desc()).limit(6).all()
-        periods = Period.query.filter_by(user_id=current_user_id).order_by(Period.start_date.desc()).limit(6).all()
-        
-        # Calculate average days from period start to ovulation
-        ovulation_offsets = []
-        
-        for ovulation in ovulations:
-            # Find the corresponding period for this ovulation
-            for period in periods:
-                if period.start_date <= ovulation.ovulation_date:
-                    offset = (ovulation.ovulation_date - period.start_date).days
-                    if 0 <= offset <= 21:  # Reasonable range for ovulation
-                        ovulation_offsets.append(offset)
-                    break
-        
-        # Use average offset if we have data, otherwise use standard 14 days
-        if ovulation_offsets:
-            avg_offset = statistics.mean(ovulation_offsets)
-            confidence = 'high' if len(ovulation_offsets) >= 3 else 'medium'
-        else:
-            avg_offset = 14  # Standard ovulation day
-            confidence = 'low'
-        
-        # Predict ovulation date based on last period
-        predicted_ovulation = last_period.start_date + timedelta(days=int(avg_offset))
-        
-        # If the predicted date is in the past, predict for next cycle
-        today = datetime.now().date()
-        if predicted_ovulation < today:
-            # Get predicted next period and calculate ovulation from that
-            periods_for_cycle = Period.query.filter_by(user_id=current_user_id).order_by(Period.start_date.desc()).limit(6).all()
-            
-            if len(periods_for_cycle) >= 2:
-                cycle_lengths = []
-                for i in range(len(periods_for_cycle) - 1):
-                    current_period = periods_for_cycle[i]
-                    previous_period = periods_for_cycle[i + 1]
-                    cycle_length = (current_period.start_date - previous_period.start_date).days
-                    cycle_lengths.append(cycle_length)
-                
-                avg_cycle_length = statistics.mean(cycle_lengths)
-                next_period_date = last_period.start_date + timedelta(days=int(avg_cycle_length))
-                predicted_ovulation = next_period_date + timedelta(days=int(avg_offset))
-        
-        return jsonify({
-            'predicted_date': predicted_ovulation.isoformat(),
-            'average_ovulation_day': round(avg_offset, 1),
-            'confidence': confidence,
-            'ovulation_records_analyzed': len(ovulation_offsets)
-        }), 200
-        
+        current_user_id = get_current_user_id()
+
+        # ?history=all uses every ovulation instead of the last 6, ?half_life=N
+        # (in cycles) weights the day of ovulation towards recent cycles
+        full_history = request.args.get('history') == 'all'
+        try:
+            half_life = float(request.args['half_life']) if request.args.get('half_life') else None
+        except ValueError:
+            return jsonify({'error': 'half_life must be a number'}), 400
+        if half_life is not None and half_life <= 0:
+            return jsonify({'error': 'half_life must be positive'}), 400
+        window = None if full_history else RECENT_OVULATIONS
+
+        summary = get_summary(current_user_id)
+        kind = 'ovulation' if window and not half_life else f'ovulation-{window}-{half_life}'
+
+        def compute():
+            # One query per table: the ovulations in the window, then only the period
+            # starts they can align to
+            ovulations = ovulation_dates(summary.user_id, window)
+            return predict_ovulation(
+                ovulation_period_starts(summary.user_id, ovulations, window), ovulations,
+                window=window, half_life=half_life
+            )
+        if kind == 'ovulation':
+            # Only the default prediction is precomputed nightly
+            compute = partial(snapshot_or_compute, 'ovulation', summary, compute)
+        payload, status = prediction_cache().get_or_compute(
+            kind, summary.user_id, summary.data_version, compute
+        )
+        db.session.commit()
+        return jsonify(payload), status
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _forecast(summary, estimator, count):
+    # The whole history in one covering index range scan, oldest first
+    start_dates = [
+        row.start_date for row in
+        db.session.query(Period.start_date)
+        .filter(Period.user_id == summary.user_id)
+        .order_by(Period.start_date)
+    ]
+    period_length = None
+    if summary.period_length_count:
+        period_length = round(summary.period_length_sum / summary.period_length_count)
+
+    forecast = forecast_cycles(start_dates, estimator, count, period_length)
+    if forecast is None:
+        return {
+            'error': 'Not enough data to forecast. Need at least 2 period records.',
+            'cycles': []
+        }, 200
+    return forecast, 200
+
+@prediction_bp.route('/predict/cycles', methods=['GET'])
+@jwt_required()
+@conditional_get()
+def forecast_next_cycles():
+    try:
+        current_user_id = get_current_user_id()
+        estimator_name = request.args.get('estimator', DEFAULT_ESTIMATOR)
+        if estimator_name not in ESTIMATORS:
+            return jsonify({'error': f'estimator must be one of: {", ".join(ESTIMATORS)}'}), 400
+        try:
+            count = int(request.args.get('count', 3))
+        except ValueError:
+            return jsonify({'error': 'count must be an integer'}), 400
+        if not 1 <= count <= MAX_FORECAST_CYCLES:
+            return jsonify({'error': f'count must be between 1 and {MAX_FORECAST_CYCLES}'}), 400
+
+        summary = get_summary(current_user_id)
+        payload, status = prediction_cache().get_or_compute(
+            f'cycles-{estimator_name}-{count}', summary.user_id, summary.data_version,
+            lambda: _forecast(summary, ESTIMATORS[estimator_name], count)
+        )
+        db.session.commit()
+        return jsonify(payload), status
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@prediction_bp.route('/predict/cache-stats', methods=['GET'])
+@jwt_required()
+def get_prediction_cache_stats():
+    return jsonify(prediction_cache().stats()), 200
+
 @prediction_bp.route('/cycle-stats', methods=['GET'])
 @jwt_required()
+@conditional_get()
 def get_cycle_stats():
     try:
-        current_user_id = get_jwt_identity()
-        
-        # Get periods and ovulations
-        periods = Period.query.filter_by(user_id=current_user_id).order_by(Period.start_date.desc()).all()
-        ovulations = Ovulation.query.filter_by(user_id=current_user_id).order_by(Ovulation.ovulation_date.desc()).all()
-        
-        stats = {
-            'total_periods': len(periods),
-            'total_ovulations': len(ovulations),
-            'average_cycle_length': None,
-            'cycle_regularity': None,
-            'average_period_length': None
-        }
-        
-        if len(periods) >= 2:
-            # Calculate cycle lengths
-            cycle_lengths = []
-            for i in range(len(periods) - 1):
-                current_period = periods[i]
-                previous_period = periods[i + 1]
-                cycle_length = (current_period.start_date - previous_period.start_date).days
-                cycle_lengths.append(cycle_length)
-            
-            stats['average_cycle_length'] = round(statistics.mean(cycle_lengths), 1)
-            
-            if len(cycle_lengths) >= 3:
-                std_dev = statistics.stdev(cycle_lengths)
-                if std_dev <= 2:
-                    stats['cycle_regularity'] = 'very regular'
-                elif std_dev <= 5:
-                    stats['cycle_regularity'] = 'regular'
-                else:
-                    stats['cycle_regularity'] = 'irregular'
-        
-        # Calculate average period length
-        period_lengths = []
-        for period in periods:
-            if period.end_date:
-                length = (period.end_date - period.start_date).days + 1
-                period_lengths.append(length)
-        
-        if period_lengths:
-            stats['average_period_length'] = round(statistics.mean(period_lengths), 1)
+        current_user_id = get_current_user_id()
         
+        # Running aggregates over the full history, one primary key lookup
+        summary = get_summary(current_user_id)
+        stats = cycle_stats_from_summary(summary)
+        db.session.commit()
         return jsonify(stats), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
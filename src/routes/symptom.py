@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from src.models.symptom import SOURCES, symptom_stats
+from src.models.engine import use_read_engine
+from src.utils.identity import get_current_user_id
+from src.utils.conditional import conditional_get
+
+symptom_bp = Blueprint('symptom', __name__)
+symptom_bp.before_request(use_read_engine)
+
+@symptom_bp.route('/symptoms/stats', methods=['GET'])
+@jwt_required()
+@conditional_get()
+def get_symptom_stats():
+    try:
+        current_user_id = get_current_user_id()
+        source = request.args.get('source')
+        if source is not None and source not in SOURCES:
+            return jsonify({'error': f'source must be one of: {", ".join(SOURCES)}'}), 400
+
+        symptoms = symptom_stats(current_user_id, source)
+        return jsonify({
+            'symptoms': symptoms,
+            'total_logs': sum(entry['count'] for entry in symptoms)
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
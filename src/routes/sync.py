@@ -0,0 +1,50 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from src.models.sync import changes_since
+from src.models.engine import use_read_engine
+from src.utils.pagination import PaginationError, decode_cursor, encode_cursor
+from src.utils.identity import get_current_user_id
+from src.utils.conditional import conditional_get
+from src.utils.fast_json import json_response, records
+
+sync_bp = Blueprint('sync', __name__)
+sync_bp.before_request(use_read_engine)
+
+
+def _since(args):
+    cursor = args.get('since')
+    if not cursor:
+        return None
+    (version,) = decode_cursor(cursor, 1)
+    if not isinstance(version, int):
+        raise PaginationError('Invalid cursor')
+    return version
+
+
+@sync_bp.route('/sync', methods=['GET'])
+@jwt_required()
+@conditional_get()
+def sync():
+    """Periods and ovulations changed or deleted since ``?since=``, the ``cursor`` of the last sync.
+
+    Without ``since``, or when it is too old to list every deletion, ``reset`` is
+    true and the response holds all of the user's records instead.
+    """
+    try:
+        current_user_id = get_current_user_id()
+        cursor, reset, rows, deleted = changes_since(current_user_id, _since(request.args))
+        temperatures = (row.basal_body_temperature for row in rows['ovulation'])
+        return json_response({
+            'cursor': encode_cursor([cursor]),
+            'reset': reset,
+            'periods': records(rows['period']),
+            'ovulations': records(rows['ovulation']),
+            'deleted': {
+                'periods': deleted['period'],
+                'ovulations': deleted['ovulation']
+            }
+        }, temperatures), 200
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
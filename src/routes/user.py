@@ -1,12 +1,26 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db
+from src.models.purge import purge_users
+from src.utils.identity import invalidate_user_record
+from src.utils.prediction_cache import prediction_cache
+from src.utils.pagination import PaginationError, paginate_by_id, wants_unpaginated
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    if wants_unpaginated(request.args):
+        users = User.query.all()
+        return jsonify([user.to_dict() for user in users])
+
+    try:
+        users, next_cursor = paginate_by_id(User.query, User.id, request.args)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'items': [user.to_dict() for user in users],
+        'next_cursor': next_cursor
+    })
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -28,12 +42,22 @@ def update_user(user_id):
     data = request.json
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
+    # Serialized before the commit expires the user, which would load it again
+    payload = user.to_dict()
     db.session.commit()
-    return jsonify(user.to_dict())
+    invalidate_user_record(user_id)
+    return jsonify(payload)
+
+def _forget_users(user_ids):
+    for user_id in user_ids:
+        invalidate_user_record(user_id)
+        prediction_cache().invalidate_user(user_id)
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    user = User.query.get_or_404(user_id)
-    db.session.delete(user)
+    User.query.get_or_404(user_id)
+    # Set-based deletes, the user's periods and ovulations are never loaded
+    purge_users([user_id])
     db.session.commit()
+    _forget_users([user_id])
     return '', 204
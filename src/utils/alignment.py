@@ -0,0 +1,55 @@
+"""Assign ovulations to the cycles they fall in.
+
+A cycle is identified by the index of its period start in the sorted list of a
+user's period starts; an ovulation belongs to the latest start on or before it.
+Both inputs are sorted oldest first, so a merge join does the whole history in
+O(n + m). When only a few ovulations are aligned against a long history, a
+binary search per ovulation is cheaper and is used instead.
+"""
+import statistics
+from bisect import bisect_right
+from math import log2
+
+# An ovulation further than this from its period start is treated as unmatched
+MAX_OVULATION_OFFSET = 21
+
+
+def cycle_index(period_starts, day):
+    """Index of the latest period start on or before ``day``, or None."""
+    index = bisect_right(period_starts, day) - 1
+    return index if index >= 0 else None
+
+
+def align_ovulations(period_starts, ovulation_dates):
+    """``[(ovulation_date, cycle index or None)]`` for sorted inputs."""
+    if len(ovulation_dates) * log2(len(period_starts) + 2) < len(period_starts):
+        return [(day, cycle_index(period_starts, day)) for day in ovulation_dates]
+
+    aligned, index, last = [], -1, len(period_starts) - 1
+    for day in ovulation_dates:
+        while index < last and period_starts[index + 1] <= day:
+            index += 1
+        aligned.append((day, index if index >= 0 else None))
+    return aligned
+
+
+def ovulation_offsets(period_starts, ovulation_dates, max_offset=MAX_OVULATION_OFFSET):
+    """``[(cycle index, days from period start to ovulation)]`` for plausible pairs."""
+    offsets = []
+    for day, index in align_ovulations(period_starts, ovulation_dates):
+        if index is None:
+            continue
+        offset = (day - period_starts[index]).days
+        if 0 <= offset <= max_offset:
+            offsets.append((index, offset))
+    return offsets
+
+
+def weighted_mean_offset(offsets, latest_cycle, half_life=None):
+    """Mean offset; with ``half_life`` (in cycles) a cycle that many back counts half."""
+    if not offsets:
+        return None
+    if not half_life:
+        return statistics.mean(offset for _index, offset in offsets)
+    weights = [0.5 ** ((latest_cycle - index) / half_life) for index, _offset in offsets]
+    return sum(weight * offset for weight, (_index, offset) in zip(weights, offsets)) / sum(weights)
@@ -0,0 +1,136 @@
+import csv
+import io
+from datetime import date, datetime
+from sqlalchemy import insert
+from src.models.ovulation import Ovulation
+from src.models.period import Period
+from src.models.user import db
+
+MAX_BULK_RECORDS = 50000
+DATE_ERROR = 'Invalid date format. Use YYYY-MM-DD'
+
+
+class BulkImportError(ValueError):
+    pass
+
+
+def read_records(request):
+    """Records from a JSON array (or ``{"records": [...]}``) or a CSV body with a header row."""
+    if request.mimetype == 'text/csv':
+        text = request.get_data(as_text=True)
+        records = [
+            {key: (value if value != '' else None) for key, value in row.items()}
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('records')
+        if not isinstance(data, list):
+            raise BulkImportError('Expected a JSON array of records or a CSV body')
+        records = data
+
+    if not records:
+        raise BulkImportError('No records to import')
+    if len(records) > MAX_BULK_RECORDS:
+        raise BulkImportError(f'At most {MAX_BULK_RECORDS} records per request')
+    return records
+
+
+def is_lenient(args):
+    return args.get('mode', 'strict').lower() == 'lenient'
+
+
+def parse_date(value):
+    # date.fromisoformat is much cheaper than strptime but also accepts other ISO
+    # forms such as 20240105, so pin the shape to YYYY-MM-DD first
+    if not isinstance(value, str) or len(value) != 10 or value[4] != '-' or value[7] != '-':
+        raise ValueError(DATE_ERROR)
+    return date.fromisoformat(value)
+
+
+def _optional_float(value, field):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be a number')
+
+
+def _optional_text(record, column):
+    # SQLite binds neither lists nor dicts and does not enforce VARCHAR lengths, so
+    # check both here and report a row error instead of failing the whole insert
+    value = record.get(column.key)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'{column.key} must be a string')
+    if column.type.length is not None and len(value) > column.type.length:
+        raise ValueError(f'{column.key} must be at most {column.type.length} characters')
+    return value
+
+
+def period_row(record, user_id, now):
+    if not isinstance(record, dict) or not record.get('start_date'):
+        raise ValueError('Start date is required')
+    try:
+        start_date = parse_date(record['start_date'])
+        end_date = parse_date(record['end_date']) if record.get('end_date') else None
+    except ValueError:
+        raise ValueError(DATE_ERROR)
+    return {
+        'user_id': user_id,
+        'start_date': start_date,
+        'end_date': end_date,
+        'flow_intensity': _optional_text(record, Period.__table__.c.flow_intensity),
+        'symptoms': _optional_text(record, Period.__table__.c.symptoms),
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+def ovulation_row(record, user_id, now):
+    if not isinstance(record, dict) or not record.get('ovulation_date'):
+        raise ValueError('Ovulation date is required')
+    try:
+        ovulation_date = parse_date(record['ovulation_date'])
+    except ValueError:
+        raise ValueError(DATE_ERROR)
+    return {
+        'user_id': user_id,
+        'ovulation_date': ovulation_date,
+        'basal_body_temperature': _optional_float(
+            record.get('basal_body_temperature'), 'basal_body_temperature'
+        ),
+        'cervical_mucus': _optional_text(record, Ovulation.__table__.c.cervical_mucus),
+        'symptoms': _optional_text(record, Ovulation.__table__.c.symptoms),
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+def validate_records(records, build_row, user_id):
+    """Return ``(rows, errors)``; every record is validated before anything is written."""
+    now = datetime.utcnow()
+    rows, errors = [], []
+    for index, record in enumerate(records):
+        try:
+            rows.append(build_row(record, user_id, now))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    return rows, errors
+
+
+def highest_id(model):
+    """The largest id in ``model``'s table. Read after next_change_seq has taken the
+    write lock, every row a following ``bulk_insert`` adds has a larger one."""
+    return db.session.query(db.func.max(model.id)).scalar() or 0
+
+
+def bulk_insert(model, rows):
+    # One executemany on the session's transaction instead of an ORM unit of work
+    # per object; the caller commits once
+    if rows:
+        db.session.execute(insert(model), rows)
+    return len(rows)
@@ -0,0 +1,58 @@
+"""Conditional GET for per-user read endpoints.
+
+Every period/ovulation write bumps ``CycleSummary.data_version`` in the same
+transaction, so ``(user, version, URL)`` identifies a response body. ``@conditional_get``
+reads that one column by primary key, answers a matching ``If-None-Match`` with an
+empty 304 before the view runs, and tags fresh 200 responses with the ETag. It never
+writes: a user without a summary is at version 0 until their first write creates
+one at a (time based) non-zero version.
+"""
+import hashlib
+from datetime import date
+from functools import wraps
+from flask import g, jsonify, request
+from src.models.user import db
+from src.models.cycle_summary import CycleSummary
+from src.utils.identity import get_current_user_id
+
+
+def current_data_version():
+    """The authenticated user's data version, one primary key lookup per request."""
+    if 'data_version' not in g:
+        user_id = get_current_user_id()
+        version = (
+            db.session.query(CycleSummary.data_version)
+            .filter(CycleSummary.user_id == user_id)
+            .scalar()
+        )
+        g.data_version = version or 0
+    return g.data_version
+
+
+def make_etag(user_id, version, daily=False):
+    parts = [str(user_id), str(version), request.full_path]
+    if daily:
+        # Predictions move with today's date even when the data does not
+        parts.append(date.today().isoformat())
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()[:32]
+
+
+def conditional_get(daily=False):
+    """Serve 304 Not Modified for unchanged data; apply below ``@jwt_required()``."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                etag = make_etag(get_current_user_id(), current_data_version(), daily)
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+            if request.if_none_match.contains(etag):
+                return '', 304, {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+
+            response, status = view(*args, **kwargs)
+            if status == 200:
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response, status
+        return wrapper
+    return decorator
@@ -0,0 +1,279 @@
+import statistics
+from datetime import date, datetime, timedelta
+from src.models.cycle_summary import RECENT_CYCLE_WINDOW
+from src.models.period import period_start_dates
+from src.utils.alignment import MAX_OVULATION_OFFSET, ovulation_offsets, weighted_mean_offset
+
+# Ovulation records used to estimate the day of ovulation
+RECENT_OVULATIONS = 6
+
+# Calendar predictions: ovulation this many days before the next period, fertile
+# from five days before ovulation to the day after
+LUTEAL_PHASE_DAYS = 14
+FERTILE_DAYS_BEFORE = 5
+FERTILE_DAYS_AFTER = 1
+DEFAULT_PERIOD_LENGTH = 5
+
+
+def _regularity_band(count, total, total_sq):
+    # Exact integer test for stdev <= 2 / <= 5 on a sample of cycle lengths:
+    # sample variance = (n * sum_sq - sum^2) / (n * (n - 1))
+    spread = count * total_sq - total * total
+    scale = count * (count - 1)
+    if spread <= 4 * scale:
+        return 0
+    if spread <= 25 * scale:
+        return 1
+    return 2
+
+
+def _stdev_band(lengths):
+    return _regularity_band(len(lengths), sum(lengths), sum(n * n for n in lengths))
+
+
+REGULARITY_LABELS = ('very regular', 'regular', 'irregular')
+CONFIDENCE_LABELS = ('high', 'medium', 'low')
+
+
+def cycle_stats_from_summary(summary):
+    stats = {
+        'total_periods': summary.period_count,
+        'total_ovulations': summary.ovulation_count,
+        'average_cycle_length': None,
+        'cycle_regularity': None,
+        'average_period_length': None
+    }
+
+    if summary.cycle_count >= 1:
+        stats['average_cycle_length'] = round(summary.cycle_length_sum / summary.cycle_count, 1)
+        if summary.cycle_count >= 3:
+            band = _regularity_band(
+                summary.cycle_count, summary.cycle_length_sum, summary.cycle_length_sum_sq
+            )
+            stats['cycle_regularity'] = REGULARITY_LABELS[band]
+
+    if summary.period_length_count:
+        stats['average_period_length'] = round(
+            summary.period_length_sum / summary.period_length_count, 1
+        )
+    return stats
+
+
+def predict_period_from_summary(summary):
+    """Return ``(payload, status)`` for /predict/period from the recent cycle window."""
+    cycle_lengths = summary.recent_cycle_lengths
+    if not cycle_lengths:
+        return {
+            'error': 'Not enough data to predict. Need at least 2 period records.',
+            'predicted_date': None,
+            'confidence': 'low'
+        }, 200
+
+    avg_cycle_length = statistics.mean(cycle_lengths)
+    predicted_date = summary.last_start_date + timedelta(days=int(avg_cycle_length))
+
+    # Calculate confidence based on cycle regularity
+    if len(cycle_lengths) >= 3:
+        confidence = CONFIDENCE_LABELS[_stdev_band(cycle_lengths)]
+    else:
+        confidence = 'medium'
+
+    return {
+        'predicted_date': predicted_date.isoformat(),
+        'average_cycle_length': round(avg_cycle_length, 1),
+        'confidence': confidence,
+        'cycles_analyzed': len(cycle_lengths)
+    }, 200
+
+
+def predict_ovulation(period_starts, ovulation_dates, today=None, window=RECENT_OVULATIONS, half_life=None):
+    """Return ``(payload, status)`` for /predict/ovulation.
+
+    ``period_starts`` and ``ovulation_dates`` are sorted oldest first. The average
+    day of ovulation comes from the last ``window`` ovulations (all of them when
+    ``window`` is None), optionally weighted towards recent cycles by ``half_life``.
+    """
+    if not period_starts:
+        return {
+            'error': 'No period data found. Need at least one period record.',
+            'predicted_date': None
+        }, 200
+
+    if window is not None:
+        ovulation_dates = ovulation_dates[-window:] if window else []
+    # Calculate average days from period start to ovulation
+    offsets = ovulation_offsets(period_starts, ovulation_dates)
+    avg_offset = weighted_mean_offset(offsets, len(period_starts) - 1, half_life)
+
+    # Use average offset if we have data, otherwise use standard 14 days
+    if offsets:
+        confidence = 'high' if len(offsets) >= 3 else 'medium'
+    else:
+        avg_offset = 14  # Standard ovulation day
+        confidence = 'low'
+
+    # Predict ovulation date based on last period
+    last_start = period_starts[-1]
+    predicted_ovulation = last_start + timedelta(days=int(avg_offset))
+
+    # If the predicted date is in the past, predict for next cycle
+    today = today or datetime.now().date()
+    recent_starts = period_starts[-(RECENT_CYCLE_WINDOW + 1):]
+    if predicted_ovulation < today and len(recent_starts) > 1:
+        # Get predicted next period and calculate ovulation from that
+        avg_cycle_length = statistics.mean(
+            (later - earlier).days for earlier, later in zip(recent_starts, recent_starts[1:])
+        )
+        next_period_date = last_start + timedelta(days=int(avg_cycle_length))
+        predicted_ovulation = next_period_date + timedelta(days=int(avg_offset))
+
+    return {
+        'predicted_date': predicted_ovulation.isoformat(),
+        'average_ovulation_day': round(avg_offset, 1),
+        'confidence': confidence,
+        'ovulation_records_analyzed': len(offsets)
+    }, 200
+
+
+def ovulation_period_starts(user_id, ovulation_dates, window=RECENT_OVULATIONS):
+    """The period starts ``predict_ovulation`` needs for these sorted ovulations.
+
+    Those the windowed ovulations can align to (a start further back is beyond
+    ``MAX_OVULATION_OFFSET``) and the recent ones behind the next-cycle estimate.
+    Cycle indexes shift with the cut, but only their differences are used.
+    """
+    if window is not None:
+        ovulation_dates = ovulation_dates[-window:] if window else []
+    since = ovulation_dates[0] - timedelta(days=MAX_OVULATION_OFFSET) if ovulation_dates else date.max
+    return period_start_dates(user_id, since, keep_latest=RECENT_CYCLE_WINDOW + 1)
+
+
+def calendar_from_summary(summary, first_day, last_day, periods, ovulation_dates):
+    """Per-day flags for ``first_day``..``last_day``.
+
+    ``periods`` are the ``(start_date, end_date)`` of logged periods overlapping the
+    range and ``ovulation_dates`` the logged ovulations in it. Predicted periods and
+    fertile windows repeat the recent average cycle from the last logged start.
+    """
+    days = {}
+
+    def mark(start, end, flag):
+        # Clip the span to the range and flag every day of it
+        day = max(start, first_day)
+        while day <= min(end, last_day):
+            days.setdefault(day, set()).add(flag)
+            day += timedelta(days=1)
+
+    for start_date, end_date in periods:
+        mark(start_date, end_date or start_date, 'period')
+    for ovulation_date in ovulation_dates:
+        mark(ovulation_date, ovulation_date, 'ovulation')
+
+    cycle_lengths = summary.recent_cycle_lengths
+    average_cycle_length = None
+    if cycle_lengths and summary.last_start_date:
+        average_cycle_length = int(statistics.mean(cycle_lengths))
+        period_length = DEFAULT_PERIOD_LENGTH
+        if summary.period_length_count:
+            period_length = round(summary.period_length_sum / summary.period_length_count)
+
+        # Only the predicted cycles that can reach into the range
+        step = timedelta(days=max(average_cycle_length, 1))
+        cycle = max(1, (first_day - summary.last_start_date).days // step.days)
+        next_start = summary.last_start_date + step * cycle
+        while next_start - timedelta(days=LUTEAL_PHASE_DAYS + FERTILE_DAYS_BEFORE) <= last_day:
+            ovulation = next_start - timedelta(days=LUTEAL_PHASE_DAYS)
+            mark(ovulation - timedelta(days=FERTILE_DAYS_BEFORE),
+                 ovulation + timedelta(days=FERTILE_DAYS_AFTER), 'fertile_window')
+            mark(ovulation, ovulation, 'predicted_ovulation')
+            mark(next_start, next_start + timedelta(days=period_length - 1), 'predicted_period')
+            next_start += step
+
+    flags = ('period', 'ovulation', 'predicted_period', 'fertile_window', 'predicted_ovulation')
+    grid = []
+    day = first_day
+    while day <= last_day:
+        marked = days.get(day, ())
+        entry = {'date': day.isoformat()}
+        entry.update((flag, flag in marked) for flag in flags)
+        grid.append(entry)
+        day += timedelta(days=1)
+
+    return {
+        'month': first_day.strftime('%Y-%m'),
+        'days': grid,
+        'average_cycle_length': average_cycle_length
+    }
+
+
+def cycle_stats_from_rows(periods, ovulation_count):
+    """Reference implementation over full history, used to verify the summaries.
+
+    ``periods`` must be ordered by start date, newest first.
+    """
+    stats = {
+        'total_periods': len(periods),
+        'total_ovulations': ovulation_count,
+        'average_cycle_length': None,
+        'cycle_regularity': None,
+        'average_period_length': None
+    }
+
+    if len(periods) >= 2:
+        cycle_lengths = [
+            (periods[i].start_date - periods[i + 1].start_date).days
+            for i in range(len(periods) - 1)
+        ]
+        stats['average_cycle_length'] = round(statistics.mean(cycle_lengths), 1)
+
+        if len(cycle_lengths) >= 3:
+            std_dev = statistics.stdev(cycle_lengths)
+            if std_dev <= 2:
+                stats['cycle_regularity'] = 'very regular'
+            elif std_dev <= 5:
+                stats['cycle_regularity'] = 'regular'
+            else:
+                stats['cycle_regularity'] = 'irregular'
+
+    period_lengths = [
+        (period.end_date - period.start_date).days + 1
+        for period in periods if period.end_date
+    ]
+    if period_lengths:
+        stats['average_period_length'] = round(statistics.mean(period_lengths), 1)
+    return stats
+
+
+def predict_period_from_rows(periods):
+    """Reference implementation over the last 6 periods, newest first."""
+    if len(periods) < 2:
+        return {
+            'error': 'Not enough data to predict. Need at least 2 period records.',
+            'predicted_date': None,
+            'confidence': 'low'
+        }, 200
+
+    cycle_lengths = [
+        (periods[i].start_date - periods[i + 1].start_date).days
+        for i in range(len(periods) - 1)
+    ]
+    avg_cycle_length = statistics.mean(cycle_lengths)
+    predicted_date = periods[0].start_date + timedelta(days=int(avg_cycle_length))
+
+    if len(cycle_lengths) >= 3:
+        std_dev = statistics.stdev(cycle_lengths)
+        if std_dev <= 2:
+            confidence = 'high'
+        elif std_dev <= 5:
+            confidence = 'medium'
+        else:
+            confidence = 'low'
+    else:
+        confidence = 'medium'
+
+    return {
+        'predicted_date': predicted_date.isoformat(),
+        'average_cycle_length': round(avg_cycle_length, 1),
+        'confidence': confidence,
+        'cycles_analyzed': len(cycle_lengths)
+    }, 200
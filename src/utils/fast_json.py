@@ -0,0 +1,63 @@
+"""JSON responses for projected rows without building ORM objects.
+
+``records(rows)`` turns Core/column-query rows into dicts that still hold raw
+``date``/``datetime`` values, and ``json_response`` encodes them to exactly the
+bytes ``jsonify`` produces for the equivalent ``to_dict()`` output. orjson is used
+when it is installed and its output is provably identical; otherwise, and for the
+rare payloads where the encoders differ (non-ASCII or DEL characters, floats
+printed with an exponent, NaN), the app's own JSON provider does the work.
+"""
+import math
+from datetime import date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from flask import current_app
+
+
+def records(rows):
+    return [dict(zip(row._fields, row)) for row in rows]
+
+
+def _plain_float(value):
+    # Both encoders print the shortest round-trip repr; they only differ in the
+    # exponent notation Python switches to outside [1e-4, 1e16), and for NaN/inf
+    return value is None or value == 0 or (math.isfinite(value) and 1e-4 <= abs(value) < 1e16)
+
+
+def _compact(app):
+    # Same rule as flask's DefaultJSONProvider.response
+    return app.json.compact if app.json.compact is not None else not app.debug
+
+
+def _isoformat_dates(provider):
+    def default(value):
+        if isinstance(value, date):
+            return value.isoformat()
+        return provider.default(value)
+    return default
+
+
+def json_response(payload, float_values=()):
+    """``jsonify(payload)`` with dates rendered by ``isoformat()``, byte for byte.
+
+    ``float_values`` must yield every float in the payload so the fast encoder is
+    only used when it prints them the way the stdlib does.
+    """
+    app = current_app._get_current_object()
+    provider = app.json
+    if (orjson is not None and _compact(app) and provider.sort_keys and provider.ensure_ascii
+            and all(map(_plain_float, float_values))):
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+        # ensure_ascii escapes everything outside ' '..'~', orjson leaves DEL as is
+        if body.isascii() and b'\x7f' not in body:
+            return app.response_class(body, mimetype=provider.mimetype)
+
+    if _compact(app):
+        dump_args = {'separators': (',', ':')}
+    else:
+        dump_args = {'indent': 2}
+    body = provider.dumps(payload, default=_isoformat_dates(provider), **dump_args)
+    return app.response_class(f'{body}\n', mimetype=provider.mimetype)
@@ -0,0 +1,199 @@
+"""Multi-cycle forecasts from a user's full history of cycle lengths.
+
+An estimator turns the cycle lengths, oldest first, into its running one-step-ahead
+forecast: ``fit(lengths)[i]`` is the forecast of ``lengths[i + 1]`` made from
+``lengths[:i + 1]``. One fit therefore serves both the forecast (the last value)
+and a backtest over the whole history (every other value against the next actual
+length). Every fit and backtest is a handful of NumPy array operations.
+
+New estimators subclass ``Estimator`` and are added with ``register_estimator``.
+"""
+import math
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
+import numpy as np
+
+DEFAULT_ESTIMATOR = 'wma'
+MAX_FORECAST_CYCLES = 12
+# Backtest errors start once the estimator has seen this many cycles
+MIN_HISTORY = 2
+# Spread of the interval: RMSE of the most recent one-step errors, ~80% coverage
+RESIDUAL_WINDOW = 12
+INTERVAL_Z = 1.2816
+DEFAULT_SPREAD_DAYS = 3.0
+MIN_SPREAD_DAYS = 1.0
+LUTEAL_PHASE_DAYS = 14
+DEFAULT_PERIOD_LENGTH = 5
+
+
+class Estimator(ABC):
+    name = None
+
+    def fit(self, lengths):
+        """Running forecasts as a float array."""
+        lengths = np.asarray(lengths, dtype=float)
+        if not lengths.size:
+            return np.empty(0)
+        return self._fit_array(lengths)
+
+    @abstractmethod
+    def _fit_array(self, lengths):
+        """Running forecasts of a non-empty float array of cycle lengths."""
+
+
+class RecentMean(Estimator):
+    """Plain mean of the last ``window`` cycles, what /predict/period uses."""
+    name = 'mean'
+
+    def __init__(self, window=5):
+        self.window = window
+
+    def _fit_array(self, lengths):
+        index = np.arange(lengths.size)
+        totals = np.concatenate(([0.0], np.cumsum(lengths)))
+        first = np.maximum(0, index + 1 - self.window)
+        return (totals[index + 1] - totals[first]) / (index + 1 - first)
+
+
+class WeightedMovingAverage(Estimator):
+    """Linearly weighted mean of the last ``window`` cycles, newest weighs most."""
+    name = 'wma'
+
+    def __init__(self, window=6):
+        self.window = window
+
+    def _fit_array(self, lengths):
+        # sum((j - first + 1) * x_j) over the window from two prefix sums
+        index = np.arange(lengths.size)
+        totals = np.concatenate(([0.0], np.cumsum(lengths)))
+        moments = np.concatenate(([0.0], np.cumsum(index * lengths)))
+        first = np.maximum(0, index + 1 - self.window)
+        count = index + 1 - first
+        weighted = (moments[index + 1] - moments[first]) - (first - 1) * (totals[index + 1] - totals[first])
+        return weighted / (count * (count + 1) / 2)
+
+
+class ExponentialSmoothing(Estimator):
+    """Simple exponential smoothing, weights normalized over the cycles seen so far."""
+    name = 'exp'
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        # Older cycles weigh less than 1e-12 and are left out of the convolution
+        self.horizon = max(1, math.ceil(math.log(1e-12) / math.log(1 - alpha)))
+
+    def _fit_array(self, lengths):
+        weights = (1 - self.alpha) ** np.arange(self.horizon)
+        smoothed = np.convolve(lengths, weights)[:lengths.size]
+        norms = np.cumsum(weights)[np.minimum(np.arange(lengths.size), self.horizon - 1)]
+        return smoothed / norms
+
+
+class RobustMedian(Estimator):
+    """Median of the last ``window`` cycles; one skipped log barely moves it."""
+    name = 'median'
+
+    def __init__(self, window=7):
+        self.window = window
+
+    def _fit_array(self, lengths):
+        # The first window - 1 prefixes are short: pad them with NaN, which sorts
+        # last, and take the middle of the values each window does hold
+        padded = np.concatenate((np.full(self.window - 1, np.nan), lengths))
+        windows = np.sort(np.lib.stride_tricks.sliding_window_view(padded, self.window), axis=1)
+        count = np.minimum(np.arange(1, lengths.size + 1), self.window)
+        rows = np.arange(lengths.size)
+        return (windows[rows, (count - 1) // 2] + windows[rows, count // 2]) / 2
+
+
+ESTIMATORS = {}
+
+
+def register_estimator(estimator):
+    ESTIMATORS[estimator.name] = estimator
+    return estimator
+
+
+for _estimator in (RecentMean(), WeightedMovingAverage(), ExponentialSmoothing(), RobustMedian()):
+    register_estimator(_estimator)
+
+
+def cycle_lengths(start_dates):
+    """Days between consecutive period starts; ``start_dates`` oldest first."""
+    return [(later - earlier).days for earlier, later in zip(start_dates, start_dates[1:])]
+
+
+def backtest_errors(lengths, forecasts):
+    """Actual minus forecast for every cycle after the first ``MIN_HISTORY``."""
+    if len(lengths) <= MIN_HISTORY:
+        return np.empty(0)
+    return np.asarray(lengths[MIN_HISTORY:], dtype=float) - forecasts[MIN_HISTORY - 1:-1]
+
+
+def backtest_summary(errors):
+    if len(errors) == 0:
+        return {'cycles': 0, 'mae': None, 'rmse': None, 'bias': None, 'within_2_days': None}
+    absolute = np.abs(errors)
+    return {
+        'cycles': int(errors.size),
+        'mae': float(absolute.mean()),
+        'rmse': float(np.sqrt(np.mean(errors * errors))),
+        'bias': float(errors.mean()),
+        'within_2_days': float(np.mean(absolute <= 2))
+    }
+
+
+def backtest(lengths, estimator):
+    return backtest_summary(backtest_errors(lengths, estimator.fit(lengths)))
+
+
+def _spread(errors):
+    recent = errors[-RESIDUAL_WINDOW:]
+    if len(recent) < 3:
+        return DEFAULT_SPREAD_DAYS
+    return max(MIN_SPREAD_DAYS, math.sqrt(sum(float(error) ** 2 for error in recent) / len(recent)))
+
+
+def forecast_cycles(start_dates, estimator, count, period_length=None):
+    """The next ``count`` cycles after the last of ``start_dates`` (oldest first).
+
+    Returns None without at least two periods to measure a cycle from.
+    """
+    lengths = cycle_lengths(start_dates)
+    if not lengths:
+        return None
+
+    forecasts = estimator.fit(lengths)
+    errors = backtest_errors(lengths, forecasts)
+    cycle_length = float(forecasts[-1])
+    spread = _spread(errors)
+    period_length = period_length or DEFAULT_PERIOD_LENGTH
+
+    cycles = []
+    for cycle in range(1, count + 1):
+        start = start_dates[-1] + timedelta(days=round(cycle * cycle_length))
+        ovulation = start + timedelta(days=round(cycle_length) - LUTEAL_PHASE_DAYS)
+        # Errors of independent cycles add up, so the interval widens with sqrt(n)
+        margin = timedelta(days=round(INTERVAL_Z * spread * math.sqrt(cycle)))
+        cycles.append({
+            'cycle': cycle,
+            'period_start': start.isoformat(),
+            'period_end': (start + timedelta(days=period_length - 1)).isoformat(),
+            'period_start_range': [(start - margin).isoformat(), (start + margin).isoformat()],
+            'ovulation_date': ovulation.isoformat(),
+            'ovulation_range': [(ovulation - margin).isoformat(), (ovulation + margin).isoformat()]
+        })
+
+    summary = backtest_summary(errors)
+    return {
+        'estimator': estimator.name,
+        'cycle_length': round(cycle_length, 1),
+        'spread_days': round(spread, 1),
+        'cycles_analyzed': len(lengths),
+        'backtest': {
+            key: round(value, 2) if isinstance(value, float) else value
+            for key, value in summary.items()
+        },
+        'cycles': cycles
+    }
@@ -0,0 +1,94 @@
+"""Resolve the JWT identity to a user once per request.
+
+Tokens carry the user id as a string subject. ``get_current_user_id()`` turns it
+into an int once per request, and ``current_user_record()`` resolves it through a
+small per-worker LRU+TTL cache of ``UserRecord`` tuples. A cache hit costs no query.
+``update_user`` / ``delete_user`` invalidate the entry in their worker, and the TTL
+bounds how long other workers can serve a stale record. Every ``@jwt_required()``
+request resolves its user this way, so tokens of deleted users get a 401.
+"""
+import time
+from collections import namedtuple
+from flask import current_app, g
+from flask_jwt_extended import get_jwt_identity
+from src.models.user import User, db
+from src.models.sharding import select_user_shard
+from src.utils.prediction_cache import MemoryBackend
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_TTL = 60
+
+
+class UserRecord(namedtuple('UserRecord', 'id username email created_at')):
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class UserLookupCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.backend = MemoryBackend(max_entries)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        record = self.backend.get(user_id, now)
+        if record is not None:
+            self.hits += 1
+            return record
+
+        self.misses += 1
+        row = (
+            db.session.query(User.id, User.username, User.email, User.created_at)
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        record = UserRecord(*row)
+        self.backend.set(user_id, record, now + self.ttl)
+        return record
+
+    def invalidate(self, user_id):
+        self.backend.delete(int(user_id))
+
+
+def get_current_user_id():
+    """The authenticated user's id as an int; requires ``@jwt_required()``.
+
+    Also selects the user's shard when sharding is on, see src/models/sharding.py.
+    """
+    if 'current_user_id' not in g:
+        g.current_user_id = int(get_jwt_identity())
+        select_user_shard(g.current_user_id)
+    return g.current_user_id
+
+
+def current_user_record():
+    """The authenticated user as a ``UserRecord``, or None if the user no longer exists."""
+    return current_app.extensions['user_cache'].get(get_current_user_id())
+
+
+def invalidate_user_record(user_id):
+    current_app.extensions['user_cache'].invalidate(user_id)
+
+
+def init_identity(app, jwt):
+    cache = app.extensions['user_cache'] = UserLookupCache(
+        app.config.get('USER_CACHE_SIZE', DEFAULT_MAX_ENTRIES),
+        app.config.get('USER_CACHE_TTL', DEFAULT_TTL)
+    )
+
+    # Tokens outlive deleted users: flask-jwt-extended answers a JSON 401 when this
+    # returns None, before any view can read or write data for the old id
+    @jwt.user_lookup_loader
+    def _load_user(_jwt_header, jwt_data):
+        return cache.get(int(jwt_data['sub']))
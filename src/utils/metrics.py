@@ -0,0 +1,207 @@
+"""Per-request latency, SQL and response-size metrics in Prometheus text format.
+
+Counters live in the process, so under gunicorn every worker reports its own
+series; scrape each worker or aggregate downstream.
+"""
+import bisect
+import logging
+import threading
+import time
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+MAX_LOGGED_STATEMENTS = 50
+
+slow_request_logger = logging.getLogger('src.slow_requests')
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}       # (endpoint, method) -> Histogram
+        self.queries = {}       # (endpoint, method) -> Histogram of statements per request
+        self.sql_seconds = {}   # (endpoint, method) -> total SQL time
+        self.requests = {}      # (endpoint, method, status) -> count
+        self.response_bytes = {}  # (endpoint, method) -> [total bytes, responses]
+
+    def record(self, endpoint, method, status, seconds, query_count, sql_seconds, size):
+        key = (endpoint, method)
+        with self._lock:
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self.sql_seconds[key] = 0.0
+                self.response_bytes[key] = [0, 0]
+            self.latency[key].observe(seconds)
+            self.queries[key].observe(query_count)
+            self.sql_seconds[key] += sql_seconds
+            if size is not None:
+                self.response_bytes[key][0] += size
+                self.response_bytes[key][1] += 1
+            status_key = (endpoint, method, status)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+
+    def render(self, extra_lines=()):
+        with self._lock:
+            lines = []
+            _histogram(lines, 'http_request_duration_seconds', 'Request latency.', self.latency)
+            _histogram(lines, 'http_request_sql_queries', 'SQL statements per request.', self.queries)
+
+            lines.append('# HELP http_request_sql_seconds_total Time spent in SQL.')
+            lines.append('# TYPE http_request_sql_seconds_total counter')
+            for (endpoint, method), seconds in sorted(self.sql_seconds.items()):
+                lines.append(f'http_request_sql_seconds_total{_labels(endpoint=endpoint, method=method)} {seconds:.6f}')
+
+            lines.append('# HELP http_requests_total Requests by status.')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+            lines.append('# HELP http_response_size_bytes Response body size.')
+            lines.append('# TYPE http_response_size_bytes summary')
+            for (endpoint, method), (total, count) in sorted(self.response_bytes.items()):
+                labels = _labels(endpoint=endpoint, method=method)
+                lines.append(f'http_response_size_bytes_sum{labels} {total}')
+                lines.append(f'http_response_size_bytes_count{labels} {count}')
+
+            lines.extend(extra_lines)
+            return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _histogram(lines, name, help_text, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (endpoint, method), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le=bound)} {cumulative}')
+        lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le="+Inf")} {histogram.count}')
+        labels = _labels(endpoint=endpoint, method=method)
+        lines.append(f'{name}_sum{labels} {histogram.total:.6f}')
+        lines.append(f'{name}_count{labels} {histogram.count}')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'request_metrics' in g:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    if started is None or not has_request_context() or 'request_metrics' not in g:
+        return
+    elapsed = time.perf_counter() - started
+    stats = g.request_metrics
+    stats['queries'] += 1
+    stats['sql_seconds'] += elapsed
+    if stats['statements'] is not None and len(stats['statements']) < MAX_LOGGED_STATEMENTS:
+        stats['statements'].append((elapsed, ' '.join(statement.split())))
+
+
+def _start_request():
+    g.request_metrics = {
+        'started': time.perf_counter(),
+        'queries': 0,
+        'sql_seconds': 0.0,
+        # Only keep statement text when a slow-request log is configured
+        'statements': [] if current_app.config.get('SLOW_REQUEST_MS') else None
+    }
+
+
+def _finish_request(response):
+    stats = g.pop('request_metrics', None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats['started']
+    endpoint = request.endpoint or 'unmatched'
+    size = None if response.is_streamed else response.calculate_content_length()
+
+    current_app.extensions['metrics'].record(
+        endpoint, request.method, response.status_code, elapsed,
+        stats['queries'], stats['sql_seconds'], size
+    )
+
+    threshold = current_app.config.get('SLOW_REQUEST_MS')
+    if threshold and elapsed * 1000 >= threshold:
+        statements = '\n'.join(
+            f'  {seconds * 1000:.2f} ms  {statement}' for seconds, statement in stats['statements']
+        )
+        slow_request_logger.warning(
+            'Slow request %s %s -> %s in %.1f ms (%d queries, %.1f ms SQL)\n%s',
+            request.method, request.path, response.status_code, elapsed * 1000,
+            stats['queries'], stats['sql_seconds'] * 1000, statements
+        )
+    return response
+
+
+def _prediction_cache_lines():
+    cache = current_app.extensions.get('prediction_cache')
+    if cache is None:
+        return []
+    stats = cache.stats()
+    lines = []
+    for name in ('hits', 'misses', 'evictions'):
+        lines.append(f'# TYPE prediction_cache_{name}_total counter')
+        lines.append(f'prediction_cache_{name}_total {stats[name]}')
+    lines.append('# TYPE prediction_cache_entries gauge')
+    lines.append(f'prediction_cache_entries {stats["entries"]}')
+    return lines
+
+
+def _startup_lines():
+    startup = current_app.extensions.get('startup')
+    if not startup:
+        return []
+    lines = ['# HELP app_startup_seconds Time this worker spent importing and building the app.',
+             '# TYPE app_startup_seconds gauge']
+    for phase, seconds in startup.items():
+        lines.append(f'app_startup_seconds{_labels(phase=phase)} {seconds:.6f}')
+    return lines
+
+
+def metrics_view():
+    registry = current_app.extensions['metrics']
+    return Response(
+        registry.render(_prediction_cache_lines() + _startup_lines()),
+        mimetype='text/plain; version=0.0.4'
+    )
+
+
+def init_metrics(app, db):
+    """Install request hooks, SQL timing events on every engine and the /metrics route."""
+    app.extensions['metrics'] = MetricsRegistry()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
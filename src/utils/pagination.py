@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import date
+from flask import current_app
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError('Invalid cursor')
+    return values
+
+
+def wants_unpaginated(args):
+    """Legacy clients can still ask for the whole list with ?all=true."""
+    return (
+        args.get('all', '').lower() in ('1', 'true', 'yes')
+        and current_app.config.get('ALLOW_UNPAGINATED_LISTS', True)
+    )
+
+
+def _date_arg(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise PaginationError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def filter_by_date(query, date_column, args):
+    """Apply inclusive ?from= / ?to= bounds, a range seek on the ``(user_id, date)`` index."""
+    start, end = _date_arg(args, 'from'), _date_arg(args, 'to')
+    if start and end and start > end:
+        raise PaginationError('from must not be after to')
+    if start:
+        query = query.filter(date_column >= start)
+    if end:
+        query = query.filter(date_column <= end)
+    return query
+
+
+def page_limit(args):
+    value = args.get('limit')
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def paginate_by_date(query, date_column, id_column, args):
+    """Keyset page over ``(date, id)`` newest first.
+
+    The cursor holds the last ``(date, id)`` returned, so every page is one index
+    range seek on ``(user_id, date)`` no matter how deep the client has paged.
+    """
+    limit = page_limit(args)
+    cursor = args.get('cursor')
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, 2)
+        try:
+            last_date = date.fromisoformat(last_date)
+            last_id = int(last_id)
+        except (TypeError, ValueError):
+            raise PaginationError('Invalid cursor')
+        query = query.filter(tuple_(date_column, id_column) < (last_date, last_id))
+
+    rows = query.order_by(date_column.desc(), id_column.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, date_column.key).isoformat(), last.id])
+    return rows, next_cursor
+
+
+def paginate_by_id(query, id_column, args):
+    """Keyset page over the primary key, oldest first."""
+    limit = page_limit(args)
+    cursor = args.get('cursor')
+    if cursor:
+        (last_id,) = decode_cursor(cursor, 1)
+        if not isinstance(last_id, int):
+            raise PaginationError('Invalid cursor')
+        query = query.filter(id_column > last_id)
+
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].id])
+    return rows, next_cursor
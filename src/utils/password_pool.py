@@ -0,0 +1,139 @@
+"""Password hashing and verification on a bounded process pool.
+
+werkzeug's hashes are deliberately expensive. Running them inline lets a burst of
+logins pin every request thread. Here they run in a small per-worker process
+pool at a lower CPU priority instead, and once ``PASSWORD_HASH_QUEUE`` hashes are
+pending, new ones fail fast with ``HashingOverloaded`` so the request can be
+answered with a 503 rather than queueing behind the storm.
+
+Config: ``PASSWORD_HASH_METHOD`` (werkzeug method string, e.g. ``scrypt:32768:8:1``
+or ``pbkdf2:sha256:600000``), ``PASSWORD_HASH_WORKERS`` (0 hashes inline) and
+``PASSWORD_HASH_QUEUE``.
+"""
+import atexit
+import multiprocessing.util
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt'
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE = 16
+QUEUE_WAIT_SECONDS = 0.05
+
+
+class HashingOverloaded(RuntimeError):
+    pass
+
+
+_lock = threading.Lock()
+_state = {'pid': None, 'executor': None, 'slots': None, 'workers': None, 'queue': None}
+_method_prefixes = {}
+
+
+def _config(name, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def _lower_priority():
+    # Hashing yields the CPU to request handling whenever both want it
+    try:
+        os.nice(10)
+    except OSError:
+        pass
+
+
+def _executor():
+    workers = _config('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS)
+    queue = _config('PASSWORD_HASH_QUEUE', DEFAULT_QUEUE)
+    if workers <= 0:
+        return None, None
+    with _lock:
+        # A pool inherited over fork() is unusable, every process builds its own
+        if _state['pid'] != os.getpid() or _state['workers'] != workers or _state['queue'] != queue:
+            previous = _state['executor'] if _state['pid'] == os.getpid() else None
+            _state.update(
+                pid=os.getpid(),
+                executor=None,
+                slots=threading.BoundedSemaphore(workers + queue),
+                workers=workers,
+                queue=queue
+            )
+            if previous is not None:
+                # Hashes already submitted still finish, then its workers exit
+                previous.shutdown(wait=False)
+        if _state['executor'] is None:
+            _state['executor'] = ProcessPoolExecutor(max_workers=workers, initializer=_lower_priority)
+        return _state['executor'], _state['slots']
+
+
+def _discard(executor):
+    with _lock:
+        if _state['executor'] is executor:
+            _state['executor'] = None
+    executor.shutdown(wait=False)
+
+
+def shutdown_pool():
+    """Stop this process's pool and its workers; the next hash starts a new one."""
+    with _lock:
+        executor = _state['executor'] if _state['pid'] == os.getpid() else None
+        _state['executor'] = None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+# multiprocessing children skip atexit and join their own child processes before
+# exiting, which would wait forever on the idle pool workers. Finalizers with an
+# exit priority run before that join, highest first: above the pool's own queues
+# (10), which must still be open to carry the shutdown to the workers
+multiprocessing.util.Finalize(None, shutdown_pool, exitpriority=100)
+
+
+def _submit(function, *args):
+    executor, slots = _executor()
+    if executor is None:
+        return function(*args)
+    if not slots.acquire(timeout=QUEUE_WAIT_SECONDS):
+        raise HashingOverloaded('Too many password operations in flight, retry shortly')
+    try:
+        try:
+            return executor.submit(function, *args).result()
+        except BrokenProcessPool:
+            # A worker that died (OOM killer, kill -9) breaks the pool for good:
+            # replace it and retry once, hashing has no side effects
+            _discard(executor)
+            executor, _slots = _executor()
+            return executor.submit(function, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_method():
+    return _config('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+
+
+def hash_password(password):
+    return _submit(generate_password_hash, password, hash_method())
+
+
+def verify_password(password_hash, password):
+    return _submit(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """True when the stored hash was made with other parameters than the configured ones."""
+    method = hash_method()
+    prefix = _method_prefixes.get(method)
+    if prefix is None:
+        # werkzeug fills in default parameters ('scrypt' -> 'scrypt:32768:8:1'), so take
+        # the canonical prefix from a real hash instead of parsing the method string
+        prefix = _submit(generate_password_hash, 'x', method).split('$', 1)[0]
+        _method_prefixes[method] = prefix
+    return password_hash.split('$', 1)[0] != prefix
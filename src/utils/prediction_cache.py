@@ -0,0 +1,202 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_TTL = 6 * 60 * 60
+
+
+class MemoryBackend:
+    """Per-process LRU store; every gunicorn worker keeps its own copy."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        """Store ``value`` and return how many entries were evicted to make room."""
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """LRU store in a shared SQLite file so every worker on the host shares hits."""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS prediction_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'expires_at REAL NOT NULL, last_used REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_prediction_cache_last_used '
+                'ON prediction_cache (last_used)'
+            )
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key, now):
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT value, expires_at FROM prediction_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute('DELETE FROM prediction_cache WHERE key = ?', (key,))
+            return None
+        conn.execute('UPDATE prediction_cache SET last_used = ? WHERE key = ?', (now, key))
+        return row[0]
+
+    def set(self, key, value, expires_at):
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO prediction_cache (key, value, expires_at, last_used) '
+            'VALUES (?, ?, ?, ?)', (key, value, expires_at, time.time())
+        )
+        overflow = len(self) - self.max_entries
+        if overflow <= 0:
+            return 0
+        conn.execute(
+            'DELETE FROM prediction_cache WHERE key IN ('
+            'SELECT key FROM prediction_cache ORDER BY last_used LIMIT ?)', (overflow,)
+        )
+        return overflow
+
+    def delete_prefix(self, prefix):
+        self._connection().execute(
+            'DELETE FROM prediction_cache WHERE substr(key, 1, ?) = ?', (len(prefix), prefix)
+        )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM prediction_cache')
+
+    def __len__(self):
+        return self._connection().execute('SELECT count(*) FROM prediction_cache').fetchone()[0]
+
+
+class PredictionCache:
+    """Prediction payloads keyed by user, data version and the current date.
+
+    The data version is bumped by every period/ovulation write, so a stale entry can
+    never be served; writes also drop the user's entries eagerly to free the slots.
+    Entries expire at the next local midnight because ovulation predictions depend
+    on today's date.
+    """
+
+    def __init__(self, backend, max_ttl=DEFAULT_MAX_TTL):
+        self.backend = backend
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind, user_id, version, today):
+        return f'{int(user_id)}:{kind}:{version}:{today.isoformat()}'
+
+    def _expires_at(self, now):
+        tomorrow = datetime.combine(datetime.fromtimestamp(now).date() + timedelta(days=1), datetime.min.time())
+        return min(tomorrow.timestamp(), now + self.max_ttl)
+
+    def get_or_compute(self, kind, user_id, version, compute):
+        """Return the cached ``(payload, status)`` or compute, store and return it."""
+        now = time.time()
+        key = self._key(kind, user_id, version, datetime.fromtimestamp(now).date())
+        cached = self.backend.get(key, now)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            payload, status = json.loads(cached)
+            return payload, status
+
+        payload, status = compute()
+        evicted = self.backend.set(key, json.dumps([payload, status]), self._expires_at(now))
+        with self._lock:
+            self.misses += 1
+            self.evictions += evicted
+        return payload, status
+
+    def invalidate_user(self, user_id):
+        self.backend.delete_prefix(f'{int(user_id)}:')
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': len(self.backend),
+            'max_entries': self.backend.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+def init_prediction_cache(app):
+    """Configure from PREDICTION_CACHE ('memory' or 'sqlite:///path') and PREDICTION_CACHE_SIZE."""
+    backend_url = app.config.get('PREDICTION_CACHE', 'memory')
+    max_entries = app.config.get('PREDICTION_CACHE_SIZE', DEFAULT_MAX_ENTRIES)
+    if backend_url.startswith('sqlite:///'):
+        backend = SQLiteBackend(backend_url[len('sqlite:///'):], max_entries)
+    elif backend_url == 'memory':
+        backend = MemoryBackend(max_entries)
+    else:
+        raise ValueError(f'Unsupported PREDICTION_CACHE backend: {backend_url}')
+    app.extensions['prediction_cache'] = PredictionCache(backend)
+    return app.extensions['prediction_cache']
+
+
+def prediction_cache():
+    return current_app.extensions['prediction_cache']
@@ -0,0 +1,114 @@
+"""In-memory manifest of ``src/static`` for the SPA catch-all route.
+
+Built once per worker by ``init_static_assets``: every file's bytes, content-hash
+ETag, mimetype, ``Cache-Control`` and, for compressible types, a gzip variant
+(a ``<name>.gz`` shipped next to the file, else compressed here at startup). A
+request is then a dict lookup, with no ``os.path.exists`` and no disk read, and
+unknown paths fall back to ``index.html`` the same way. A new frontend build is
+picked up when the workers restart.
+
+Fingerprinted files (``app-3f9c2a1b.js``, ``index.BxY3k9aQ.css``) never change
+under the same name and are cached for a year; everything else, ``index.html``
+included, is revalidated with its ETag on every use.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from collections import namedtuple
+from flask import Response, current_app, request
+
+# A hash-like name part with at least one digit, as emitted by Vite/webpack builds
+FINGERPRINT = re.compile(r'[.-](?=[A-Za-z0-9_]*\d)[A-Za-z0-9_]{8,32}\.[A-Za-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml',
+                      'image/x-icon', 'image/vnd.microsoft.icon', 'application/xml')
+GZIP_MIN_BYTES = 512
+INDEX = 'index.html'
+
+StaticAsset = namedtuple('StaticAsset', 'path body gzip_body etag mimetype cache_control')
+
+
+def _compressible(mimetype):
+    return mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _asset(root, path):
+    with open(os.path.join(root, path), 'rb') as f:
+        body = f.read()
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    gzip_body = None
+    if _compressible(mimetype) and len(body) >= GZIP_MIN_BYTES:
+        shipped = os.path.join(root, path + '.gz')
+        if os.path.isfile(shipped):
+            with open(shipped, 'rb') as f:
+                gzip_body = f.read()
+        else:
+            gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gzip_body) >= len(body):
+            gzip_body = None
+
+    fingerprinted = FINGERPRINT.search(os.path.basename(path)) is not None
+    return StaticAsset(
+        path=path,
+        body=body,
+        gzip_body=gzip_body,
+        etag=hashlib.sha256(body).hexdigest()[:32],
+        mimetype=mimetype,
+        cache_control=IMMUTABLE_CACHE_CONTROL if fingerprinted else REVALIDATE_CACHE_CONTROL
+    )
+
+
+def build_manifest(root):
+    """``{url path: StaticAsset}`` for every file under ``root``."""
+    manifest = {}
+    if root is None or not os.path.isdir(root):
+        return manifest
+    for directory, _dirs, files in os.walk(root):
+        for name in files:
+            path = os.path.relpath(os.path.join(directory, name), root).replace(os.sep, '/')
+            manifest[path] = _asset(root, path)
+    return manifest
+
+
+def _respond(asset):
+    use_gzip = asset.gzip_body is not None and request.accept_encodings['gzip'] > 0
+    # The two encodings are different byte sequences, so they get different ETags
+    etag = f'{asset.etag}-gz' if use_gzip else asset.etag
+    headers = {'Cache-Control': asset.cache_control}
+    if asset.gzip_body is not None:
+        headers['Vary'] = 'Accept-Encoding'
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = Response(asset.gzip_body if use_gzip else asset.body, mimetype=asset.mimetype, headers=headers)
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    return response
+
+
+def serve_static(path):
+    """Catch-all view: a manifest asset, else the SPA's ``index.html``."""
+    if current_app.static_folder is None:
+        return "Static folder not configured", 404
+
+    manifest = current_app.extensions['static_manifest']
+    asset = manifest.get(path) if path else None
+    if asset is None:
+        asset = manifest.get(INDEX)
+        if asset is None:
+            return "index.html not found", 404
+    return _respond(asset)
+
+
+def init_static_assets(app):
+    """Build the manifest of ``app.static_folder`` and route ``/`` and ``/<path>`` to it."""
+    app.extensions['static_manifest'] = build_manifest(app.static_folder)
+    app.add_url_rule('/', 'serve', serve_static, defaults={'path': ''})
+    app.add_url_rule('/<path:path>', 'serve', serve_static)
+    return app.extensions['static_manifest']
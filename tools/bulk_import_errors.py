@@ -0,0 +1,84 @@
+"""Malformed optional fields in the bulk import routes.
+
+Posts records whose flow_intensity, cervical_mucus or symptoms have the wrong type
+or do not fit their column to both bulk routes of a throwaway database. Fails
+unless strict mode rejects the batch with a 400 listing those rows, and lenient
+mode imports the valid rows and reports the others, never with a 500:
+
+    python -m tools.bulk_import_errors
+"""
+import os
+import sys
+import tempfile
+
+from src.main import create_app
+from src.models.migrations import upgrade_schema
+
+_tmpdir = tempfile.mkdtemp(prefix='bulk-import-errors-')
+app = create_app({
+    'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(_tmpdir, 'import.db')}",
+    'PASSWORD_HASH_WORKERS': 0, 'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'
+})
+with app.app_context():
+    upgrade_schema()
+
+# (route, list route, valid records, malformed records)
+CASES = [
+    ('/api/periods/bulk', '/api/periods?all=true', [
+        {'start_date': '2024-01-01', 'flow_intensity': 'medium', 'symptoms': 'cramps'},
+        {'start_date': '2024-01-29', 'flow_intensity': 'x' * 20},
+    ], [
+        {'start_date': '2024-02-26', 'flow_intensity': 'x' * 21},
+        {'start_date': '2024-03-25', 'flow_intensity': 3},
+        {'start_date': '2024-04-22', 'symptoms': ['cramps', 'fatigue']},
+        {'start_date': '2024-05-20', 'symptoms': {'name': 'cramps'}},
+    ]),
+    ('/api/ovulation/bulk', '/api/ovulation?all=true', [
+        {'ovulation_date': '2024-01-14', 'cervical_mucus': 'egg-white', 'symptoms': 'bloating'},
+    ], [
+        {'ovulation_date': '2024-02-11', 'cervical_mucus': 'x' * 51},
+        {'ovulation_date': '2024-03-10', 'cervical_mucus': ['dry']},
+        {'ovulation_date': '2024-04-07', 'symptoms': 42},
+    ]),
+]
+
+
+def _login(client):
+    client.post('/api/register', json={'username': 'importer', 'email': 'importer@example.com', 'password': 'secret'})
+    response = client.post('/api/login', json={'username': 'importer', 'password': 'secret'})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def main():
+    client = app.test_client()
+    headers = _login(client)
+    failures = []
+    for route, list_route, valid, malformed in CASES:
+        records = valid + malformed
+        bad_indexes = list(range(len(valid), len(records)))
+
+        response = client.post(route, headers=headers, json=records)
+        body = response.get_json()
+        if response.status_code != 400 or [error['index'] for error in body.get('errors', [])] != bad_indexes:
+            failures.append(f'strict {route} returned {response.status_code}: {body}')
+
+        response = client.post(f'{route}?mode=lenient', headers=headers, json=records)
+        body = response.get_json()
+        if response.status_code != 201 or body.get('inserted') != len(valid) \
+                or [error['index'] for error in body.get('errors', [])] != bad_indexes:
+            failures.append(f'lenient {route} returned {response.status_code}: {body}')
+
+        stored = client.get(list_route, headers=headers).get_json()
+        if len(stored) != len(valid):
+            failures.append(f'{route} stored {len(stored)} records, expected {len(valid)}')
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        return 1
+    print('Malformed optional fields are reported as row errors in strict and lenient mode')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Concurrent writers for one user against the change sequence behind GET /api/sync.
+
+Several threads create periods and ovulations for the same user through the test
+client, then all edit and delete the same periods, while another thread keeps
+syncing, each on its own connection of a throwaway database. Fails unless every
+write got its own ``change_seq``, the syncing client ends up holding exactly the
+server's records and the cycle summary matches the rows:
+
+    python -m tools.concurrent_writes --threads 4 --writes 40
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+
+from src.cli import verify_summary
+from src.main import create_app
+from src.models.cycle_summary import CycleSummary
+from src.models.migrations import upgrade_schema
+from src.models.ovulation import Ovulation
+from src.models.period import Period
+from src.models.user import db
+
+_tmpdir = tempfile.mkdtemp(prefix='concurrent-writes-')
+app = create_app({
+    'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(_tmpdir, 'writes.db')}",
+    'PASSWORD_HASH_WORKERS': 0, 'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'
+})
+with app.app_context():
+    upgrade_schema()
+
+
+def _login(client):
+    client.post('/api/register', json={'username': 'writer', 'email': 'writer@example.com', 'password': 'secret'})
+    response = client.post('/api/login', json={'username': 'writer', 'password': 'secret'})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def _writer(index, headers, writes, failures):
+    client = app.test_client()
+    for step in range(writes):
+        day = date(2000, 1, 1) + timedelta(days=(index * writes + step) * 29)
+        if step % 2:
+            response = client.post('/api/ovulation', headers=headers, json={'ovulation_date': day.isoformat()})
+        else:
+            response = client.post('/api/periods', headers=headers, json={'start_date': day.isoformat()})
+        if response.status_code != 201:
+            failures.append(f'write returned {response.status_code}: {response.get_json()}')
+
+
+def _editor(index, headers, period_ids, deleted, failures):
+    # Every editor moves every period by its own offset and deletes every fifth one,
+    # so all of them race for the same rows
+    client = app.test_client()
+    for position, period_id in enumerate(period_ids):
+        if position % 5 == 0:
+            response = client.delete(f'/api/periods/{period_id}', headers=headers)
+            if response.status_code == 200:
+                deleted.append(period_id)
+        else:
+            period = client.get(f'/api/periods/{period_id}', headers=headers).get_json()
+            if 'start_date' not in period:
+                continue
+            start_date = date.fromisoformat(period['start_date']) + timedelta(days=index % 3 - 1)
+            response = client.put(f'/api/periods/{period_id}', headers=headers, json={
+                'start_date': start_date.isoformat(),
+                'end_date': (start_date + timedelta(days=index + 3)).isoformat()
+            })
+        if response.status_code not in (200, 404):
+            failures.append(f'edit returned {response.status_code}: {response.get_json()}')
+
+
+def _run(target, count, args, syncer):
+    threads = [threading.Thread(target=target, args=(index,) + args) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        syncer.sync()
+    for thread in threads:
+        thread.join()
+
+
+class SyncClient:
+    """Applies /api/sync responses to a local copy, like the mobile app."""
+
+    def __init__(self, headers, failures):
+        self.client = app.test_client()
+        self.headers = headers
+        self.failures = failures
+        self.cursor = None
+        self.records = {'periods': {}, 'ovulations': {}}
+
+    def sync(self):
+        url = '/api/sync' if self.cursor is None else f'/api/sync?since={self.cursor}'
+        response = self.client.get(url, headers=self.headers)
+        if response.status_code != 200:
+            self.failures.append(f'sync returned {response.status_code}: {response.get_json()}')
+            return
+        payload = response.get_json()
+        if payload['reset']:
+            self.records = {'periods': {}, 'ovulations': {}}
+        for kind, records in self.records.items():
+            records.update((record['id'], record) for record in payload[kind])
+            for record_id in payload['deleted'][kind]:
+                records.pop(record_id, None)
+        self.cursor = payload['cursor']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--writes', type=int, default=40, help='records written per thread')
+    args = parser.parse_args()
+
+    headers = _login(app.test_client())
+    failures = []
+    syncer = SyncClient(headers, failures)
+    _run(_writer, args.threads, (headers, args.writes, failures), syncer)
+    period_ids = [
+        period['id'] for period in
+        app.test_client().get('/api/periods?all=true', headers=headers).get_json()
+    ]
+    deleted = []
+    _run(_editor, args.threads, (headers, period_ids, deleted, failures), syncer)
+    syncer.sync()
+    if len(set(deleted)) != len(deleted):
+        failures.append(f'{len(deleted) - len(set(deleted))} periods were deleted twice')
+
+    with app.app_context():
+        sequences = [row.change_seq for row in db.session.query(Period.change_seq)]
+        sequences += [row.change_seq for row in db.session.query(Ovulation.change_seq)]
+        for endpoint, expected, actual in verify_summary(CycleSummary.query.one()):
+            failures.append(f'summary {endpoint}: expected {expected}, got {actual}')
+    stored = args.threads * args.writes - len(deleted)
+    if len(sequences) != stored:
+        failures.append(f'{len(sequences)} records stored for {stored} writes')
+    if len(set(sequences)) != len(sequences):
+        failures.append(f'{len(sequences)} writes share {len(set(sequences))} change_seq values')
+
+    server = {
+        'periods': app.test_client().get('/api/periods?all=true', headers=headers).get_json(),
+        'ovulations': app.test_client().get('/api/ovulation?all=true', headers=headers).get_json(),
+    }
+    for kind, records in server.items():
+        if {record['id']: record for record in records} != syncer.records[kind]:
+            failures.append(f'the syncing client holds {len(syncer.records[kind])} {kind}, the server {len(records)}')
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        return 1
+    print(
+        f'{args.threads * args.writes} concurrent writes and {args.threads * len(period_ids)} edits got distinct '
+        'change sequences, all reached the syncing client and kept the summary exact'
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
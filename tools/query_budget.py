@@ -0,0 +1,199 @@
+"""SQL statement budgets for every /api route.
+
+Drives each route through the Flask test client against a throwaway database,
+counts the statements the request sends to SQLite (engine events on every engine,
+shards and the read engine included) and fails when a request runs more than the
+budget declared for it below. Statements a request runs more than once with the
+same parameters are printed as duplicates, the usual sign of an N+1 loop or of a
+lookup repeated in two helpers. Every /api route needs at least one budgeted
+request, so a new route cannot go unchecked:
+
+    python -m tools.query_budget
+    python -m tools.query_budget --verbose    # every request's count and statements
+
+Budgets are exact: lower one when a change saves statements, and treat raising
+one as a regression that needs a reason in the commit.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from collections import Counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.main import create_app
+from src.models.migrations import upgrade_schema
+
+_tmpdir = tempfile.mkdtemp(prefix='query-budget-')
+app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(_tmpdir, 'budget.db')}"})
+with app.app_context():
+    upgrade_schema()
+
+# (method, path, json body, statement budget), run in order as the seeded user; the
+# {placeholders} are filled in from the seeded records. Paths under /api/users and
+# /api/register, /api/login need no token.
+BUDGETS = [
+    ('POST', '/api/register', {'username': 'budget-c', 'email': 'c@example.com', 'password': 'secret'}, 4),
+    ('POST', '/api/login', {'username': 'budget-a', 'password': 'secret'}, 1),
+    ('GET', '/api/profile', None, 1),
+
+    ('GET', '/api/periods', None, 2),
+    ('GET', '/api/periods?limit=2&cursor={period_cursor}', None, 2),
+    ('GET', '/api/periods?all=true', None, 2),
+    ('GET', '/api/periods/{period_id}', None, 1),
+    ('POST', '/api/periods', {'start_date': '2024-07-03', 'symptoms': 'cramps, headache'}, 12),
+    ('POST', '/api/periods/bulk', [
+        {'start_date': '2024-08-03', 'end_date': '2024-08-07', 'symptoms': 'cramps'},
+        {'start_date': '2024-09-02', 'symptoms': 'fatigue'},
+    ], 15),
+    ('PUT', '/api/periods/{period_id}', {'flow_intensity': 'medium'}, 5),
+    ('PUT', '/api/periods/{period_id}', {'end_date': '2024-06-08', 'symptoms': 'bloating'}, 10),
+
+    ('GET', '/api/ovulation', None, 2),
+    ('GET', '/api/ovulation?limit=2&cursor={ovulation_cursor}', None, 2),
+    ('GET', '/api/ovulation/{ovulation_id}', None, 1),
+    ('POST', '/api/ovulation', {'ovulation_date': '2024-07-17', 'basal_body_temperature': 36.7}, 6),
+    ('POST', '/api/ovulation/bulk', [{'ovulation_date': '2024-08-17'}, {'ovulation_date': '2024-09-16'}], 6),
+    ('PUT', '/api/ovulation/{ovulation_id}', {'cervical_mucus': 'watery'}, 5),
+
+    ('GET', '/api/predict/period', None, 3),
+    ('GET', '/api/predict/period', None, 2),  # cached
+    ('GET', '/api/predict/ovulation', None, 5),
+    ('GET', '/api/predict/ovulation?history=all&half_life=3', None, 4),
+    ('GET', '/api/predict/cycles?count=6&estimator=median', None, 3),
+    ('GET', '/api/predict/cache-stats', None, 0),
+    ('GET', '/api/cycle-stats', None, 2),
+    ('GET', '/api/export?format=ndjson', None, 2),
+    ('GET', '/api/dashboard', None, 3),
+    ('GET', '/api/symptoms/stats', None, 4),
+    ('GET', '/api/calendar?month=2024-03', None, 4),
+    ('GET', '/api/sync', None, 4),
+    ('GET', '/api/sync?since={sync_cursor}', None, 5),
+
+    ('DELETE', '/api/periods/{period_id}', None, 10),
+    ('DELETE', '/api/ovulation/{ovulation_id}', None, 7),
+
+    ('GET', '/api/users', None, 1),
+    ('POST', '/api/users', {'username': 'budget-d', 'email': 'd@example.com', 'password': 'x'}, 2),
+    ('GET', '/api/users/{other_user_id}', None, 1),
+    ('PUT', '/api/users/{other_user_id}', {'email': 'b2@example.com'}, 2),
+    ('DELETE', '/api/users/{other_user_id}', None, 2),
+]
+
+
+def _seed(client):
+    tokens, user_ids = [], []
+    for name in ('budget-a', 'budget-b'):
+        response = client.post('/api/register', json={
+            'username': name, 'email': f'{name}@example.com', 'password': 'secret'
+        })
+        user_ids.append(response.get_json()['user']['id'])
+        tokens.append(response.get_json()['access_token'])
+
+    ids = {'other_user_id': user_ids[1]}
+    for token in tokens:
+        headers = {'Authorization': f'Bearer {token}'}
+        for month in range(1, 7):
+            response = client.post('/api/periods', headers=headers, json={
+                'start_date': f'2024-{month:02d}-03', 'end_date': f'2024-{month:02d}-07',
+                'symptoms': 'cramps, fatigue'
+            })
+            ids['period_id'] = response.get_json()['period']['id']
+            response = client.post('/api/ovulation', headers=headers, json={
+                'ovulation_date': f'2024-{month:02d}-17', 'symptoms': 'bloating'
+            })
+            ids['ovulation_id'] = response.get_json()['ovulation']['id']
+
+    # The measured requests run as the first user, on that user's newest records
+    headers = {'Authorization': f'Bearer {tokens[0]}'}
+    ids['period_id'] = client.get('/api/periods?limit=1', headers=headers).get_json()['items'][0]['id']
+    ids['ovulation_id'] = client.get('/api/ovulation?limit=1', headers=headers).get_json()['items'][0]['id']
+    ids['period_cursor'] = client.get('/api/periods?limit=2', headers=headers).get_json()['next_cursor']
+    ids['ovulation_cursor'] = client.get('/api/ovulation?limit=2', headers=headers).get_json()['next_cursor']
+    ids['sync_cursor'] = client.get('/api/sync', headers=headers).get_json()['cursor']
+    return headers, ids
+
+
+def measure():
+    """Return ``[(label, url, budget, [(statement, parameters)])]`` for every budgeted request."""
+    client = app.test_client()
+    headers, ids = _seed(client)
+
+    current = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        current.append((' '.join(statement.split()), parameters))
+
+    results = []
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        for method, path, body, budget in BUDGETS:
+            url = path.format(**ids)
+            public = path.startswith(('/api/users', '/api/register', '/api/login'))
+            current.clear()
+            response = client.open(url, method=method, headers=None if public else headers, json=body)
+            response.get_data()  # drain streamed responses while still counting
+            if response.status_code >= 400:
+                raise RuntimeError(f'{method} {url} returned {response.status_code}')
+            results.append((f'{method} {path}', url, budget, list(current)))
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+    return results
+
+
+def unbudgeted_routes():
+    """``METHOD rule`` of every /api route no budgeted request reaches."""
+    adapter = app.url_map.bind('localhost')
+    covered = set()
+    for method, path, _body, _budget in BUDGETS:
+        endpoint, _args = adapter.match(path.split('?')[0].format(
+            period_id=1, ovulation_id=1, other_user_id=1
+        ), method=method)
+        covered.add((method, endpoint))
+    return sorted(
+        f'{method} {rule.rule}'
+        for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+        if (method, rule.endpoint) not in covered
+    )
+
+
+def duplicates(statements):
+    counts = Counter((statement, repr(parameters)) for statement, parameters in statements)
+    return [(statement, parameters, count) for (statement, parameters), count in counts.items() if count > 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help='print every request and its statements')
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for route in unbudgeted_routes():
+        failures += 1
+        print(f'FAIL {route} has no budgeted request')
+
+    for label, url, budget, statements in measure():
+        repeated = duplicates(statements)
+        over = budget is None or len(statements) > budget
+        if over:
+            failures += 1
+        if over or repeated or args.verbose:
+            status = 'FAIL' if over else 'ok  '
+            print(f'{status} {label}: {len(statements)} statements, budget {budget}')
+        if over or args.verbose:
+            for statement, _parameters in statements:
+                print(f'    {statement}')
+        for statement, parameters, count in repeated:
+            print(f'  duplicate x{count}: {statement}  {parameters}')
+
+    if failures:
+        print(f'{failures} routes over budget or unbudgeted')
+        return 1
+    print('Every route is within its statement budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
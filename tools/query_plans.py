@@ -0,0 +1,161 @@
+"""EXPLAIN QUERY PLAN check for the per-user route queries.
+
+Drives the read paths of the period, ovulation, prediction, export, dashboard,
+symptom and calendar blueprints through the Flask test client against a throwaway database,
+captures every SELECT they issue and fails when SQLite plans one of them as a
+table scan or a temp B-tree sort.
+
+    python -m tools.query_plans
+"""
+import os
+import re
+import sys
+import tempfile
+
+from sqlalchemy import event
+from src.main import create_app
+from src.models.migrations import upgrade_schema
+from src.models.user import db
+
+_tmpdir = tempfile.mkdtemp(prefix='query-plans-')
+app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(_tmpdir, 'plans.db')}"})
+with app.app_context():
+    upgrade_schema()
+
+BAD_PLAN = re.compile(r'^(SCAN (?!CONSTANT ROW)|USE TEMP B-TREE)')
+
+# Aggregates grouped by a computed value (e.g. the cycle day of a symptom log) always
+# need a temp B-tree; it holds one entry per group within the user's index range
+GROUP_BY_ALLOWED = {'GET /api/symptoms/stats'}
+
+# (method, path, json body) per checked request; the {period_id}, {ovulation_id} and
+# {*_cursor} placeholders are filled in from the seeded records
+CHECKED_REQUESTS = [
+    ('GET', '/api/periods', None),
+    ('GET', '/api/periods?limit=2&cursor={period_cursor}', None),
+    ('GET', '/api/periods?all=true', None),
+    ('GET', '/api/periods?from=2024-02-01&to=2024-04-30', None),
+    ('GET', '/api/periods/{period_id}', None),
+    ('PUT', '/api/periods/{period_id}', {'flow_intensity': 'medium'}),
+    ('GET', '/api/ovulation', None),
+    ('GET', '/api/ovulation?limit=2&cursor={ovulation_cursor}', None),
+    ('GET', '/api/ovulation/{ovulation_id}', None),
+    ('GET', '/api/ovulation?from=2024-02-01&limit=2', None),
+    ('PUT', '/api/ovulation/{ovulation_id}', {'cervical_mucus': 'watery'}),
+    ('GET', '/api/predict/period', None),
+    ('GET', '/api/predict/ovulation', None),
+    ('GET', '/api/predict/ovulation?history=all&half_life=3', None),
+    ('GET', '/api/cycle-stats', None),
+    ('GET', '/api/predict/cycles?count=6&estimator=median', None),
+    ('GET', '/api/export?format=ndjson', None),
+    ('GET', '/api/dashboard', None),
+    ('GET', '/api/dashboard?sections=predict_ovulation,periods&limit=3', None),
+    ('GET', '/api/symptoms/stats', None),
+    ('GET', '/api/calendar?month=2024-03', None),
+    ('GET', '/api/sync', None),
+    ('DELETE', '/api/periods/{period_id}', None),
+    ('GET', '/api/sync?since={sync_cursor}', None),
+]
+
+
+def _seed(client):
+    tokens = []
+    for name in ('plan-a', 'plan-b'):
+        client.post('/api/register', json={
+            'username': name, 'email': f'{name}@example.com', 'password': 'secret'
+        })
+        response = client.post('/api/login', json={'username': name, 'password': 'secret'})
+        tokens.append(response.get_json()['access_token'])
+
+    ids = {}
+    for token in tokens:
+        headers = {'Authorization': f'Bearer {token}'}
+        for month in range(1, 7):
+            response = client.post('/api/periods', headers=headers, json={
+                'start_date': f'2024-{month:02d}-03', 'end_date': f'2024-{month:02d}-07',
+                'symptoms': 'cramps, fatigue'
+            })
+            ids['period_id'] = response.get_json()['period']['id']
+            response = client.post('/api/ovulation', headers=headers, json={
+                'ovulation_date': f'2024-{month:02d}-17', 'symptoms': 'bloating'
+            })
+            ids['ovulation_id'] = response.get_json()['ovulation']['id']
+
+    headers = {'Authorization': f'Bearer {tokens[-1]}'}
+    response = client.get('/api/periods?limit=2', headers=headers)
+    ids['period_cursor'] = response.get_json()['next_cursor']
+    response = client.get('/api/ovulation?limit=2', headers=headers)
+    ids['ovulation_cursor'] = response.get_json()['next_cursor']
+    response = client.get('/api/sync', headers=headers)
+    ids['sync_cursor'] = response.get_json()['cursor']
+    return tokens[-1], ids
+
+
+def explain(statement, parameters):
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        raw.close()
+
+
+def collect_plans():
+    """Return ``[(request, statement, plan_details)]`` for every checked SELECT."""
+    client = app.test_client()
+    token, ids = _seed(client)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    captured = []
+    current = {'request': None}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if current['request'] and statement.lstrip().upper().startswith('SELECT'):
+            captured.append((current['request'], statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        for method, path, body in CHECKED_REQUESTS:
+            url = path.format(**ids)
+            current['request'] = f'{method} {path}'
+            response = client.open(url, method=method, headers=headers, json=body)
+            response.get_data()  # drain streamed responses while still capturing
+            current['request'] = None
+            if response.status_code >= 400:
+                raise RuntimeError(f'{method} {url} returned {response.status_code}')
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+    with app.app_context():
+        return [
+            (request_label, statement, explain(statement, parameters))
+            for request_label, statement, parameters in captured
+        ]
+
+
+def main():
+    failures = 0
+    for request_label, statement, plan in collect_plans():
+        bad = [
+            detail for detail in plan
+            if BAD_PLAN.match(detail)
+            and not (request_label in GROUP_BY_ALLOWED and detail == 'USE TEMP B-TREE FOR GROUP BY')
+        ]
+        if bad:
+            failures += 1
+            print(f'FAIL {request_label}')
+            print(f'  {" ".join(statement.split())}')
+            for detail in plan:
+                print(f'    {detail}')
+    if failures:
+        print(f'{failures} route queries fall back to a scan or temp B-tree sort')
+        return 1
+    print('All route queries use an index')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
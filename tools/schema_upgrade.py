@@ -0,0 +1,126 @@
+"""Upgrade a database with the original schema to the current one.
+
+Builds the schema the app shipped with (user, period and ovulation only, no
+migrations applied) with a few rows in a throwaway file, runs ``upgrade_schema()``
+on it twice, and fails unless the result has the same tables, columns, indexes and
+foreign keys as a database created from scratch, with every row kept:
+
+    python -m tools.schema_upgrade
+"""
+import os
+import sys
+import tempfile
+
+from sqlalchemy import create_engine, inspect, text
+from src.main import create_app
+from src.models.migrations import MIGRATIONS, upgrade_schema
+
+# As created by the first release, see the baseline commit
+BASELINE_SCHEMA = [
+    '''CREATE TABLE user (
+        id INTEGER NOT NULL, username VARCHAR(80) NOT NULL, email VARCHAR(120) NOT NULL,
+        password_hash VARCHAR(128) NOT NULL, created_at DATETIME,
+        PRIMARY KEY (id), UNIQUE (username), UNIQUE (email)
+    )''',
+    '''CREATE TABLE period (
+        id INTEGER NOT NULL, user_id INTEGER NOT NULL, start_date DATE NOT NULL, end_date DATE,
+        flow_intensity VARCHAR(20), symptoms TEXT, created_at DATETIME, updated_at DATETIME,
+        PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES user (id)
+    )''',
+    '''CREATE TABLE ovulation (
+        id INTEGER NOT NULL, user_id INTEGER NOT NULL, ovulation_date DATE NOT NULL,
+        basal_body_temperature FLOAT, cervical_mucus VARCHAR(50), symptoms TEXT,
+        created_at DATETIME, updated_at DATETIME,
+        PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES user (id)
+    )''',
+]
+
+BASELINE_ROWS = [
+    "INSERT INTO user VALUES (1, 'old', 'old@example.com', 'x', '2023-01-01 00:00:00')",
+    "INSERT INTO period VALUES (1, 1, '2024-01-03', '2024-01-07', 'heavy', 'cramps, fatigue', NULL, NULL)",
+    "INSERT INTO period VALUES (2, 1, '2024-01-31', NULL, NULL, NULL, NULL, NULL)",
+    "INSERT INTO ovulation VALUES (1, 1, '2024-01-17', 36.6, 'watery', 'bloating', NULL, NULL)",
+]
+
+
+def describe(url):
+    """``{table: (columns, indexes, foreign keys)}`` of a database, plus its user_version."""
+    engine = create_engine(url)
+    try:
+        inspector = inspect(engine)
+        schema = {}
+        for table in inspector.get_table_names():
+            columns = sorted(
+                (column['name'], str(column['type']), column['nullable'])
+                for column in inspector.get_columns(table)
+            )
+            indexes = sorted(
+                (index['name'], tuple(index['column_names']), bool(index['unique']))
+                for index in inspector.get_indexes(table)
+            )
+            foreign_keys = sorted(
+                (tuple(fk['constrained_columns']), fk['referred_table'], fk['options'].get('ondelete'))
+                for fk in inspector.get_foreign_keys(table)
+            )
+            schema[table] = (columns, indexes, foreign_keys)
+        with engine.connect() as conn:
+            version = conn.execute(text('PRAGMA user_version')).scalar()
+        return schema, version
+    finally:
+        engine.dispose()
+
+
+def _upgraded(url, times=1):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': url})
+    with app.app_context():
+        for _ in range(times):
+            upgrade_schema()
+
+
+def main():
+    tmpdir = tempfile.mkdtemp(prefix='schema-upgrade-')
+    fresh_url = f"sqlite:///{os.path.join(tmpdir, 'fresh.db')}"
+    old_url = f"sqlite:///{os.path.join(tmpdir, 'baseline.db')}"
+
+    engine = create_engine(old_url)
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA + BASELINE_ROWS:
+            conn.execute(text(statement))
+    engine.dispose()
+
+    _upgraded(fresh_url)
+    _upgraded(old_url, times=2)  # the second run must find nothing to do
+
+    failures = 0
+    (expected, expected_version), (actual, actual_version) = describe(fresh_url), describe(old_url)
+    latest = MIGRATIONS[-1][0]
+    if (expected_version, actual_version) != (latest, latest):
+        failures += 1
+        print(f'FAIL user_version: fresh {expected_version}, upgraded {actual_version}, latest {latest}')
+    for table in sorted(set(expected) | set(actual)):
+        for part, want, got in zip(('columns', 'indexes', 'foreign keys'),
+                                   expected.get(table, ([],) * 3), actual.get(table, ([],) * 3)):
+            if want != got:
+                failures += 1
+                print(f'FAIL {table} {part}')
+                print(f'  fresh:    {want}')
+                print(f'  upgraded: {got}')
+
+    engine = create_engine(old_url)
+    with engine.connect() as conn:
+        counts = [conn.execute(text(f'SELECT count(*) FROM {table}')).scalar() for table in ('user', 'period', 'ovulation')]
+        links = conn.execute(text('SELECT count(*) FROM symptom_log')).scalar()
+    engine.dispose()
+    if counts != [1, 2, 1] or links != 3:
+        failures += 1
+        print(f'FAIL rows: user/period/ovulation {counts}, symptom links {links}')
+
+    if failures:
+        print(f'{failures} differences between the upgraded and a fresh database')
+        return 1
+    print(f'Baseline schema upgrades cleanly to version {latest}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())